@@ -112,6 +112,8 @@ MARKET_OPEN_HH: int   = _i("MARKET_OPEN_HH", 9)
 MARKET_OPEN_MM: int   = _i("MARKET_OPEN_MM", 15)
 MARKET_CLOSE_HH: int  = _i("MARKET_CLOSE_HH", 15)
 MARKET_CLOSE_MM: int  = _i("MARKET_CLOSE_MM", 30)
+# is_market_open() re-checks the clock at most this often (and always at open/close)
+MARKET_OPEN_CACHE_TTL_S: float = _f("MARKET_OPEN_CACHE_TTL_S", 30.0)
 
 # -----------------------------------------------------------------------------
 # Order defaults
@@ -168,6 +170,7 @@ PULL_TICK_INTERVAL_S: float = _f("PULL_TICK_INTERVAL_S", 1.0)
 LTP_CACHE_TTL_S: float      = _f("LTP_CACHE_TTL_S", 1.0)
 QUOTE_RETRY: int            = _i("QUOTE_RETRY", 2)
 QUOTE_RETRY_DELAY_S: float  = _f("QUOTE_RETRY_DELAY_S", 0.25)
+QUOTE_CACHE_TTL_S: float    = _f("QUOTE_CACHE_TTL_S", 1.0)
 
 # -----------------------------------------------------------------------------
 # Strategy defaults
@@ -197,6 +200,10 @@ ZS_EXIT_Z: float            = _f("ZS_EXIT_Z", 0.5)
 # Files (paths used by tools/utils; self-contained & back-compat)
 # -----------------------------------------------------------------------------
 TRADE_LOG_CSV: Path = _p("TRADE_LOG_CSV", DATA_DIR / "trade_log.csv")
+# rows are buffered and written by a background flush every TRADE_LOG_FLUSH_MS;
+# TRADE_LOG_UNBUFFERED=1 writes each row straight through (old behaviour)
+TRADE_LOG_FLUSH_MS: int     = _i("TRADE_LOG_FLUSH_MS", 500)
+TRADE_LOG_UNBUFFERED: bool  = _b("TRADE_LOG_UNBUFFERED", False)
 ORDERS_CSV: Path    = _p("ORDERS_CSV",    DATA_DIR / "orders.csv")
 ORDERS_LOG_CSV: Path = ORDERS_CSV  # alias
 
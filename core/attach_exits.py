@@ -11,6 +11,7 @@ from loguru import logger
 from utils.market_hours import IST
 from utils.ltp_fetcher import get_ltp
 from utils.oco_registry import new_group_id, record_primary, record_stop, record_target
+from utils.trade_log import flush_trade_log
 from utils.order_exec import (
     _make_sl_buy_for_short,
     _make_tp_buy_for_short,
@@ -153,6 +154,7 @@ def _dry_recent_shorts_from_log(lookback_minutes: int, symbol_filter: Optional[s
     rows: List[Dict[str, Any]] = []
     cutoff = _now_ist() - timedelta(minutes=max(1, lookback_minutes))
 
+    flush_trade_log()  # rows this process queued but hasn't written yet
     try:
         st = os.stat(TRADE_LOG_CSV)
         size = f"{st.st_size}B"
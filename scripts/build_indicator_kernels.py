@@ -0,0 +1,43 @@
+# scripts/build_indicator_kernels.py
+"""
+Ahead-of-time compile the indicator kernels (utils/_indicator_kernels.py) into
+utils/indicator_kernels_aot.<ext>, so live processes skip numba's JIT warm-up.
+
+Usage:
+  python -m scripts.build_indicator_kernels
+
+Needs numba (with numba.pycc) and a C compiler. Rebuild after changing the kernels
+or upgrading numpy; delete the built module to fall back to the JIT path.
+"""
+from __future__ import annotations
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def main() -> int:
+    try:
+        from numba.pycc import CC  # type: ignore
+    except Exception as e:
+        print(f"[build_indicator_kernels] numba.pycc unavailable: {e}")
+        return 1
+
+    from utils._indicator_kernels import AOT_EXPORTS
+
+    cc = CC("indicator_kernels_aot")
+    cc.output_dir = os.path.join(ROOT, "utils")
+    cc.verbose = False
+    for name, (sig, fn) in AOT_EXPORTS.items():
+        cc.export(name, sig)(fn)
+
+    cc.compile()
+    print(f"[build_indicator_kernels] built {cc.name} -> {cc.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
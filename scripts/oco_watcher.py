@@ -233,9 +233,16 @@ def main(argv: list[str] | None = None):
 
     # loop
     try:
+        period = max(1, int(args.interval))
+        next_tick = time.monotonic()
         while True:
             _one_pass(smart, dry_run=args.dry_run)
-            time.sleep(max(1, int(args.interval)))
+            # fixed cadence (monotonic deadline), not interval + pass duration
+            next_tick += period
+            now = time.monotonic()
+            if next_tick < now:
+                next_tick = now
+            time.sleep(next_tick - now)
     except KeyboardInterrupt:
         logger.info("OCO watcher stopping (Ctrl+C).")
 
@@ -0,0 +1,86 @@
+# utils/_indicator_kernels.py
+from __future__ import annotations
+
+# Array kernels shared by utils/indicators.py (float64 in, float64 out).
+#
+# Resolution order:
+#   1. utils/indicator_kernels_aot  — ahead-of-time build (scripts/build_indicator_kernels.py),
+#      no JIT warm-up at process start
+#   2. numba @njit(cache=True)      — compiled on first call, cached on disk afterwards
+#   3. plain Python                 — HAVE_KERNELS is False and callers use their pandas/numpy paths
+
+import numpy as np
+
+from utils._njit import njit, HAVE_NUMBA
+
+
+def _ewm_adjust_false(x: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    ewm(alpha=alpha, adjust=False).mean() over a float64 array, including pandas'
+    NaN handling (gaps keep decaying the old weight; leading NaNs stay NaN).
+    """
+    n = x.shape[0]
+    out = np.empty(n)
+    if n == 0:
+        return out
+    decay = 1.0 - alpha
+    w = x[0]
+    old_wt = 1.0
+    out[0] = w
+    for i in range(1, n):
+        cur = x[i]
+        if w == w:
+            old_wt *= decay
+            if cur == cur:
+                if w != cur:
+                    w = (old_wt * w + alpha * cur) / (old_wt + alpha)
+                old_wt = 1.0
+        elif cur == cur:
+            w = cur
+        out[i] = w
+    return out
+
+
+def _supertrend_loop(c: np.ndarray, ub: np.ndarray, lb: np.ndarray) -> np.ndarray:
+    """SuperTrend state machine over float64 close / upper band / lower band arrays."""
+    n = c.shape[0]
+    st = np.empty(n)
+    if n == 0:
+        return st
+    st[0] = ub[0]
+    prev_up = True
+    for i in range(1, n):
+        prev_st = st[i - 1]
+        # Python max/min semantics: keep the band if prev_st is not strictly beyond it
+        cur_upper = (prev_st if prev_st > ub[i] else ub[i]) if prev_up else ub[i]
+        cur_lower = (prev_st if prev_st < lb[i] else lb[i]) if not prev_up else lb[i]
+
+        if c[i] > cur_upper:
+            st[i] = cur_lower
+            prev_up = True
+        elif c[i] < cur_lower:
+            st[i] = cur_upper
+            prev_up = False
+        else:
+            st[i] = cur_lower if prev_up else cur_upper
+    return st
+
+
+# name -> AOT signature; read by scripts/build_indicator_kernels.py
+AOT_EXPORTS = {
+    "ewm_adjust_false": ("f8[:](f8[:], f8)", _ewm_adjust_false),
+    "supertrend_loop": ("f8[:](f8[:], f8[:], f8[:])", _supertrend_loop),
+}
+
+try:
+    from utils import indicator_kernels_aot as _aot  # type: ignore
+
+    ewm_adjust_false = _aot.ewm_adjust_false
+    supertrend_loop = _aot.supertrend_loop
+    HAVE_KERNELS = True
+    KERNEL_SOURCE = "aot"
+except Exception:
+    ewm_adjust_false = njit(cache=True)(_ewm_adjust_false)
+    supertrend_loop = njit(cache=True)(_supertrend_loop)
+    HAVE_KERNELS = HAVE_NUMBA
+    KERNEL_SOURCE = "jit" if HAVE_NUMBA else "python"
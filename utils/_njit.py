@@ -0,0 +1,18 @@
+# utils/_njit.py
+from __future__ import annotations
+
+# Optional numba: `njit` compiles when numba is installed, otherwise it is a
+# no-op and the decorated function runs as plain Python over NumPy arrays.
+try:
+    from numba import njit  # type: ignore
+    HAVE_NUMBA = True
+except Exception:
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):  # type: ignore
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def _wrap(fn):
+            return fn
+        return _wrap
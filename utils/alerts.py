@@ -13,6 +13,9 @@ TG_TIMEOUT = float(os.getenv("TELEGRAM_TIMEOUT", "10"))
 TG_RETRIES = int(os.getenv("TELEGRAM_RETRIES", "3"))
 SLACK_WEBHOOK = os.getenv("SLACK_WEBHOOK_URL")  # optional: https://hooks.slack.com/services/...
 
+# Any outbound sink configured? (dev/backtest usually has none)
+_HAS_SINK = bool((TG_TOKEN and TG_CHAT) or SLACK_WEBHOOK)
+
 # Telegram hard limit
 _TG_MAX = 4096
 
@@ -71,7 +74,7 @@ def _send_telegram(text: str, *, silent: Optional[bool] = None, parse_mode: Opti
                 sleep_s = min(6.0, 0.6 * attempt) + (0.2 * attempt)
                 time.sleep(sleep_s)
         if not ok:
-            logger.warning(f"Telegram notify failed (token={_redact_token(TG_TOKEN)}): {code} {body[:200]}")
+            logger.warning("Telegram notify failed (token={}): {} {}", _redact_token(TG_TOKEN), code, body[:200])
             ok_all = False
     return ok_all
 
@@ -80,7 +83,7 @@ def _send_slack(text: str) -> bool:
         return False
     code, body = _post_json(SLACK_WEBHOOK, {"text": text}, TG_TIMEOUT)
     if code != 200:
-        logger.warning(f"Slack notify failed: {code} {body[:200]}")
+        logger.warning("Slack notify failed: {} {}", code, body[:200])
         return False
     return True
 
@@ -91,22 +94,30 @@ def notify(message: str, *, silent: bool = False, parse_mode: Optional[str] = TG
       - Slack webhook (if SLACK_WEBHOOK_URL present)
       - Always logs to INFO as a fallback
     """
+    if not _HAS_SINK:
+        logger.warning("[ALERT]{} {}", " (silent)" if silent else "", message)
+        return
+
     sent_any = False
     try:
         sent_any |= _send_telegram(message, silent=silent, parse_mode=parse_mode)
     except Exception as e:
-        logger.warning(f"Telegram notify error: {e}")
+        logger.warning("Telegram notify error: {}", e)
 
     try:
         sent_any |= _send_slack(message)
     except Exception as e:
-        logger.warning(f"Slack notify error: {e}")
+        logger.warning("Slack notify error: {}", e)
 
     # Always log (so alerts show up in logs even if chat fails)
-    (logger.info if sent_any else logger.warning)(f"[ALERT]{' (silent)' if silent else ''} {message}")
+    (logger.info if sent_any else logger.warning)("[ALERT]{} {}", " (silent)" if silent else "", message)
 
 def notify_json(obj: Any, *, indent: int = 2, silent: bool = False) -> None:
     """Helper to pretty-print JSON in alerts."""
+    if not _HAS_SINK:
+        # log-only: let loguru stringify obj lazily instead of JSON-encoding it
+        logger.warning("[ALERT]{} {}", " (silent)" if silent else "", obj)
+        return
     try:
         txt = json.dumps(obj, indent=indent, ensure_ascii=False)
     except Exception:
@@ -1,16 +1,19 @@
 # utils/auto_trail.py
 from __future__ import annotations
 
+import heapq
+import itertools
 import os
 import threading
 import time
 from dataclasses import dataclass, field
-from typing import Optional, Tuple, Any
+from typing import Optional, Tuple, Any, List
 from loguru import logger
 from datetime import datetime, time as dtime
 
 from utils.market_hours import IST
 from execution.order_manager import OrderManager
+from utils.ltp_cache import get_cached_ltp
 
 # Optional: we’ll try both signatures of get_ltp
 try:
@@ -28,7 +31,7 @@ def _env_float(name: str, default: float) -> float:
     try:
         return float(str(val).strip())
     except Exception:
-        logger.warning(f"[trail] bad {name}={val!r}; using {default}")
+        logger.warning("[trail] bad {}={!r}; using {}", name, val, default)
         return float(default)
 
 def _env_int(name: str, default: int) -> int:
@@ -38,7 +41,7 @@ def _env_int(name: str, default: int) -> int:
     try:
         return int(float(str(val).strip()))
     except Exception:
-        logger.warning(f"[trail] bad {name}={val!r}; using {default}")
+        logger.warning("[trail] bad {}={!r}; using {}", name, val, default)
         return int(default)
 
 def _env_bool(name: str, default: bool) -> bool:
@@ -69,16 +72,29 @@ CUTOFF_HHMM: Tuple[int, int] = (
 )
 
 
+# Derived constants, bound once (prices are quantized to integer ticks on the hot path)
+_TICK            = TICK_SIZE if TICK_SIZE > 0 else 0.05
+_TICK_INV        = 1.0 / _TICK
+_THROTTLE        = max(1, TRAIL_THROTTLE_SECS)
+_COOLDOWN        = max(0, TRAIL_COOLDOWN_SECS)
+_TRIGGER_PCT     = max(0.0, TRAIL_TRIGGER_PCT)
+_MIN_DELTA       = _TICK * max(0, TRAIL_MIN_DELTA_TICKS)
+_DESIRED_ABOVE_T = max(0, DESIRED_ABOVE_LTP_TICKS)
+_LIMIT_EXTRA_T   = max(0, LIMIT_EXTRA_TICKS)
+
+
 # ------------------ helpers ------------------
 
 def _now_ist() -> datetime:
     return datetime.now(IST)
 
-def _round_tick(x: float) -> float:
-    # Always respect a sane tick size
-    step = TICK_SIZE if TICK_SIZE > 0 else 0.05
-    # Quantize, then keep 2dp (Angel accepts 2dp)
-    return round(round(float(x) / step) * step, 2)
+def _to_ticks(px: float) -> int:
+    # round-half-up to the nearest tick (prices are positive)
+    return int(px * _TICK_INV + 0.5)
+
+def _from_ticks(n: int) -> float:
+    # Angel accepts 2dp
+    return round(n * _TICK, 2)
 
 def _after_cutoff() -> bool:
     if not EXIT_ON_TIME_ENABLED:
@@ -86,10 +102,6 @@ def _after_cutoff() -> bool:
     hh, mm = CUTOFF_HHMM
     return _now_ist().time() >= dtime(hh, mm)
 
-def _ticks(n: int) -> float:
-    step = TICK_SIZE if TICK_SIZE > 0 else 0.05
-    return step * max(0, int(n))
-
 def _sf(x: Any, default: Optional[float] = None) -> Optional[float]:
     try:
         return float(x)
@@ -113,7 +125,7 @@ def _get_ltp_any(smart, exchange: str, tradingsymbol: Optional[str], token: str)
     except TypeError:
         pass
     except Exception as e:
-        logger.debug(f"[trail] get_ltp token-only failed: {e}")
+        logger.debug("[trail] get_ltp token-only failed: {}", e)
     # Try tradingsymbol + token variant
     try:
         if not tradingsymbol:
@@ -123,9 +135,13 @@ def _get_ltp_any(smart, exchange: str, tradingsymbol: Optional[str], token: str)
         if v is not None:
             return v
     except Exception as e:
-        logger.debug(f"[trail] get_ltp tradingsymbol+token failed: {e}")
+        logger.debug("[trail] get_ltp tradingsymbol+token failed: {}", e)
     raise RuntimeError("get_ltp: no working signature")
 
+def _cached_ltp(smart, exchange: str, tradingsymbol: Optional[str], token: str) -> float:
+    # Shared across trailers: legs on the same token hit the broker once per TTL
+    return get_cached_ltp(smart, exchange, tradingsymbol, token, fetch=_get_ltp_any)
+
 
 # ------------------ trailer core ------------------
 
@@ -144,46 +160,47 @@ class ShortLegTrailer:
 
     _armed: bool = False
     _last_adjust: float = 0.0         # last stop trigger we set (for monotonic rule)
-    _last_run_ts: float = 0.0
+    _last_run_ts: float = 0.0         # time.monotonic() of the last pass
     _stop_event: threading.Event = field(default_factory=threading.Event)
+    _om: Optional[OrderManager] = field(default=None, init=False, repr=False)
 
     # ---- readings ----
     def _leg_ltp(self) -> float:
-        return _get_ltp_any(self.smart, self.exchange, self.symbol, self.token)
+        return _cached_ltp(self.smart, self.exchange, self.symbol, self.token)
 
     def _pair_credit_now(self) -> float:
         """
         Combined premium (short call + short put) if both legs known,
         fallback: 2x current leg if the other isn't provided.
         """
-        a = _get_ltp_any(self.smart, self.exchange, self.symbol, self.token)
+        a = self._leg_ltp()
         if self.other_leg_symbol and self.other_leg_token:
-            b = _get_ltp_any(self.smart, self.exchange, self.other_leg_symbol, self.other_leg_token)
+            b = _cached_ltp(self.smart, self.exchange, self.other_leg_symbol, self.other_leg_token)
             return a + b
         return a * 2.0
 
     # ---- state ----
     def _throttled(self) -> bool:
-        return (time.time() - self._last_run_ts) < max(1, TRAIL_THROTTLE_SECS)
+        return (time.monotonic() - self._last_run_ts) < _THROTTLE
 
     def _arm_if_ready(self, since_entry_ts: float) -> None:
         if self._armed:
             return
-        if (time.time() - since_entry_ts) < max(0, TRAIL_COOLDOWN_SECS):
+        if (time.monotonic() - since_entry_ts) < _COOLDOWN:
             return
         try:
             credit_now = self._pair_credit_now()
         except Exception as e:
-            logger.debug(f"[trail] pair_credit_now error: {e}")
+            logger.debug("[trail] pair_credit_now error: {}", e)
             return
 
         drop = self.entry_credit_pair - credit_now  # drop in credit == profit made
         if drop <= 0:
             return
         gain_frac = drop / max(1e-6, self.entry_credit_pair)
-        if gain_frac >= max(0.0, TRAIL_TRIGGER_PCT):
+        if gain_frac >= _TRIGGER_PCT:
             self._armed = True
-            logger.success(f"[trail] ARMED {self.symbol} (pair gain {gain_frac:.0%}); next tick will move to >= entry")
+            logger.success("[trail] ARMED {} (pair gain {:.0%}); next tick will move to >= entry", self.symbol, gain_frac)
 
     # ---- math ----
     def _target_trigger_px(self, ltp_now: float) -> Tuple[float, float]:
@@ -198,87 +215,167 @@ class ShortLegTrailer:
         if not self._armed:
             return 0.0, 0.0
 
-        entry = float(self.entry_price)
+        # All math in integer ticks; convert back to price only at the boundary
+        entry_t = _to_ticks(float(self.entry_price))
+        ltp_t = _to_ticks(ltp_now)
         # Lock AUTO_TRAIL_PCT of further gains after arming
-        raw = entry - AUTO_TRAIL_PCT * max(0.0, entry - ltp_now)  # between [ltp_now, entry]
+        raw_t = entry_t - int(AUTO_TRAIL_PCT * max(0, entry_t - ltp_t) + 0.5)  # between [ltp_now, entry]
 
-        desired = max(ltp_now + _ticks(DESIRED_ABOVE_LTP_TICKS), raw)
+        desired_t = max(ltp_t + _DESIRED_ABOVE_T, raw_t)
 
         # First move at least to entry; afterwards, never increase
         if self._last_adjust > 0:
-            trig = min(self._last_adjust, desired)
+            trig_t = min(_to_ticks(self._last_adjust), desired_t)
         else:
-            trig = max(entry, desired)
+            trig_t = max(entry_t, desired_t)
 
-        trig = _round_tick(trig)
-        limit = _round_tick(trig + _ticks(LIMIT_EXTRA_TICKS))  # a few ticks above trigger
-        return trig, limit
+        limit_t = trig_t + _LIMIT_EXTRA_T  # a few ticks above trigger
+        return _from_ticks(trig_t), _from_ticks(limit_t)
 
     # ---- broker modify ----
     def _modify_stop(self, order_id: str, new_trigger: float, new_price: float) -> bool:
         """
         Route modifies via OrderManager for SDK compatibility.
+        One OrderManager is built lazily and reused for the trailer's lifetime.
         """
         try:
-            om = OrderManager(self.smart)
+            if self._om is None:
+                self._om = OrderManager(self.smart)
             updates = {
                 "ordertype": "STOPLOSS_LIMIT",
                 "triggerprice": new_trigger,
                 "price": new_price,
                 # Do NOT send variety change on modify; keep original ("NORMAL"/"AMO")
             }
-            res = om.modify(order_id, updates)
+            res = self._om.modify(order_id, updates)
             ok = bool(res.success)
             if ok:
-                logger.info(f"[trail] STOP modified {order_id} → trig={new_trigger:.2f} limit={new_price:.2f}")
+                logger.info("[trail] STOP modified {} → trig={:.2f} limit={:.2f}", order_id, new_trigger, new_price)
             else:
-                logger.warning(f"[trail] STOP modify failed {order_id}: {res.error}")
+                logger.warning("[trail] STOP modify failed {}: {}", order_id, res.error)
             return ok
         except Exception as e:
-            logger.warning(f"[trail] modify exception {order_id}: {e}")
+            logger.warning("[trail] modify exception {}: {}", order_id, e)
             return False
 
     # ---- main loop ----
-    def run_forever(self, since_entry_ts: float) -> None:
-        logger.info(f"[trail] start {self.symbol} stop={self.stop_order_id} entry={self.entry_price:.2f}")
-        while not self._stop_event.is_set():
-            if _after_cutoff():
-                logger.info("[trail] cutoff reached — stopping trailer")
-                break
+    def _next_delay(self) -> float:
+        """Seconds until the next throttle window opens (0.05s floor)."""
+        return max(0.05, _THROTTLE - (time.monotonic() - self._last_run_ts))
+
+    def _tick(self, since_entry_ts: float) -> bool:
+        """
+        One trailing pass. Returns False once the trailer should stop
+        (stop() called or cutoff reached); errors are logged and retried next pass.
+        """
+        if self._stop_event.is_set():
+            return False
+        if _after_cutoff():
+            logger.info("[trail] cutoff reached — stopping trailer")
+            return False
+        self._last_run_ts = time.monotonic()
+
+        try:
+            # 1) arming logic
+            self._arm_if_ready(since_entry_ts)
+
+            # 2) compute desired stop
+            ltp = self._leg_ltp()
+            trig, limit = self._target_trigger_px(ltp)
 
+            if trig <= 0 or limit <= 0:
+                return True
+
+            # 3) only send modify if meaningful change (in ticks)
+            if abs(trig - (self._last_adjust or 0.0)) >= _MIN_DELTA:
+                ok = self._modify_stop(self.stop_order_id, trig, limit)
+                if ok:
+                    self._last_adjust = trig
+        except Exception as e:
+            logger.warning("[trail] loop error {}: {}", self.symbol, e)
+        return True
+
+    def run_forever(self, since_entry_ts: float) -> None:
+        """
+        Dedicated-thread driver; spawn_trailer_for_short_leg uses the shared scheduler instead.
+        `since_entry_ts` is a time.monotonic() reading.
+        """
+        logger.info("[trail] start {} stop={} entry={:.2f}", self.symbol, self.stop_order_id, self.entry_price)
+        # wait() returns True as soon as stop() is called, so we never oversleep a stop
+        while not self._stop_event.wait(self._next_delay()):
             if self._throttled():
-                time.sleep(0.25)
                 continue
-            self._last_run_ts = time.time()
+            if not self._tick(since_entry_ts):
+                break
+        logger.info("[trail] exit {} stop={}", self.symbol, self.stop_order_id)
 
-            try:
-                # 1) arming logic
-                self._arm_if_ready(since_entry_ts)
+    # external control
+    def stop(self) -> None:
+        self._stop_event.set()
 
-                # 2) compute desired stop
-                ltp = self._leg_ltp()
-                trig, limit = self._target_trigger_px(ltp)
 
-                if trig <= 0 or limit <= 0:
-                    time.sleep(0.25)
-                    continue
+# ------------------ scheduler ------------------
+
+class TrailerScheduler:
+    """
+    One background thread servicing every trailer from a min-heap of
+    (next_run_ts, seq, trailer, since_entry_ts). Replaces a thread per leg.
+    The thread exits once no trailer is left; the next submit() starts a new one.
+    """
 
-                # 3) only send modify if meaningful change (in ticks)
-                if abs(trig - (self._last_adjust or 0.0)) >= _ticks(TRAIL_MIN_DELTA_TICKS):
-                    ok = self._modify_stop(self.stop_order_id, trig, limit)
-                    if ok:
-                        self._last_adjust = trig
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, ShortLegTrailer, float]] = []
+        self._cv = threading.Condition()
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
 
-                time.sleep(max(0.25, TRAIL_THROTTLE_SECS))
+    def submit(self, trailer: ShortLegTrailer, since_entry_ts: float, *, daemon: bool = True) -> None:
+        """
+        Schedule `trailer` for an immediate first pass. `daemon` only applies when this call
+        starts the scheduler thread (none running: first trailer, or all earlier ones exited);
+        while one is running, later values are ignored.
+        """
+        logger.info("[trail] start {} stop={} entry={:.2f}", trailer.symbol, trailer.stop_order_id, trailer.entry_price)
+        with self._cv:
+            heapq.heappush(self._heap, (time.monotonic(), next(self._seq), trailer, since_entry_ts))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=daemon, name="trail-scheduler")
+                self._thread.start()
+            self._cv.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                if not self._heap:
+                    # no trailer left (a ticking one is always pushed back before this check):
+                    # exit, so a non-daemon thread never outlives its trailers. submit() sees
+                    # _thread cleared under the same lock and starts a fresh one
+                    self._thread = None
+                    return
+                wait = self._heap[0][0] - time.monotonic()
+                if wait > 0:
+                    # re-check on wake: submit() may have pushed an earlier entry
+                    self._cv.wait(wait)
+                    continue
+                _, _, trailer, since_entry_ts = heapq.heappop(self._heap)
+
+            try:
+                keep = trailer._tick(since_entry_ts)
             except Exception as e:
-                logger.warning(f"[trail] loop error {self.symbol}: {e}")
-                time.sleep(0.75)
+                # this thread serves every trailer: one leg's error must not stop the others
+                logger.exception("[trail] pass failed {}: {}", trailer.symbol, e)
+                keep = True  # retried next pass, like errors inside _tick
+            if keep:
+                with self._cv:
+                    heapq.heappush(
+                        self._heap,
+                        (time.monotonic() + _THROTTLE, next(self._seq), trailer, since_entry_ts),
+                    )
+            else:
+                logger.info("[trail] exit {} stop={}", trailer.symbol, trailer.stop_order_id)
 
-        logger.info(f"[trail] exit {self.symbol} stop={self.stop_order_id}")
 
-    # external control
-    def stop(self) -> None:
-        self._stop_event.set()
+_SCHEDULER = TrailerScheduler()
 
 
 # ------------------ public API ------------------
@@ -297,9 +394,11 @@ def spawn_trailer_for_short_leg(
     daemon: bool = True,
 ) -> ShortLegTrailer:
     """
-    Fire-and-forget trailing thread for ONE short leg (options).
+    Fire-and-forget trailing for ONE short leg (options), run on the shared scheduler thread.
     Requires an existing STOPLOSS_LIMIT order; we will only modify it.
     Returns the trailer object so callers can stop() it if needed.
+    `daemon` sets the shared thread's daemon flag only if this call starts it (no trailer
+    running: the thread exits when the last one stops); otherwise it is ignored.
     """
     trailer = ShortLegTrailer(
         smart=smart,
@@ -312,13 +411,5 @@ def spawn_trailer_for_short_leg(
         other_leg_token=other_leg_token,
         exchange=exchange,
     )
-    since_entry_ts = time.time()
-    th = threading.Thread(
-        target=trailer.run_forever,
-        args=(since_entry_ts,),
-        daemon=daemon,
-        name=f"trail-{symbol}-{stop_order_id[-4:] if stop_order_id else 'xxxx'}",
-    )
-    th.start()
-    logger.info(f"[trail] spawned {th.name}")
+    _SCHEDULER.submit(trailer, time.monotonic(), daemon=daemon)
     return trailer
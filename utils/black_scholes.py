@@ -10,12 +10,15 @@ MAX_IV = 6.0           # hard cap for implied vol search (600%)
 MIN_IV = 1e-6
 
 # ---- standard normal helpers (no SciPy) -------------------------------------
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+_INV_SQRT_2 = 1.0 / math.sqrt(2.0)
+
 def _norm_pdf(x: float) -> float:
-    return math.exp(-0.5 * x * x) / math.sqrt(2.0 * math.pi)
+    return math.exp(-0.5 * x * x) * _INV_SQRT_2PI
 
 def _norm_cdf(x: float) -> float:
     # Abramowitz & Stegun approximation via erf
-    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+    return 0.5 * (1.0 + math.erf(x * _INV_SQRT_2))
 
 @dataclass
 class BSResult:
@@ -170,10 +173,16 @@ class BlackScholes:
         tol: float = 1e-6,
         max_iter: int = 100
     ) -> float:
-        # Initial guess (Brenner–Subrahmanyam style)
-        S, T = self.S, self.T
-        guess = max(min(math.sqrt(2 * math.pi / max(T, EPS_T)) * option_price / max(S, 1e-12), 1.5), MIN_IV)
-        sigma = guess
+        # Initial guess (Corrado–Miller); robust across moneyness, unlike the ATM-only
+        # Brenner–Subrahmanyam seed. Puts are mapped to the call price via parity.
+        T = max(self.T, EPS_T)
+        S = self.S * math.exp(-self.q * T)
+        X = self.K * math.exp(-self.r * T)
+        c = option_price if kind == "C" else option_price + S - X
+        y = 0.5 * (S - X)
+        disc = max((c - y) ** 2 - (S - X) ** 2 / math.pi, 0.0)
+        guess = math.sqrt(2 * math.pi / T) / max(S + X, 1e-12) * (c - y + math.sqrt(disc))
+        sigma = max(min(guess, 1.5), MIN_IV)
 
         def price_and_vega(sig: float) -> Tuple[float, float]:
             sig = max(sig, EPS_SIGMA)
@@ -1,9 +1,11 @@
 # utils/clock.py
 from __future__ import annotations
+import selectors
 import socket
 import struct
+import threading
 import time
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 
 # Minimal SNTP. We hit a few servers and take the median offset.
 _NTP_SERVERS = [
@@ -12,44 +14,111 @@ _NTP_SERVERS = [
     "pool.ntp.org",
 ]
 _NTP_DELTA = 2208988800  # NTP epoch (1900) → Unix epoch (1970)
+_NTP_REQUEST = b"\x1b" + 47 * b"\0"  # LI=0, VN=3/4, Mode=3 (client)
+_TRANSMIT_FMT = struct.Struct("!II")  # transmit timestamp at byte offset 40
 
-def _query_ntp(host: str, timeout: float = 2.0) -> Optional[float]:
+# Last good reading: (measured_at, skew, successes); guarded by _LOCK
+_LAST: Optional[Tuple[float, float, int]] = None
+_LOCK = threading.Lock()
+_REFRESHER: Optional[threading.Thread] = None
+
+def _offset_from_reply(data: bytes, rtt: float, t_recv: float) -> Optional[float]:
     """
-    Returns server_time - local_time (seconds) or None on failure.
+    server_time - local_time (seconds) from one reply, or None if it's short.
     Positive => local clock is behind. Negative => local clock is ahead.
+    `rtt` comes from time.monotonic() so a clock step mid-query can't skew it;
+    `t_recv` is the wall-clock receive time the server timestamp is compared to.
     """
-    try:
-        addr = (host, 123)
-        packet = b"\x1b" + 47 * b"\0"  # LI=0, VN=3/4, Mode=3 (client)
-        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
-            s.settimeout(timeout)
-            t0 = time.time()
-            s.sendto(packet, addr)
-            data, _ = s.recvfrom(512)
-            t3 = time.time()
-        if len(data) < 48:
-            return None
-        secs, frac = struct.unpack("!II", data[40:48])  # transmit timestamp
-        server_tx = secs - _NTP_DELTA + (frac / 2**32)
-        t_local = (t0 + t3) / 2.0  # crude delay compensation
-        return float(server_tx - t_local)
-    except Exception:
+    if len(data) < 48:
         return None
+    secs, frac = _TRANSMIT_FMT.unpack_from(data, 40)
+    server_tx = secs - _NTP_DELTA + (frac / 2**32)
+    t_local = t_recv - rtt / 2.0  # crude delay compensation
+    return float(server_tx - t_local)
+
+def _query_ntp_many(hosts: List[str], samples: int, timeout: float = 2.0) -> List[float]:
+    """
+    Query all hosts concurrently; collect up to `samples` offsets.
+    Wall time is bounded by the slowest responder (or `timeout`), not the sum.
+    """
+    sel = selectors.DefaultSelector()
+    sent: Dict[socket.socket, float] = {}
+    offsets: List[float] = []
+    try:
+        for host in hosts:
+            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                s.setblocking(False)
+                t0 = time.monotonic()
+                s.sendto(_NTP_REQUEST, (host, 123))
+            except Exception:
+                s.close()
+                continue
+            sent[s] = t0
+            sel.register(s, selectors.EVENT_READ)
+
+        deadline = time.monotonic() + timeout
+        while sent and len(offsets) < samples:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for key, _ in sel.select(timeout=remaining):
+                s = key.fileobj
+                t0 = sent.pop(s)  # type: ignore[arg-type]
+                sel.unregister(s)
+                try:
+                    data, _ = s.recvfrom(512)  # type: ignore[union-attr]
+                    off = _offset_from_reply(data, time.monotonic() - t0, time.time())
+                    if off is not None:
+                        offsets.append(off)
+                except Exception:
+                    pass
+                finally:
+                    s.close()  # type: ignore[union-attr]
+    finally:
+        for s in sent:
+            s.close()
+        sel.close()
+    return offsets[:samples]
 
-def measure_clock_skew(samples: int = 3) -> Tuple[float, int]:
-    """Return (median_offset_seconds, successes)."""
-    offsets = []
-    for host in _NTP_SERVERS:
-        off = _query_ntp(host)
-        if off is not None:
-            offsets.append(off)
-        if len(offsets) >= samples:
-            break
+def _measure_now(samples: int) -> Tuple[float, int]:
+    global _LAST
+    offsets = _query_ntp_many(_NTP_SERVERS, samples)
     if not offsets:
         return 0.0, 0
     offsets.sort()
-    mid = offsets[len(offsets)//2]
-    return float(mid), len(offsets)
+    mid = float(offsets[len(offsets)//2])
+    with _LOCK:
+        _LAST = (time.monotonic(), mid, len(offsets))
+    return mid, len(offsets)
+
+def measure_clock_skew(samples: int = 3, max_age: float = 60.0) -> Tuple[float, int]:
+    """
+    Return (median_offset_seconds, successes).
+    A good reading younger than `max_age` seconds is reused instead of re-querying;
+    while start_background_refresh() is running the last good reading is always reused.
+    """
+    with _LOCK:
+        last = _LAST
+        refreshing = _REFRESHER is not None and _REFRESHER.is_alive()
+    if last is not None and (refreshing or (time.monotonic() - last[0]) < max_age):
+        return last[1], last[2]
+    return _measure_now(samples)
+
+def start_background_refresh(period: float = 300.0, samples: int = 3) -> None:
+    """Refresh the cached skew every `period` seconds on a daemon thread (idempotent)."""
+    global _REFRESHER
+    with _LOCK:
+        if _REFRESHER is not None and _REFRESHER.is_alive():
+            return
+
+        def _loop() -> None:
+            while True:
+                _measure_now(samples)
+                time.sleep(period)
+
+        _REFRESHER = threading.Thread(target=_loop, daemon=True, name="clock-skew-refresh")
+        _REFRESHER.start()
 
 def check_clock_drift(max_skew_seconds: float = 2.0) -> Tuple[bool, float, int]:
     """
@@ -1,18 +1,56 @@
 # utils/dedupe.py
 from __future__ import annotations
 import hashlib, time
-from typing import Dict, Any
+from typing import Dict, Any, Set
 
-_seen = {}
+# Non-cryptographic 64-bit digest: XXH3 if available, else 8-byte BLAKE2b
+try:
+    import xxhash  # type: ignore
 
-def hash_order(order: Dict[str, Any]) -> str:
-    m = hashlib.sha1()
-    m.update(str(sorted(order.items())).encode())
-    return m.hexdigest()
+    def _hasher():
+        return xxhash.xxh3_64()
+except Exception:
+    def _hasher():
+        return hashlib.blake2b(digest_size=8)
+
+class _SlidingDedupe:
+    """
+    Two hash buckets rotated every `window`: anything seen within the last
+    window is always caught, and entries older than two windows drop out
+    without any scan. Memory is bounded by ~2x orders per window.
+    """
+    __slots__ = ("a", "b", "t_switch", "window_ns")
+
+    def __init__(self, window_ms: int) -> None:
+        self.a: Set[int] = set()
+        self.b: Set[int] = set()
+        self.window_ns = int(window_ms) * 1_000_000
+        self.t_switch = time.monotonic_ns() + self.window_ns
+
+    def seen(self, h: int) -> bool:
+        now = time.monotonic_ns()
+        if now >= self.t_switch:
+            # rotate; after a full idle window the previous bucket is stale too
+            self.b = self.a if now < self.t_switch + self.window_ns else set()
+            self.a = set()
+            self.t_switch = now + self.window_ns
+        if h in self.a:
+            return True
+        self.a.add(h)  # (re)stamp into the current bucket, like the old timestamp refresh
+        return h in self.b
+
+# one window per distinct window_ms (callers normally use the default)
+_seen: Dict[int, _SlidingDedupe] = {}
+
+def hash_order(order: Dict[str, Any]) -> int:
+    m = _hasher()
+    # one encoded segment per field; repr keeps 1 and "1" distinct
+    for k in sorted(order):
+        m.update(f"{k!r}\x1f{order[k]!r}\x1e".encode())
+    return int.from_bytes(m.digest(), "big")
 
 def is_duplicate(order: Dict[str, Any], window_ms: int = 1500) -> bool:
-    h = hash_order(order)
-    now = time.time()*1000
-    last = _seen.get(h, 0)
-    _seen[h] = now
-    return (now - last) < window_ms
+    win = _seen.get(window_ms)
+    if win is None:
+        win = _seen.setdefault(window_ms, _SlidingDedupe(window_ms))
+    return win.seen(hash_order(order))
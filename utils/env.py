@@ -3,11 +3,11 @@ import os
 TRUE = {"1","true","yes","on","y","t"}
 FALSE = {"0","false","no","off","n","f"}
 
+# one lookup per call instead of two set probes
+_BOOL_MAP = {**{k: True for k in TRUE}, **{k: False for k in FALSE}}
+
 def get_bool(name: str, default: bool) -> bool:
     v = os.getenv(name)
     if v is None:
         return default
-    v = v.strip().lower()
-    if v in TRUE: return True
-    if v in FALSE: return False
-    return default
+    return _BOOL_MAP.get(v.strip().lower(), default)
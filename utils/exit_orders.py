@@ -1,11 +1,16 @@
 from __future__ import annotations
+import math
 from typing import Dict, Optional
 from loguru import logger
 
+# Tick size by (upper-case) exchange; callers below already normalise the exchange
+_TICK: Dict[str, float] = {"NFO": 0.05}
+_DEFAULT_TICK = 0.01
+
 def _round_tick(px: float, *, exchange: str = "NFO") -> float:
-    tick = 0.05 if (exchange or "").upper() == "NFO" else 0.01
-    steps = round(float(px) / tick)
-    return round(steps * tick, 2)
+    tick = _TICK.get(exchange, _DEFAULT_TICK)
+    # half-up to the nearest tick; the final round(.., 2) keeps order prices free of float noise
+    return round(math.floor(px / tick + 0.5) * tick, 2)
 
 def make_sl_buy_for_short(
     primary_sell: Dict,
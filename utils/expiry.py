@@ -1,6 +1,7 @@
 # utils/expiry.py
 from __future__ import annotations
-from datetime import date, datetime, timedelta
+import calendar
+from datetime import date, datetime
 from typing import Optional, Iterable, Set, Dict
 
 # Weekday numbers: Mon=0 … Sun=6
@@ -18,10 +19,20 @@ def _to_date(d: Optional[date | datetime] = None) -> date:
 def _is_business_day(d: date, holidays: Set[date]) -> bool:
     return d.weekday() < 5 and d not in holidays
 
+# Ordinal helpers: date.toordinal() is 1 for Mon 0001-01-01, so weekday == (ord - 1) % 7
+def _ord_weekday(o: int) -> int:
+    return (o - 1) % 7
+
+def _holiday_ords(holidays: Optional[Iterable[date]]) -> Set[int]:
+    return {h.toordinal() for h in (holidays or ())}
+
+def _shift_ord_to_prev_business_day(o: int, holiday_ords: Set[int]) -> int:
+    while _ord_weekday(o) >= 5 or o in holiday_ords:
+        o -= 1
+    return o
+
 def _shift_to_prev_business_day(d: date, holidays: Set[date]) -> date:
-    while not _is_business_day(d, holidays):
-        d -= timedelta(days=1)
-    return d
+    return date.fromordinal(_shift_ord_to_prev_business_day(d.toordinal(), _holiday_ords(holidays)))
 
 def get_next_weekly_expiry(
     ref: Optional[date | datetime] = None,
@@ -35,16 +46,16 @@ def get_next_weekly_expiry(
     Next weekly expiry for a given weekday (default Thu).
     If holiday_shift=True, shift to previous business day using provided holidays.
     """
-    today = _to_date(ref)
-    holidays_set: Set[date] = set(holidays or ())
+    o = _to_date(ref).toordinal()
 
-    if today.weekday() == weekday:
-        target = today if include_today_if_expiry else today + timedelta(days=7)
-    else:
-        days_ahead = (weekday - today.weekday()) % 7 or 7
-        target = today + timedelta(days=days_ahead)
+    days_ahead = (weekday - _ord_weekday(o)) % 7
+    if days_ahead == 0 and not include_today_if_expiry:
+        days_ahead = 7
+    target = o + days_ahead
 
-    return _shift_to_prev_business_day(target, holidays_set) if holiday_shift else target
+    if holiday_shift:
+        target = _shift_ord_to_prev_business_day(target, _holiday_ords(holidays))
+    return date.fromordinal(target)
 
 def next_thursday(ref: Optional[date | datetime] = None, include_today_if_thu: bool = True) -> date:
     # Backwards compatible alias
@@ -72,16 +83,10 @@ def last_thursday_of_month(ref: Optional[date | datetime] = None,
     """
     Monthly expiry (last Thursday), optionally shifted back for holidays/weekends.
     """
-    d = _to_date(ref).replace(day=1)
-    # move to first day of next month
-    if d.month == 12:
-        nxt = d.replace(year=d.year+1, month=1)
-    else:
-        nxt = d.replace(month=d.month+1)
-    # step back to last day of current month, then to last Thursday
-    last_day = nxt - timedelta(days=1)
-    back = (last_day.weekday() - THURSDAY) % 7
-    target = last_day - timedelta(days=back)
+    d = _to_date(ref)
+    # last day of the month, then step back to Thursday — all in ordinals
+    last_ord = date(d.year, d.month, calendar.monthrange(d.year, d.month)[1]).toordinal()
+    target = last_ord - (_ord_weekday(last_ord) - THURSDAY) % 7
     if holiday_shift:
-        target = _shift_to_prev_business_day(target, set(holidays or ()))
-    return target
+        target = _shift_ord_to_prev_business_day(target, _holiday_ords(holidays))
+    return date.fromordinal(target)
@@ -1,6 +1,9 @@
 from __future__ import annotations
+import re
 from datetime import date, timedelta
-from typing import Tuple, Dict
+from functools import lru_cache
+from typing import Tuple, Dict, List
+import numpy as np
 import pandas as pd
 
 from utils.instruments import _read_instruments_df
@@ -9,6 +12,10 @@ from utils.instruments import _read_instruments_df
 # Expiry helpers
 # ----------------------------------------------------------
 
+# Weekly expiry weekday by underlying (0=Mon … 6=Sun); unknown → Thursday
+_SYM_TO_WD: Dict[str, int] = {"NIFTY": 3, "BANKNIFTY": 3, "FINNIFTY": 1, "SENSEX": 4}
+_UNDERLYING_RE = re.compile(r"^[A-Z]+")
+
 def _nearest_weekday(base: date, weekday: int) -> date:
     """Return the next occurrence of weekday (0=Mon … 6=Sun)."""
     days_ahead = (weekday - base.weekday()) % 7
@@ -25,15 +32,9 @@ def nearest_weekly_expiry(symbol: str, today: date | None = None) -> date:
       - SENSEX: Friday
     """
     today = today or date.today()
-    sym = symbol.upper()
-    if "BANKNIFTY" in sym or "NIFTY" in sym:
-        return _nearest_weekday(today, 3)   # Thursday
-    if "FINNIFTY" in sym:
-        return _nearest_weekday(today, 1)   # Tuesday
-    if "SENSEX" in sym:
-        return _nearest_weekday(today, 4)   # Friday
-    # fallback: Thursday
-    return _nearest_weekday(today, 3)
+    m = _UNDERLYING_RE.match(symbol.strip().upper())
+    wd = _SYM_TO_WD.get(m.group(0), 3) if m else 3
+    return _nearest_weekday(today, wd)
 
 # ----------------------------------------------------------
 # ATM strike + tokens
@@ -44,27 +45,55 @@ def round_strike(symbol: str, spot: float) -> int:
     step = 50 if "NIFTY" in symbol.upper() else 100
     return int(round(spot / step) * step)
 
+@lru_cache(maxsize=1)
+def _indexed_options() -> Dict[Tuple[str, pd.Timestamp, float], List[int]]:
+    """
+    One-time index over the cached instruments table:
+      (NAME, expiry_dt, strike_rupees) -> [ce_pos, pe_pos, first_pos]
+    Positions are df.iloc offsets (-1 when that side is absent); first_pos is
+    the first row of the chain at that strike, used for lotsize.
+    """
+    df = _read_instruments_df()
+    sym = df["symbol"].astype(str)
+    side = np.where(sym.str.endswith("CE"), "CE", np.where(sym.str.endswith("PE"), "PE", ""))
+    keys = pd.DataFrame({
+        "name": df["name"].astype(str).str.upper().to_numpy(),
+        "exp": df["expiry_dt"].to_numpy(),
+        "strike": pd.to_numeric(df["strike_rupees"], errors="coerce").to_numpy(dtype="float64"),
+        "side": side,
+        "pos": np.arange(len(df)),
+    })
+    keys = keys[keys["exp"].notna() & keys["strike"].notna()]
+    cols = ["name", "exp", "strike"]
+
+    def _pairs(part: pd.DataFrame):
+        part = part.drop_duplicates(cols)  # keep first, like .iloc[0] on the filtered chain
+        ks = zip(part["name"], pd.DatetimeIndex(part["exp"]), part["strike"].astype(float))
+        return zip(ks, part["pos"].tolist())
+
+    index: Dict[Tuple[str, pd.Timestamp, float], List[int]] = {}
+    for key, p in _pairs(keys):
+        index[key] = [-1, -1, p]
+    for slot, tag in ((0, "CE"), (1, "PE")):
+        for key, p in _pairs(keys[keys["side"] == tag]):
+            index[key][slot] = p
+    return index
+
 def pick_atm_tokens(symbol: str, spot: float) -> Tuple[Dict, Dict, int]:
     """
     Given symbol (NIFTY/BANKNIFTY/FINNIFTY/SENSEX) and spot,
     return (call_row, put_row, lotsize).
     """
-    df = _read_instruments_df()
     expiry = nearest_weekly_expiry(symbol)
     strike = round_strike(symbol, spot)
 
-    # Filter option chain
-    opt_df = df[
-        (df["name"].str.upper() == symbol.upper())
-        & (df["expiry_dt"] == pd.to_datetime(expiry))
-        & (df["strike_rupees"] == strike)
-    ]
-
-    if opt_df.empty:
+    hit = _indexed_options().get((symbol.upper(), pd.Timestamp(expiry), float(strike)))
+    if hit is None or hit[0] < 0 or hit[1] < 0:
         raise RuntimeError(f"No option rows found for {symbol} {expiry} strike={strike}")
 
-    ce = opt_df[opt_df["symbol"].str.endswith("CE")].iloc[0].to_dict()
-    pe = opt_df[opt_df["symbol"].str.endswith("PE")].iloc[0].to_dict()
-    lotsize = int(opt_df["lotsize"].iloc[0])
+    df = _read_instruments_df()
+    ce = df.iloc[hit[0]].to_dict()
+    pe = df.iloc[hit[1]].to_dict()
+    lotsize = int(df["lotsize"].iloc[hit[2]])
 
     return ce, pe, lotsize
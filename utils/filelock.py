@@ -0,0 +1,42 @@
+# utils/filelock.py
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+try:  # cross-process lock: flock on POSIX, msvcrt byte-range lock on Windows
+    import fcntl  # type: ignore
+    msvcrt = None
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+    import msvcrt  # type: ignore
+
+
+@contextmanager
+def file_lock(path: Union[str, Path], exclusive: bool) -> Iterator[None]:
+    """
+    Hold a cross-process lock on the sidecar file `path` (shared or exclusive; always
+    exclusive on Windows). The OS drops it if the holder crashes.
+    """
+    path = Path(path)
+    try:
+        fh = open(path, "a+b")
+    except FileNotFoundError:
+        # first use in a fresh data dir: create it then, not on every call
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fh = open(path, "a+b")
+    with fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
@@ -6,6 +6,7 @@ from datetime import datetime, timedelta, timezone
 import random
 from typing import Dict, Literal, Optional
 
+import numpy as np
 import pandas as pd
 
 # IST helpers
@@ -24,7 +25,13 @@ Interval = Literal[
 ]
 
 
-@dataclass
+def _fmt_ist(dt: datetime) -> str:
+    """'YYYY-MM-DD HH:MM' in IST without tz info (cheaper than strftime)."""
+    t = dt.astimezone(IST)
+    return f"{t.year:04d}-{t.month:02d}-{t.day:02d} {t.hour:02d}:{t.minute:02d}"
+
+
+@dataclass(slots=True, frozen=True)
 class CandleRequest:
     exchange: Literal["NSE", "NFO", "BSE"]
     symboltoken: str
@@ -37,8 +44,8 @@ class CandleRequest:
         Angel expects *naive* local timestamps in "YYYY-MM-DD HH:MM".
         We build times in IST and format without timezone info.
         """
-        fd = self.from_dt_ist.astimezone(IST).strftime("%Y-%m-%d %H:%M")
-        td = self.to_dt_ist.astimezone(IST).strftime("%Y-%m-%d %H:%M")
+        fd = _fmt_ist(self.from_dt_ist)
+        td = _fmt_ist(self.to_dt_ist)
         return {
             "exchange": self.exchange,
             "symboltoken": self.symboltoken,
@@ -100,25 +107,44 @@ def _resp_to_df(resp: Dict) -> pd.DataFrame:
         return pd.DataFrame(columns=["time", "open", "high", "low", "close", "volume"])
 
     rows = resp["data"]
-    df = pd.DataFrame(rows, columns=["time", "open", "high", "low", "close", "volume"])
+    n = len(rows)
+    # Build columns straight into typed arrays (one allocation, no per-column recopy)
+    ts_arr = np.empty(n, dtype=object)
+    ohlcv = np.empty((n, 5), dtype="float64")
+    try:
+        for i, r in enumerate(rows):
+            ts_arr[i] = r[0]
+            ohlcv[i] = r[1:6]
+    except (TypeError, ValueError):
+        # Odd payload (strings/None in numeric fields): coerce column-wise like before
+        raw = pd.DataFrame(rows, columns=["time", "open", "high", "low", "close", "volume"])
+        ts_arr = raw["time"].to_numpy(dtype=object)
+        ohlcv = raw[["open", "high", "low", "close", "volume"]].apply(
+            pd.to_numeric, errors="coerce"
+        ).to_numpy(dtype="float64")
 
     # Parse time; handle tz-naive vs tz-aware safely.
-    ts = pd.to_datetime(df["time"], errors="coerce")
+    ts = pd.Series(pd.to_datetime(ts_arr, errors="coerce"))
     try:
         # If tz attr is None → tz-naive → localize to IST
         if getattr(ts.dt, "tz", None) is None:
-            df["time"] = ts.dt.tz_localize(IST_TZSTR, nonexistent="shift_forward", ambiguous="NaT")
+            ts = ts.dt.tz_localize(IST_TZSTR, nonexistent="shift_forward", ambiguous="NaT")
         else:
             # Already tz-aware (likely UTC) → convert to IST
-            df["time"] = ts.dt.tz_convert(IST_TZSTR)
+            ts = ts.dt.tz_convert(IST_TZSTR)
     except Exception:
         # Defensive fallback: strip tz then localize to IST
-        ts_naive = pd.to_datetime(df["time"], errors="coerce").dt.tz_localize(None)
-        df["time"] = ts_naive.dt.tz_localize(IST_TZSTR, nonexistent="shift_forward", ambiguous="NaT")
-
-    # Ensure numeric types
-    for c in ["open", "high", "low", "close", "volume"]:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
+        ts_naive = pd.Series(pd.to_datetime(ts_arr, errors="coerce")).dt.tz_localize(None)
+        ts = ts_naive.dt.tz_localize(IST_TZSTR, nonexistent="shift_forward", ambiguous="NaT")
+
+    df = pd.DataFrame({
+        "time": ts,
+        "open": ohlcv[:, 0],
+        "high": ohlcv[:, 1],
+        "low": ohlcv[:, 2],
+        "close": ohlcv[:, 3],
+        "volume": ohlcv[:, 4],
+    })
 
     df = df.dropna(subset=["time"]).sort_values("time").reset_index(drop=True)
     return df
@@ -167,15 +193,11 @@ def get_recent_candles(
         _t.sleep(0.5 + random.random() * 0.8)
 
         # Slide window back a minute to avoid brushing the current/future minute
+        # (only the two timestamps change, so patch them into the same payload)
         to_dt = to_dt - timedelta(minutes=1)
         from_dt = from_dt - timedelta(minutes=1)
-        payload = CandleRequest(
-            exchange=exchange,
-            symboltoken=str(symboltoken),
-            interval=interval,
-            from_dt_ist=from_dt,
-            to_dt_ist=to_dt,
-        ).to_payload()
+        payload["fromdate"] = _fmt_ist(from_dt)
+        payload["todate"] = _fmt_ist(to_dt)
 
     # Exhausted retries: return empty frame with context in attrs (for logging upstream)
     df = pd.DataFrame(columns=["time", "open", "high", "low", "close", "volume"])
@@ -4,28 +4,94 @@ from typing import Tuple
 import numpy as np
 import pandas as pd
 
+from utils._indicator_kernels import HAVE_KERNELS, ewm_adjust_false, supertrend_loop
+
 # -------- helpers ------------------------------------------------------------
 
 def _as_series(x: pd.Series | pd.Array | np.ndarray, name: str = "") -> pd.Series:
+    if isinstance(x, pd.Series) and x.dtype.kind == "f":
+        # already numeric float: no to_numeric copy (shallow copy only to attach a name)
+        if name and not x.name:
+            x = x.copy(deep=False)
+            x.name = name
+        return x
     s = pd.Series(x, copy=False)
     if name and not s.name:
         s.name = name
     return pd.to_numeric(s, errors="coerce")
 
+def _window_sum(a: np.ndarray, n: int) -> np.ndarray:
+    """Trailing n-window sums via one cumsum: cs[i+1] - cs[max(0, i+1-n)]."""
+    cs = np.empty(a.shape[0] + 1)
+    cs[0] = 0.0
+    np.cumsum(a, out=cs[1:])
+    hi = np.arange(1, a.shape[0] + 1)
+    return cs[hi] - cs[np.maximum(hi - n, 0)]
+
+def _rolling_mean_std(s: pd.Series, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and population std (ddof=0) in one O(N) pass, matching
+    s.rolling(n, min_periods=max(1, n // 2)) including NaN skipping.
+    """
+    x = s.to_numpy(dtype="float64")
+    valid = ~np.isnan(x)
+    # shift by the first observation: variance is shift-invariant and this
+    # keeps the running sums small (less cancellation in E[x²] - E[x]²)
+    ref = x[valid.argmax()] if valid.any() else 0.0
+    xc = np.where(valid, x - ref, 0.0)
+    x2 = xc * xc
+
+    cnt = _window_sum(valid.astype("float64"), n)
+    s1 = _window_sum(xc, n)
+    s2 = _window_sum(x2, n)
+
+    ok = cnt >= max(1, n // 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_c = s1 / cnt
+        var = np.maximum(s2 / cnt - mean_c * mean_c, 0.0)
+
+    # exact zero for windows whose observations are all equal (pandas does the same);
+    # otherwise rounding in the running sums would leave a tiny non-zero std
+    idx = np.arange(x.shape[0])
+    ffilled = x[np.maximum.accumulate(np.where(valid, idx, 0))]
+    change = valid.copy()
+    change[1:] &= x[1:] != ffilled[:-1]
+    last_change = np.maximum.accumulate(np.where(change, idx, -1))
+    next_valid = np.minimum.accumulate(np.where(valid, idx, x.shape[0])[::-1])[::-1]
+    first_in_win = next_valid[np.maximum(idx - n + 1, 0)]
+    var[last_change <= first_in_win] = 0.0
+
+    mean = np.where(ok, mean_c + ref, np.nan)
+    sd = np.where(ok, np.sqrt(var), np.nan)
+    return mean, sd
+
 def _rolling_std(s: pd.Series, n: int) -> pd.Series:
-    return s.rolling(n, min_periods=max(1, n // 2)).std(ddof=0)
+    _, sd = _rolling_mean_std(s, n)
+    return pd.Series(sd, index=s.index, name=s.name)
+
+def _wilder(x: np.ndarray, n: int) -> np.ndarray:
+    """Wilder smoothing (alpha=1/n): compiled kernel if available, else pandas ewm."""
+    if HAVE_KERNELS:
+        return ewm_adjust_false(x, 1.0 / n)
+    return pd.Series(x).ewm(alpha=1.0 / n, adjust=False).mean().to_numpy()
 
 # -------- basics -------------------------------------------------------------
 
 def ema(s: pd.Series, span: int) -> pd.Series:
     """Exponential moving average (adjust=False)."""
     s = _as_series(s, "ema_src")
+    if HAVE_KERNELS:
+        # same alpha derivation as pandas (span -> com -> alpha)
+        alpha = 1.0 / (1.0 + (span - 1) / 2.0)
+        out = ewm_adjust_false(s.to_numpy(dtype="float64"), alpha)
+        return pd.Series(out, index=s.index, name=s.name)
     return s.ewm(span=span, adjust=False).mean()
 
 def sma(s: pd.Series, n: int) -> pd.Series:
     """Simple moving average."""
     s = _as_series(s, "sma_src")
-    return s.rolling(n, min_periods=max(1, n // 2)).mean()
+    m, _ = _rolling_mean_std(s, n)
+    return pd.Series(m, index=s.index, name=s.name)
 
 def std(s: pd.Series, n: int) -> pd.Series:
     """Rolling population std (ddof=0)."""
@@ -37,8 +103,9 @@ def bollinger(close: pd.Series, n: int = 20, k: float = 2.0) -> Tuple[pd.Series,
     Returns (middle, upper, lower) bands.
     """
     c = _as_series(close, "close")
-    m = sma(c, n)
-    sd = _rolling_std(c, n)
+    mv, sdv = _rolling_mean_std(c, n)
+    m = pd.Series(mv, index=c.index, name=c.name)
+    sd = pd.Series(sdv, index=c.index, name=c.name)
     upper = m + k * sd
     lower = m - k * sd
     return m, upper, lower
@@ -46,9 +113,9 @@ def bollinger(close: pd.Series, n: int = 20, k: float = 2.0) -> Tuple[pd.Series,
 def zscore(s: pd.Series, n: int = 20) -> pd.Series:
     """Rolling z-score with safe divide-by-zero handling."""
     x = _as_series(s, "z_src")
-    m = sma(x, n)
-    sd = _rolling_std(x, n)
-    z = np.divide((x - m), sd, out=np.full_like(x, np.nan, dtype="float64"), where=(sd != 0))
+    m, sd = _rolling_mean_std(x, n)
+    xv = x.to_numpy(dtype="float64")
+    z = np.divide((xv - m), sd, out=np.full_like(xv, np.nan), where=(sd != 0))
     return pd.Series(z, index=x.index, name="zscore")
 
 # -------- popular extras -----------------------------------------------------
@@ -56,13 +123,13 @@ def zscore(s: pd.Series, n: int = 20) -> pd.Series:
 def rsi(close: pd.Series, n: int = 14) -> pd.Series:
     """Wilder's RSI."""
     c = _as_series(close, "close")
-    delta = c.diff()
-    gain = delta.clip(lower=0.0)
-    loss = -delta.clip(upper=0.0)
+    delta = np.diff(c.to_numpy(dtype="float64"), prepend=np.nan)
+    gain = np.maximum(delta, 0.0)
+    loss = -np.minimum(delta, 0.0)
 
-    # Wilder’s smoothing via ewm(alpha=1/n, adjust=False)
-    avg_gain = gain.ewm(alpha=1.0 / n, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1.0 / n, adjust=False).mean()
+    # Wilder’s smoothing (== ewm(alpha=1/n, adjust=False))
+    avg_gain = _wilder(gain, n)
+    avg_loss = _wilder(loss, n)
 
     rs = np.divide(avg_gain, avg_loss, out=np.full_like(avg_gain, np.nan, dtype="float64"), where=(avg_loss != 0))
     rsi = 100.0 - (100.0 / (1.0 + rs))
@@ -70,33 +137,43 @@ def rsi(close: pd.Series, n: int = 14) -> pd.Series:
 
 def atr(high: pd.Series, low: pd.Series, close: pd.Series, n: int = 14) -> pd.Series:
     """Average True Range (Wilder)."""
-    h = _as_series(high, "high")
-    l = _as_series(low, "low")
+    h = _as_series(high, "high").to_numpy(dtype="float64")
+    l = _as_series(low, "low").to_numpy(dtype="float64")
     c = _as_series(close, "close")
-    prev_close = c.shift(1)
+    cv = c.to_numpy(dtype="float64")
+    pc = np.empty_like(cv)
+    if pc.size:
+        pc[0] = np.nan
+        pc[1:] = cv[:-1]
 
-    tr = pd.concat(
-        [(h - l).abs(),
-         (h - prev_close).abs(),
-         (l - prev_close).abs()],
-        axis=1
-    ).max(axis=1)
+    # fmax skips NaN like DataFrame.max(axis=1) (first bar has no prev close)
+    tr = np.fmax.reduce([np.abs(h - l), np.abs(h - pc), np.abs(l - pc)])
 
-    atr = tr.ewm(alpha=1.0 / n, adjust=False).mean()
-    return atr.rename("atr")
+    atr = _wilder(tr, n)
+    return pd.Series(atr, index=c.index, name="atr")
+
+_atr = atr  # supertrend's ``atr=`` keyword shadows the function name
 
 def vwap(high: pd.Series, low: pd.Series, close: pd.Series, volume: pd.Series) -> pd.Series:
     """Session VWAP from typical price."""
-    h = _as_series(high, "high")
-    l = _as_series(low, "low")
+    h = _as_series(high, "high").to_numpy(dtype="float64")
+    l = _as_series(low, "low").to_numpy(dtype="float64")
     c = _as_series(close, "close")
-    v = _as_series(volume, "volume").fillna(0)
+    v = np.nan_to_num(_as_series(volume, "volume").to_numpy(dtype="float64"), nan=0.0)
 
-    tp = (h + l + c) / 3.0
-    cum_pv = (tp * v).cumsum()
-    cum_v = v.cumsum().replace(0, np.nan)
-    out = cum_pv / cum_v
-    return out.rename("vwap")
+    pv = h + l
+    pv += c.to_numpy(dtype="float64")
+    pv *= v
+    pv /= 3.0
+    # Series.cumsum semantics: NaN bars stay NaN but don't poison later sums
+    gap = np.isnan(pv)
+    cum_pv = np.nancumsum(pv)
+    cum_pv[gap] = np.nan
+    cum_v = np.cumsum(v)
+
+    nz = cum_v != 0
+    out = np.divide(cum_pv, cum_v, out=np.full_like(cum_pv, np.nan), where=nz)
+    return pd.Series(out, index=c.index, name="vwap")
 
 def macd(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[pd.Series, pd.Series, pd.Series]:
     """MACD line, Signal line, Histogram."""
@@ -108,43 +185,74 @@ def macd(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> T
     hist = (line - sig).rename("hist")
     return line, sig, hist
 
-def supertrend(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 10, multiplier: float = 3.0) -> pd.Series:
+def _supertrend_vec(c: np.ndarray, ub: np.ndarray, lb: np.ndarray) -> np.ndarray:
+    """
+    Loop-free equivalent of the supertrend_loop kernel (used when numba is unavailable).
+
+    Direction is a hysteresis: up where close > upperband, down where close < lowerband,
+    otherwise carried forward. Off flip bars the line is simply the active band; a flip bar
+    takes min/max(band, previous line), resolved in a few passes for back-to-back flips.
+    """
+    n = c.shape[0]
+    if n == 0:
+        return np.empty(0)
+    idx = np.arange(n)
+    with np.errstate(invalid="ignore"):
+        up_sig = c > ub
+        dn_sig = c < lb
+    decided = up_sig | dn_sig
+    decided[0] = True
+    up_sig[0] = True
+    # forward-fill the last decided direction
+    last = np.maximum.accumulate(np.where(decided, idx, 0))
+    dir_up = up_sig[last]
+
+    st = np.where(dir_up, lb, ub)
+    st[0] = ub[0]
+
+    flips = np.flatnonzero(dir_up[1:] != dir_up[:-1]) + 1
+    if flips.size:
+        f_up = dir_up[flips]
+        f_lb = lb[flips]
+        f_ub = ub[flips]
+        for _ in range(flips.size + 1):
+            prev = st[flips - 1]
+            # Python min/max semantics (NaN in prev keeps the band)
+            with np.errstate(invalid="ignore"):
+                new = np.where(f_up, np.where(prev < f_lb, prev, f_lb), np.where(prev > f_ub, prev, f_ub))
+            cur = st[flips]
+            if np.array_equal(new, cur, equal_nan=True):
+                break
+            st[flips] = new
+    return st
+
+def supertrend(
+    high: pd.Series,
+    low: pd.Series,
+    close: pd.Series,
+    period: int = 10,
+    multiplier: float = 3.0,
+    *,
+    atr: pd.Series | None = None,
+) -> pd.Series:
     """
     Classic SuperTrend implementation (returns the SuperTrend line).
+    Pass `atr` (ATR over `period`, same index as the prices) to reuse one you already have.
     """
     h = _as_series(high, "high")
     l = _as_series(low, "low")
     c = _as_series(close, "close")
 
     # ATR-based bands
-    _atr = atr(h, l, c, n=period)
+    a = _atr(h, l, c, n=period) if atr is None else _as_series(atr, "atr")
     hl2 = (h + l) / 2.0
-    upperband = (hl2 + multiplier * _atr).rename("upperband")
-    lowerband = (hl2 - multiplier * _atr).rename("lowerband")
-
-    st = pd.Series(index=c.index, dtype="float64", name="supertrend")
-    dir_up = pd.Series(index=c.index, dtype="bool")
-
-    # initialize
-    st.iloc[0] = upperband.iloc[0]
-    dir_up.iloc[0] = True
-
-    # iterate (vectorized ST needs careful state; loop is clearer and fast enough)
-    for i in range(1, len(c)):
-        prev_st = st.iloc[i - 1]
-        prev_dir_up = dir_up.iloc[i - 1]
-
-        cur_upper = max(upperband.iloc[i], prev_st) if prev_dir_up else upperband.iloc[i]
-        cur_lower = min(lowerband.iloc[i], prev_st) if not prev_dir_up else lowerband.iloc[i]
-
-        if c.iloc[i] > cur_upper:
-            st.iloc[i] = cur_lower
-            dir_up.iloc[i] = True
-        elif c.iloc[i] < cur_lower:
-            st.iloc[i] = cur_upper
-            dir_up.iloc[i] = False
-        else:
-            st.iloc[i] = cur_lower if prev_dir_up else cur_upper
-            dir_up.iloc[i] = prev_dir_up
+    upperband = (hl2 + multiplier * a).rename("upperband")
+    lowerband = (hl2 - multiplier * a).rename("lowerband")
 
-    return st
+    kernel = supertrend_loop if HAVE_KERNELS else _supertrend_vec
+    st = kernel(
+        c.to_numpy(dtype="float64"),
+        upperband.to_numpy(dtype="float64"),
+        lowerband.to_numpy(dtype="float64"),
+    )
+    return pd.Series(st, index=c.index, name="supertrend")
@@ -5,49 +5,117 @@ from pathlib import Path
 from datetime import date
 from functools import lru_cache
 from typing import Iterable, Dict, Optional, Tuple
+import csv
+import hashlib
+import json
 import os
 import re
 import warnings
 
+import numpy as np
 import pandas as pd
 from loguru import logger
 
+from utils._njit import njit
+
+# Optional: pyarrow enables the multi-threaded typed CSV reader and the on-disk frame cache
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.csv as pa_csv  # type: ignore
+    HAVE_PYARROW = True
+except Exception:
+    pa = pa_csv = None  # type: ignore
+    HAVE_PYARROW = False
+
 # ---------- Paths / config ----------
 ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = ROOT / "data"
 CSV_DEFAULT = DATA_DIR / "OpenAPIScripMaster.csv"
 JSON_FALLBACK = DATA_DIR / "OpenAPIScripMaster.json"
+CACHE_DIR = DATA_DIR / ".inst_cache"
+# bump whenever _normalize_instruments changes its output, to invalidate old caches
+CACHE_SCHEMA = 3
 
 CEPE_RE = re.compile(r"(CE|PE)\b", re.IGNORECASE)
 
+# Scrip-master columns the app reads (matched case/space-insensitively); others are dropped at load
+_REQUIRED_COLS = frozenset({
+    "name", "symbol", "tradingsymbol", "exchange", "exch_seg", "symboltoken", "token",
+    "optiontype", "instrumenttype", "expiry", "strike", "lotsize",
+    "symbolname", "symbol_token",  # extract_symbol_fields fallbacks
+})
+
+# text columns kept upper-cased once per process (see _upper_columns)
+_UPPER_COLS = ("name", "symbol", "tradingsymbol", "exchange", "exch_seg", "instrumenttype")
+
+# rows per pandas read_csv chunk (pyarrow-less path)
+_CSV_CHUNK_ROWS = 50_000
+
+# Known scrip-master columns -> arrow type (unlisted columns are inferred)
+_CSV_STRING_COLS = (
+    "token", "symboltoken", "symbol", "name", "tradingsymbol", "expiry",
+    "exch_seg", "exchange", "instrumenttype", "optiontype",
+)
+# same null markers as pandas.read_csv, so blanks come through as NaN either way
+_CSV_NULL_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+    "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
 
 # ---------- Core loader (cached) ----------
-@lru_cache(maxsize=1)
-def _read_instruments_df() -> pd.DataFrame:
+def _none_to_nan(df: pd.DataFrame) -> pd.DataFrame:
+    """Arrow hands back None for missing strings; the pandas readers give NaN."""
+    for col in df.columns[df.dtypes == object]:
+        arr = df[col].to_numpy(dtype=object, copy=True)
+        # the shared np.nan object (not fresh floats), as pandas' readers produce; to_datetime's
+        # uniqueness check for its parse cache depends on that
+        arr[pd.isna(arr)] = np.nan
+        df[col] = arr
+    return df
+
+
+def _wanted_col(col) -> bool:
+    return str(col).strip().lower() in _REQUIRED_COLS
+
+
+def _read_csv(csv_path: Path) -> pd.DataFrame:
+    """Raw scrip-master CSV (required columns only) via pyarrow's threaded parser with a fixed schema."""
+    with open(csv_path, newline="", encoding="utf-8-sig") as fh:
+        header = next(csv.reader(fh), [])
+    table = pa_csv.read_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(use_threads=True, block_size=16 << 20),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={c: pa.string() for c in _CSV_STRING_COLS} | {"strike": pa.float64(), "lotsize": pa.int32()},
+            include_columns=[c for c in header if _wanted_col(c)],
+            null_values=_CSV_NULL_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
+    return _none_to_nan(table.to_pandas())
+
+
+def _load_csv(csv_path: Path) -> pd.DataFrame:
     """
-    Load Angel instruments from CSV (preferred) or JSON fallback.
-    Honors INSTRUMENTS_CSV env var if present.
-    Normalizes common columns and adds:
-      - expiry_dt (parsed)
-      - strike_rupees (normalized)
-      - lotsize (int)
+    Normalized scrip master from CSV. Without pyarrow, pandas reads it in chunks of
+    _CSV_CHUNK_ROWS and each chunk is row-normalized as it arrives, so the raw text frame
+    never sits at full size next to its normalized copy.
     """
-    csv_path = Path(os.getenv("INSTRUMENTS_CSV") or CSV_DEFAULT)
+    if HAVE_PYARROW:
+        return _normalize_instruments(_read_csv(csv_path))
+    chunks = pd.read_csv(csv_path, low_memory=False, usecols=_wanted_col, chunksize=_CSV_CHUNK_ROWS)
+    parts = [_normalize_rows(c) for c in chunks]
+    if not parts:  # header-only file
+        return _normalize_instruments(pd.read_csv(csv_path, usecols=_wanted_col))
+    return _normalize_frame(pd.concat(parts, ignore_index=True, copy=False))
 
-    if csv_path.exists():
-        df = pd.read_csv(csv_path, low_memory=False)
-        src = f"CSV:{csv_path}"
-    elif JSON_FALLBACK.exists():
-        df = pd.read_json(JSON_FALLBACK)
-        src = f"JSON:{JSON_FALLBACK}"
-    else:
-        raise FileNotFoundError(
-            "No instruments file found.\n"
-            f"- Tried CSV:  {csv_path}\n"
-            f"- Tried JSON: {JSON_FALLBACK}\n"
-            "Run: python refresh_instruments.py"
-        )
 
+def _normalize_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The row-local part of _normalize_instruments (safe to run per chunk):
+    column names, stripped strings, expiry_dt, lotsize (int), CE/PE optiontype.
+    """
     # normalize columns/strings
     df.columns = [c.strip().lower() for c in df.columns]
     for col in (
@@ -65,14 +133,6 @@ def _read_instruments_df() -> pd.DataFrame:
         else:
             df["expiry_dt"] = pd.NaT
 
-    # strike normalization to rupees (Angel often stores *100)
-    if "strike" in df.columns:
-        s = pd.to_numeric(df["strike"], errors="coerce")
-        med = s.dropna().median()
-        df["strike_rupees"] = (s / 100.0).round(2) if pd.notna(med) and med > 100000 else s
-    else:
-        df["strike_rupees"] = pd.NA
-
     # lot size
     if "lotsize" in df.columns:
         df["lotsize"] = pd.to_numeric(df["lotsize"], errors="coerce").fillna(0).astype(int)
@@ -85,31 +145,169 @@ def _read_instruments_df() -> pd.DataFrame:
             "CALL": "CE",
             "PUT": "PE",
         })
+    return df
+
+
+def _normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The whole-frame part of _normalize_instruments (after any chunks are joined):
+    strike_rupees, which depends on the file-wide strike median, and categoricals.
+    """
+    # strike normalization to rupees (Angel often stores *100)
+    if "strike" in df.columns:
+        s = pd.to_numeric(df["strike"], errors="coerce")
+        med = s.dropna().median()
+        df["strike_rupees"] = (s / 100.0).round(2) if pd.notna(med) and med > 100000 else s
+    else:
+        df["strike_rupees"] = pd.NA
+
+    # few distinct values per column: categorical keeps codes + one copy of each string,
+    # and .str / == work on the categories. (optiontype stays object: _ensure_optiontype
+    # writes inferred values into it.)
+    for col in ("name", "exchange", "exch_seg", "instrumenttype"):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _normalize_instruments(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize raw scrip-master columns and add:
+      - expiry_dt (parsed)
+      - strike_rupees (normalized)
+      - lotsize (int)
+    """
+    return _normalize_frame(_normalize_rows(df))
+
+
+def _cache_paths(csv_path: Path) -> Tuple[Path, Path]:
+    """(feather, sidecar json) for this CSV at its current mtime."""
+    st = csv_path.stat()
+    tag = hashlib.blake2b(str(csv_path.resolve()).encode(), digest_size=4).hexdigest()
+    base = CACHE_DIR / f"{csv_path.stem}-{tag}-{st.st_mtime_ns:x}"
+    return base.with_suffix(".feather"), base.with_suffix(".json")
+
+
+def _read_cached(csv_path: Path) -> Optional[pd.DataFrame]:
+    """Normalized frame from the on-disk cache, if pyarrow is available and the entry matches."""
+    if not HAVE_PYARROW:
+        return None
+    fpath, meta_path = _cache_paths(csv_path)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("schema") != CACHE_SCHEMA:
+            return None
+        df = pd.read_feather(fpath)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable instruments cache {fpath}: {e}")
+        return None
+    return _none_to_nan(df)
+
+
+def _write_cached(df: pd.DataFrame, csv_path: Path) -> None:
+    """Store the normalized frame and drop older entries for the same CSV."""
+    if not HAVE_PYARROW:
+        return
+    try:
+        fpath, meta_path = _cache_paths(csv_path)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        df.reset_index(drop=True).to_feather(fpath)
+        # sidecar last: an entry only counts once its schema tag is on disk
+        meta_path.write_text(json.dumps({"schema": CACHE_SCHEMA, "csv": str(csv_path), "rows": len(df)}), encoding="utf-8")
+        prefix = fpath.stem.rsplit("-", 1)[0] + "-"
+        for old in CACHE_DIR.glob(f"{prefix}*"):
+            if old.stem != fpath.stem:
+                old.unlink(missing_ok=True)
+    except Exception as e:
+        logger.warning(f"Could not write instruments cache for {csv_path}: {e}")
+
+
+@lru_cache(maxsize=1)
+def _read_instruments_df() -> pd.DataFrame:
+    """
+    Load Angel instruments from CSV (preferred) or JSON fallback.
+    Honors INSTRUMENTS_CSV env var if present.
+    With pyarrow installed, the normalized CSV is cached under data/.inst_cache
+    (keyed by CSV path + mtime, tagged with CACHE_SCHEMA) and reused across processes.
+    Normalizes common columns (see _normalize_instruments).
+    """
+    csv_path = Path(os.getenv("INSTRUMENTS_CSV") or CSV_DEFAULT)
+
+    if csv_path.exists():
+        df = _read_cached(csv_path)
+        if df is not None:
+            logger.info(f"Loaded instruments from cache:{csv_path}: rows={len(df)}")
+            return df
+        df = _load_csv(csv_path)
+        _write_cached(df, csv_path)
+        src = f"CSV:{csv_path}"
+    elif JSON_FALLBACK.exists():
+        df = pd.read_json(JSON_FALLBACK)
+        df = _normalize_instruments(df[[c for c in df.columns if _wanted_col(c)]])
+        src = f"JSON:{JSON_FALLBACK}"
+    else:
+        raise FileNotFoundError(
+            "No instruments file found.\n"
+            f"- Tried CSV:  {csv_path}\n"
+            f"- Tried JSON: {JSON_FALLBACK}\n"
+            "Run: python refresh_instruments.py"
+        )
 
     logger.info(f"Loaded instruments from {src}: rows={len(df)}")
     return df
 
 
-def load_instruments() -> pd.DataFrame:
-    """Public loader (returns a copy)."""
-    return _read_instruments_df().copy()
+def load_instruments(copy: bool = False) -> pd.DataFrame:
+    """
+    Public loader. Returns the process-wide cached table itself: treat it as read-only
+    (filtering/slicing is fine). Pass copy=True to get a private frame you can modify.
+    """
+    df = _read_instruments_df()
+    return df.copy() if copy else df
 
 
 # ---------- helpers ----------
 def _series_upper(df: pd.DataFrame, col: str) -> pd.Series:
-    if col in df.columns:
-        return df[col].astype(str).str.strip().str.upper()
-    return pd.Series([""] * len(df), index=df.index, dtype="object")
+    if col not in df.columns:
+        return pd.Series([""] * len(df), index=df.index, dtype="object")
+    s = df[col]
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # once per category instead of once per row
+        cats = np.append(s.cat.categories.astype(str).str.strip().str.upper().to_numpy(dtype=object), "NAN")
+        return pd.Series(cats[s.cat.codes.to_numpy()], index=s.index, name=s.name, dtype="object")
+    return s.astype(str).str.strip().str.upper()
+
+
+def _upper(df: pd.DataFrame, col: str) -> pd.Series:
+    """_series_upper, served from _upper_columns when `df` is the cached instruments table."""
+    if df is _read_instruments_df() and col in _UPPER_COLS:
+        return _upper_columns()[col]
+    return _series_upper(df, col)
+
 
+@lru_cache(maxsize=1)
+def _upper_columns() -> Dict[str, pd.Series]:
+    """
+    Stripped, upper-cased text columns of the cached instruments table, computed once
+    (aligned with its index; kept off the frame so callers never see helper columns).
+    """
+    df = _read_instruments_df()
+    return {c: _series_upper(df, c) for c in _UPPER_COLS}
 
-def _infer_optiontype_from_symbol(row: pd.Series) -> str:
-    """Infer CE/PE from tradingsymbol or symbol text."""
-    for col in ("tradingsymbol", "symbol"):
-        if col in row and pd.notna(row[col]):
-            m = CEPE_RE.search(str(row[col]))
-            if m:
-                return m.group(1).upper()
-    return ""
+
+def _infer_optiontype(df: pd.DataFrame) -> pd.Series:
+    """CE/PE inferred from tradingsymbol, else symbol text ("" when neither says)."""
+    out = np.full(len(df), "", dtype=object)
+    # lowest priority first, so a tradingsymbol hit overrides a symbol hit
+    for col in ("symbol", "tradingsymbol"):
+        if col in df.columns:
+            src = df[col]
+            hit = src.astype(str).str.extract(CEPE_RE, expand=False).where(src.notna()).to_numpy(dtype=object)
+            ok = pd.notna(hit)
+            out[ok] = hit[ok]
+    return pd.Series(out, index=df.index, dtype=object).str.upper()
 
 
 def _ensure_optiontype(df: pd.DataFrame) -> pd.DataFrame:
@@ -119,82 +317,142 @@ def _ensure_optiontype(df: pd.DataFrame) -> pd.DataFrame:
         df["optiontype"] = ""
     mask_missing = df["optiontype"].isna() | (df["optiontype"].astype(str).str.strip() == "")
     if mask_missing.any():
-        inferred = df.loc[mask_missing].apply(_infer_optiontype_from_symbol, axis=1)
-        df.loc[mask_missing, "optiontype"] = inferred
+        df.loc[mask_missing, "optiontype"] = _infer_optiontype(df.loc[mask_missing])
     df["optiontype"] = df["optiontype"].astype(str).str.upper()
     return df
 
 
 # ---------- equities ----------
-def _score_equity_row(row: pd.Series, sym: str) -> int:
-    score = 0
-    name = str(row.get("name", "")).upper()
-    symbol = str(row.get("symbol", "")).upper()
-    ts = str(row.get("tradingsymbol", "")).upper()
-    it = str(row.get("instrumenttype", "")).upper()
-
-    if name == sym:
-        score += 100
-    if symbol == f"{sym}-EQ":
-        score += 95
-    if ts == f"{sym}-EQ":
-        score += 95
-    if symbol.endswith("-EQ") and sym in symbol:
-        score += 80
-    if ts.endswith("-EQ") and sym in ts:
-        score += 80
-    if it in ("", "EQ", "EQUITY"):
-        score += 10
-    score += max(0, 10 - abs(len(symbol) - (len(sym) + 3)))  # prefer tight match
+def _score_equity_rows(cands: pd.DataFrame, sym: str) -> np.ndarray:
+    """Match score per candidate row (higher is better), computed column-wise."""
+    sym_eq = f"{sym}-EQ"
+    name = _series_upper(cands, "name")
+    symbol = _series_upper(cands, "symbol")
+    ts = _series_upper(cands, "tradingsymbol")
+    it = _series_upper(cands, "instrumenttype")
+
+    score = (
+        name.eq(sym).to_numpy(dtype="int64") * 100
+        + symbol.eq(sym_eq).to_numpy(dtype="int64") * 95
+        + ts.eq(sym_eq).to_numpy(dtype="int64") * 95
+        + (symbol.str.endswith("-EQ") & symbol.str.contains(sym, regex=False)).to_numpy(dtype="int64") * 80
+        + (ts.str.endswith("-EQ") & ts.str.contains(sym, regex=False)).to_numpy(dtype="int64") * 80
+        + it.isin(["", "EQ", "EQUITY"]).to_numpy(dtype="int64") * 10
+    )
+    # prefer tight match
+    score += np.maximum(0, 10 - np.abs(symbol.str.len().to_numpy(dtype="int64") - (len(sym) + 3)))
     return score
 
 
-def pick_nse_equity_tokens(symbols: Iterable[str]) -> Dict[str, str]:
+def _exact_equity_hits(frame: pd.DataFrame) -> Dict[str, int]:
     """
-    Resolve Angel 'token' for NSE cash equities, given human symbols like
-    'RELIANCE', 'TCS', 'INFY'.
+    NAME -> position of the first row with name == NAME and symbol (and tradingsymbol,
+    when present) == NAME-EQ. Such a row outscores every row lacking the exact
+    symbol under _score_equity_rows, so it is the pick without any regex/scoring.
+    """
+    name = _series_upper(frame, "name")
+    ok = name.ne("") & _series_upper(frame, "symbol").eq(name + "-EQ")
+    if "tradingsymbol" in frame.columns:
+        ok &= _series_upper(frame, "tradingsymbol").eq(name + "-EQ")
+    hits: Dict[str, int] = {}
+    for nm, pos in zip(name[ok].tolist(), np.flatnonzero(ok.to_numpy()).tolist()):
+        hits.setdefault(nm, pos)
+    return hits
+
+
+@lru_cache(maxsize=1)
+def _nse_equity_index() -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, int], Dict[str, int]]:
+    """
+    One-time NSE slices + exact-match indexes over the cached instruments table:
+      (nse, nse_eq_pref, exact hits in nse_eq_pref, exact hits in nse)
     """
     df = _read_instruments_df()
     if "exch_seg" not in df.columns or not {"token", "symboltoken"} & set(df.columns):
         raise RuntimeError("Instrument file missing required columns (exch_seg, token/symboltoken).")
 
-    nse = df[df["exch_seg"].astype(str).str.upper().eq("NSE")].copy()
+    up = _upper_columns()
+    nse = df[up["exch_seg"].eq("NSE")].copy()
 
     # prefer equity-like rows (but don't require)
     if "instrumenttype" in nse.columns:
-        it = nse["instrumenttype"].astype(str).str.upper()
+        it = up["instrumenttype"].loc[nse.index]
         eq_like = (nse["instrumenttype"].isna()) | (it.eq("")) | (it.isin(["EQ", "EQUITY"]))
         nse_eq_pref = nse[eq_like].copy()
     else:
         nse_eq_pref = nse
 
-    out: Dict[str, str] = {}
+    return nse, nse_eq_pref, _exact_equity_hits(nse_eq_pref), _exact_equity_hits(nse)
+
+
+def _equity_token(row: pd.Series) -> str:
+    return str(row.get("token") or row.get("symboltoken") or "").strip()
+
+
+@lru_cache(maxsize=1024)
+def _word_re(sym: str) -> re.Pattern:
+    return re.compile(rf"\b{re.escape(sym)}\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=64)
+def _any_word_re(syms: Tuple[str, ...]) -> re.Pattern:
+    return re.compile(r"\b(?:" + "|".join(re.escape(s) for s in syms) + r")\b", re.IGNORECASE)
+
+
+def _word_mask(frame: pd.DataFrame, pat: re.Pattern) -> pd.Series:
+    """Rows where name/symbol/tradingsymbol matches the compiled (case-insensitive) `pat`."""
+    mask_any = pd.Series(False, index=frame.index)
+    for c in ("name", "symbol", "tradingsymbol"):
+        if c in frame.columns:
+            mask_any = mask_any | frame[c].astype(str).str.contains(pat, na=False)
+    return mask_any
 
-    for raw in symbols:
-        sym = raw.strip().upper()
-        if not sym:
-            continue
 
-        # vectorized OR over name/symbol/tradingsymbol
-        mask_any = pd.Series(False, index=nse_eq_pref.index)
-        for c in ("name", "symbol", "tradingsymbol"):
-            if c in nse_eq_pref.columns:
-                mask_any = mask_any | nse_eq_pref[c].astype(str).str.contains(rf"\b{re.escape(sym)}\b", case=False, na=False)
-
-        cands = nse_eq_pref.loc[mask_any].copy()
-        if cands.empty:
-            mask_any = pd.Series(False, index=nse.index)
-            for c in ("name", "symbol", "tradingsymbol"):
-                if c in nse.columns:
-                    mask_any = mask_any | nse[c].astype(str).str.contains(rf"\b{re.escape(sym)}\b", case=False, na=False)
-            cands = nse.loc[mask_any].copy()
-
-        if cands.empty:
+def pick_nse_equity_tokens(symbols: Iterable[str]) -> Dict[str, str]:
+    """
+    Resolve Angel 'token' for NSE cash equities, given human symbols like
+    'RELIANCE', 'TCS', 'INFY'.
+    """
+    nse, nse_eq_pref, exact_pref, exact_all = _nse_equity_index()
+
+    syms = [s for s in (raw.strip().upper() for raw in symbols) if s]
+    picked: Dict[str, Optional[pd.Series]] = {}
+    pending = []
+
+    for sym in syms:
+        if sym in picked or sym in pending:
             continue
+        # exact NAME / NAME-EQ row: O(1) and the same pick the scoring below would make
+        # (preferred rows first; the full NSE slice only when no row is preferred at all)
+        pos = exact_pref.get(sym)
+        if pos is not None:
+            picked[sym] = nse_eq_pref.iloc[pos]
+        elif nse_eq_pref.empty and sym in exact_all:
+            picked[sym] = nse.iloc[exact_all[sym]]
+        else:
+            pending.append(sym)
+
+    if pending:
+        # one alternation pass over each slice keeps only rows matching *some* symbol;
+        # the per-symbol word match then runs on that small subset
+        any_pat = _any_word_re(tuple(pending))
+        pref_hits = nse_eq_pref.loc[_word_mask(nse_eq_pref, any_pat)]
+        nse_hits: Optional[pd.DataFrame] = None
+
+        for sym in pending:
+            pat = _word_re(sym)
+            cands = pref_hits.loc[_word_mask(pref_hits, pat)]
+            if cands.empty:
+                if nse_hits is None:
+                    nse_hits = nse.loc[_word_mask(nse, any_pat)]
+                cands = nse_hits.loc[_word_mask(nse_hits, pat)]
+            picked[sym] = None if cands.empty else cands.iloc[int(_score_equity_rows(cands, sym).argmax())]
 
-        cands["_score"] = cands.apply(lambda r: _score_equity_row(r, sym), axis=1)
-        best = cands.sort_values("_score", ascending=False).head(1)
-        tok = str(best.iloc[0].get("token") or best.iloc[0].get("symboltoken") or "").strip()
+    out: Dict[str, str] = {}
+    for sym in syms:
+        best = picked[sym]
+        if best is None:
+            continue
+        tok = _equity_token(best)
         if tok:
             out[sym] = tok
 
@@ -206,23 +464,21 @@ def get_equity_token(symbol: str) -> Optional[str]:
 
 
 # ---------- option universe ----------
-def load_options(underlying: str) -> pd.DataFrame:
-    """
-    Slice NFO options for the given underlying (e.g., 'BANKNIFTY', 'NIFTY', 'FINNIFTY').
-    Strict rules to avoid cross-family mixups.
-    """
+@lru_cache(maxsize=8)
+def _load_options_cached(und: str) -> pd.DataFrame:
+    """Strict NFO option slice for an upper-cased underlying (shared; never mutate)."""
     df = _read_instruments_df()
+    up = _upper_columns()
 
-    ex = _series_upper(df, "exchange") if "exchange" in df.columns else _series_upper(df, "exch_seg")
+    ex = up["exchange"] if "exchange" in df.columns else up["exch_seg"]
     ex_ok = ex.str.contains("NFO", na=False)
 
-    it = _series_upper(df, "instrumenttype")
+    it = up["instrumenttype"]
     it_ok = (it == "") | it.str.contains("OPT", na=False)
 
-    nm = _series_upper(df, "name")
-    sy = _series_upper(df, "symbol")
-    ts = _series_upper(df, "tradingsymbol")
-    und = underlying.strip().upper()
+    nm = up["name"]
+    sy = up["symbol"]
+    ts = up["tradingsymbol"]
 
     u_ok = (nm == und) | sy.str.startswith(und, na=False) | ts.str.startswith(und, na=False)
 
@@ -253,7 +509,16 @@ def load_options(underlying: str) -> pd.DataFrame:
     opt["lotsize"] = pd.to_numeric(opt["lotsize"], errors="coerce").fillna(0).astype(int)
     opt["strike_int"] = pd.to_numeric(opt["strike_rupees"], errors="coerce").round().astype("Int64")
 
-    opt = _ensure_optiontype(opt)
+    return _ensure_optiontype(opt)
+
+
+def load_options(underlying: str) -> pd.DataFrame:
+    """
+    Slice NFO options for the given underlying (e.g., 'BANKNIFTY', 'NIFTY', 'FINNIFTY').
+    Strict rules to avoid cross-family mixups.
+    The slice is computed once per underlying per process; callers get their own copy.
+    """
+    opt = _load_options_cached(underlying.strip().upper()).copy()
 
     if opt.empty:
         logger.error(
@@ -303,6 +568,39 @@ def nearest_expiry(opts: pd.DataFrame, target: date, window_days: int = 10) -> d
     return best
 
 
+@njit(cache=True)
+def _nearest_paired_strike(target, step, max_off, strikes):
+    """
+    Index into ascending `strikes` of the value on the step grid around `target`
+    (|strike - target| a multiple of step, at most max_off) closest to it; on a tie the
+    lower strike. -1 if none. Binary search, then walks outwards only until it can't improve.
+    """
+    n = strikes.shape[0]
+    hi = np.searchsorted(strikes, target)  # first strike >= target
+    best = -1
+    best_d = max_off + 1
+    i = hi
+    while i < n:
+        d = strikes[i] - target
+        if d > max_off:
+            break
+        if d % step == 0:
+            best = i
+            best_d = d
+            break
+        i += 1
+    j = hi - 1
+    while j >= 0:
+        d = target - strikes[j]
+        if d > max_off or d > best_d:
+            break
+        if d % step == 0:
+            best = j  # equal distance: the lower strike wins
+            break
+        j -= 1
+    return best
+
+
 def get_option_rows(
     opts: pd.DataFrame,
     expiry_d: date,
@@ -330,27 +628,32 @@ def get_option_rows(
 
     same_expiry = _ensure_optiontype(same_expiry)
 
-    avail_strikes = same_expiry["strike_int"].dropna().astype(int).unique()
-    if len(avail_strikes) == 0:
+    avail_strikes = set(same_expiry["strike_int"].dropna().astype(int).tolist())
+    if not avail_strikes:
         raise RuntimeError(f"No strikes for expiry={expiry_d}.")
 
+    # strikes with both legs, on the step grid around target within max_hops
     max_hops = 400
-    for hops in range(0, max_hops + 1):
-        dirs = [0] if hops == 0 else [-1, 1]
-        for d in dirs:
-            cand = target + d * hops * step
-            if cand not in avail_strikes:
-                continue
-            slate = same_expiry.loc[same_expiry["strike_int"] == cand]
-            ot_local = slate["optiontype"].astype(str).str.upper()
-            ce = slate.loc[ot_local == "CE"]
-            pe = slate.loc[ot_local == "PE"]
-            if not ce.empty and not pe.empty:
-                if cand != target:
-                    logger.warning(f"Adjusted strike from {target} to nearest available {cand} for expiry {expiry_d}.")
-                return ce.iloc[0], pe.iloc[0]
-
-    sample = sorted(int(x) for x in avail_strikes)[:40]
+    si = same_expiry["strike_int"]
+    ot = same_expiry["optiontype"].astype(str).str.upper()
+    # CE/PE indicator masks, shared by the pairing and the final leg split
+    is_ce = (ot == "CE").to_numpy()
+    is_pe = (ot == "PE").to_numpy()
+    paired = np.intersect1d(
+        si[is_ce].dropna().astype(int).unique(),
+        si[is_pe].dropna().astype(int).unique(),
+    )
+    i = _nearest_paired_strike(np.int64(target), np.int64(step), np.int64(max_hops * step), paired.astype(np.int64))
+    if i >= 0:
+        cand = int(paired[i])
+        at = (si == cand).fillna(False).to_numpy(dtype=bool)
+        ce = same_expiry.loc[at & is_ce]
+        pe = same_expiry.loc[at & is_pe]
+        if cand != target:
+            logger.warning(f"Adjusted strike from {target} to nearest available {cand} for expiry {expiry_d}.")
+        return ce.iloc[0], pe.iloc[0]
+
+    sample = sorted(avail_strikes)[:40]
     logger.error(f"No CE/PE pair for expiry={expiry_d} strike≈{target}. Available strikes (sample): {sample}")
     raise RuntimeError(f"Missing CE/PE leg for expiry={expiry_d} strike≈{target}.")
 
@@ -423,9 +726,10 @@ def get_lotsize(opts_or_df: pd.DataFrame, underlying: str) -> int:
     df = opts_or_df
     if "name" not in df.columns:
         df = _read_instruments_df()
-    sub = df[df["name"].astype(str).str.upper().eq(underlying.strip().upper())]
+    und = underlying.strip().upper()
+    sub = df[_upper(df, "name").eq(und)]
     if sub.empty and "symbol" in df.columns:
-        sub = df[df["symbol"].astype(str).str.upper().str.startswith(underlying.strip().upper(), na=False)]
+        sub = df[_upper(df, "symbol").str.startswith(und, na=False)]
     if sub.empty:
         return 0
     ls = sub["lotsize"]
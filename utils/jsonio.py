@@ -0,0 +1,28 @@
+# utils/jsonio.py
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Union
+
+# Optional orjson: faster encode/decode. Output is the same compact UTF-8 JSON either
+# way, so files written with one are read back by the other.
+try:
+    import orjson  # type: ignore
+    HAVE_ORJSON = True
+except Exception:  # optional: stdlib json is the fallback
+    orjson = None  # type: ignore
+    HAVE_ORJSON = False
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON bytes (orjson when installed)."""
+    if HAVE_ORJSON:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. non-str keys or ints past 64 bits: let the stdlib have a go
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+# str or bytes in; bound once so hot paths (per-tick parsing) pay no dispatch
+loads: Callable[[Union[str, bytes, bytearray]], Any] = orjson.loads if HAVE_ORJSON else json.loads
@@ -0,0 +1,79 @@
+# utils/ltp_cache.py
+from __future__ import annotations
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# ------------------------------------------------------------------
+# Short-TTL LTP cache shared by every caller in the process.
+# Key: (exchange, token) -> (ts, price)
+# Concurrent misses on the same key are coalesced into one broker call.
+# ------------------------------------------------------------------
+DEFAULT_TTL_S = 0.25
+
+Fetcher = Callable[[Any, str, Optional[str], str], float]
+
+_cache: Dict[Tuple[str, str], Tuple[float, float]] = {}
+_lock = threading.Lock()
+_inflight: Dict[Tuple[str, str], threading.Lock] = {}
+
+
+def _evict_stale(now: float, ttl: float) -> None:
+    # caller holds _lock
+    horizon = 2.0 * ttl
+    for k in [k for k, (ts_, _) in _cache.items() if (now - ts_) > horizon]:
+        _cache.pop(k, None)
+
+
+def _fresh(key: Tuple[str, str], ttl: float) -> Optional[float]:
+    ent = _cache.get(key)
+    if ent is not None and (time.monotonic() - ent[0]) <= ttl:
+        return ent[1]
+    return None
+
+
+def get_cached_ltp(
+    smart,
+    exchange: str,
+    symbol: Optional[str],
+    token: str,
+    *,
+    fetch: Fetcher,
+    ttl: float = DEFAULT_TTL_S,
+) -> float:
+    """
+    Return LTP for (exchange, token), calling `fetch(smart, exchange, symbol, token)`
+    only when the cached value is older than `ttl` seconds.
+    Errors from `fetch` propagate and are not cached.
+    """
+    key = (str(exchange).upper(), str(token))
+    with _lock:
+        hit = _fresh(key, ttl)
+        if hit is not None:
+            return hit
+        gate = _inflight.setdefault(key, threading.Lock())
+
+    with gate:
+        # another thread may have filled it while we waited
+        with _lock:
+            hit = _fresh(key, ttl)
+            if hit is not None:
+                return hit
+        try:
+            px = float(fetch(smart, exchange, symbol, token))
+            now = time.monotonic()
+            with _lock:
+                _cache[key] = (now, px)
+                _evict_stale(now, ttl)
+            return px
+        finally:
+            # threads already queued on this gate still see the fresh entry; later
+            # misses make a new one, so _inflight only holds keys being fetched
+            with _lock:
+                if _inflight.get(key) is gate:
+                    del _inflight[key]
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
@@ -1,9 +1,12 @@
 # utils/ltp_fetcher.py
 from __future__ import annotations
+from collections import OrderedDict
 from typing import Any, Dict, Optional, Tuple
 from loguru import logger
 import random
+import threading
 import time
+import weakref
 
 # ------------------------------------------------------------------
 # Config-driven knobs
@@ -27,36 +30,69 @@ ANGEL_INDEX_TOKENS = {
 }
 
 # ------------------------------------------------------------------
-# Tiny in-proc cache: key -> (price, ts)
+# Tiny in-proc LRU cache: key -> (price, monotonic deadline in ns)
 # ------------------------------------------------------------------
-_cache: dict[Tuple[str, str, str], Tuple[float, float]] = {}
+_TTL_NS = int(float(LTP_CACHE_TTL_S) * 1e9)
+_CACHE_MAX = 4096  # legs tracked at once; least-recently-used entries beyond this are dropped
+_cache: OrderedDict[Tuple[str, str, str], Tuple[float, int]] = OrderedDict()
+_cache_lock = threading.Lock()
 
 def _cache_get(exchange: str, tradingsymbol: str, symboltoken: str) -> Optional[float]:
     key = (exchange, tradingsymbol, symboltoken)
-    ent = _cache.get(key)
-    if not ent:
-        return None
-    px, ts_ = ent
-    if (time.time() - ts_) <= float(LTP_CACHE_TTL_S):
-        return float(px)
-    # stale -> drop
-    _cache.pop(key, None)
-    return None
+    with _cache_lock:
+        ent = _cache.get(key)
+        # stale entries are simply overwritten by the next put (or aged out by the LRU bound)
+        if ent is None or ent[1] < time.monotonic_ns():
+            return None
+        _cache.move_to_end(key)
+    return ent[0]
 
 def _cache_put(exchange: str, tradingsymbol: str, symboltoken: str, px: float) -> None:
-    _cache[(exchange, tradingsymbol, symboltoken)] = (float(px), time.time())
+    key = (exchange, tradingsymbol, symboltoken)
+    ent = (float(px), time.monotonic_ns() + _TTL_NS)
+    with _cache_lock:
+        _cache[key] = ent
+        _cache.move_to_end(key)
+        if len(_cache) > _CACHE_MAX:
+            _cache.popitem(last=False)
 
 # ------------------------------------------------------------------
 # Raw SmartAPI calls (handle SDK variations)
 # ------------------------------------------------------------------
+# smart -> (method name, "kwargs" | "positional") that last returned a dict.
+# The name (not the bound method) is stored so the entry never keeps `smart` alive.
+_CALL_STYLE: weakref.WeakKeyDictionary[Any, Tuple[str, str]] = weakref.WeakKeyDictionary()
+
+def _learn_style(smart, fn_name: str, style: str) -> None:
+    try:
+        _CALL_STYLE[smart] = (fn_name, style)
+    except TypeError:
+        pass  # not weak-referenceable: just keep probing
+
 def _call_ltp(smart, payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Try multiple SmartAPI variants:
       - ltpData(**payload) / ltpData(payload)
       - getLtpData(**payload) / getLtpData(payload)
       - ltpDataV2(**payload) / ltpDataV2(payload)
+    The first variant that works is remembered per `smart` and tried directly
+    next time (falling back to the full probe if it stops working).
     Always returns a dict (may be empty on failure).
     """
+    try:
+        learned = _CALL_STYLE.get(smart)
+    except TypeError:
+        learned = None
+    if learned is not None:
+        fn_name, style = learned
+        try:
+            fn = getattr(smart, fn_name)
+            r = fn(**payload) if style == "kwargs" else fn(payload)
+            if isinstance(r, dict):
+                return r
+        except Exception:
+            pass
+
     for fn_name in ("ltpData", "getLtpData", "ltpDataV2"):
         fn = getattr(smart, fn_name, None)
         if not callable(fn):
@@ -65,6 +101,7 @@ def _call_ltp(smart, payload: Dict[str, Any]) -> Dict[str, Any]:
         try:
             r = fn(**payload)
             if isinstance(r, dict):
+                _learn_style(smart, fn_name, "kwargs")
                 return r
         except TypeError:
             pass
@@ -75,6 +112,7 @@ def _call_ltp(smart, payload: Dict[str, Any]) -> Dict[str, Any]:
         try:
             r = fn(payload)
             if isinstance(r, dict):
+                _learn_style(smart, fn_name, "positional")
                 return r
         except TypeError:
             pass
@@ -181,6 +219,10 @@ def get_ltp(
     )
     raise RuntimeError(last_err)
 
+def peek_ltp(exchange: str, tradingsymbol: str, symboltoken: str | int | None) -> Optional[float]:
+    """Cached LTP (as get_ltp would return it) or None; never calls the broker."""
+    return _cache_get(str(exchange).upper(), str(tradingsymbol).upper(), str(symboltoken or "").strip())
+
 def get_index_ltp(smart, index: str = "BANKNIFTY", **kwargs) -> Optional[float]:
     """
     Convenience for index LTP via Angel tokens. Returns None on failure.
@@ -22,22 +22,24 @@ def ltp_from_order(exe, od: Dict[str, Any]) -> Dict[str, Any]:
 def index_ltp_from_csv(exe, exch: str, symbol: str, csv_path: str = r"data\OpenAPIScripMaster.csv") -> Dict[str, Any]:
     """
     Optional helper for index LTP. Your CSV may not include NSE index rows.
+    Uses the process-wide cached scrip master (utils.instruments, honours INSTRUMENTS_CSV);
+    csv_path is kept for compatibility and error messages.
     Returns {ok,data,error}.
     """
     try:
-        import pandas as pd
-        df = pd.read_csv(csv_path, low_memory=False)
+        from utils.instruments import _read_instruments_df, _upper_columns
+        df = _read_instruments_df()
+        up = _upper_columns()  # upper-cased text columns, computed once per process
     except Exception as e:
         return {"ok": False, "data": None, "error": f"read csv failed: {e}"}
 
     alias = {"BANKNIFTY": "NIFTY BANK", "NIFTY": "NIFTY 50"}
     sym = alias.get(symbol.upper(), symbol)
 
-    sel = df[
-        (df["exch_seg"].astype(str).str.upper() == exch.upper())
-        & (df["instrumenttype"].astype(str).str.upper() == "INDEX")
-        & (df["symbol"].astype(str).str.upper() == sym.upper())
-    ].head(1)
+    # most selective column first; each later mask only sees the (few dozen) INDEX rows
+    sel = df[up["instrumenttype"].eq("INDEX")]
+    sel = sel[up["exch_seg"].loc[sel.index].eq(exch.upper())]
+    sel = sel[up["symbol"].loc[sel.index].eq(sym.upper())].head(1)
 
     if sel.empty:
         return {"ok": False, "data": None, "error": f"index '{sym}' not found in {csv_path}"}
@@ -57,19 +59,19 @@ def ltp_from_order(exe, od):
         symboltoken=str(od["symboltoken"]),
     )
 def index_ltp_from_csv(exe, exch, sym, csv_path=r"data\OpenAPIScripMaster.csv"):
-    """ Helper for index LTP via Angel tokens. Returns {ok,data,error}."""
+    """ Helper for index LTP via Angel tokens (cached scrip master). Returns {ok,data,error}."""
     try:
-        import pandas as pd
-        df = pd.read_csv(csv_path, low_memory=False)            
+        from utils.instruments import _read_instruments_df, _upper_columns
+        df = _read_instruments_df()
+        up = _upper_columns()  # upper-cased text columns, computed once per process
     except Exception as e:
         return {"ok": False, "data": None, "error": f"read csv failed: {e}"}
     alias = {"BANKNIFTY": "NIFTY BANK", "NIFTY": "NIFTY 50"}
     sym = alias.get(sym.upper(), sym)
-    sel = df[
-        (df["exch_seg"].astype(str).str.upper() == exch.upper())
-        & (df["instrumenttype"].astype(str).str.upper() == "INDEX")
-        & (df["symbol"].astype(str).str.upper() == sym.upper())
-    ].head(1)
+    # most selective column first; each later mask only sees the (few dozen) INDEX rows
+    sel = df[up["instrumenttype"].eq("INDEX")]
+    sel = sel[up["exch_seg"].loc[sel.index].eq(exch.upper())]
+    sel = sel[up["symbol"].loc[sel.index].eq(sym.upper())].head(1)
     if sel.empty:
         return {"ok": False, "data": None, "error": f"index '{sym}' not found in {csv_path}"}
     token = str(sel.iloc[0]["token"])
@@ -1,20 +1,65 @@
 # utils/market_health.py
 from __future__ import annotations
-from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from loguru import logger
+import threading
+import time
+import weakref
 
-from config import VOL_MAX_SPREAD_PCT
+from config import QUOTE_CACHE_TTL_S, VOL_MAX_SPREAD_PCT
 from utils.ltp_fetcher import get_ltp
 
 # Normalized quote dict keys we care about
 # We expect to extract: best_bid, best_ask, ltp, vol, oi (where available)
 
+# ------------------------------------------------------------------
+# Tiny in-proc LRU cache: key -> (normalized quote, monotonic deadline in ns)
+# (same shape as utils.ltp_fetcher's LTP cache)
+# ------------------------------------------------------------------
+_QUOTE_TTL_NS = int(float(QUOTE_CACHE_TTL_S) * 1e9)
+_QUOTE_CACHE_MAX = 1024
+_quote_cache: OrderedDict[Tuple[str, str, str], Tuple[Dict[str, Any], int]] = OrderedDict()
+_quote_cache_lock = threading.Lock()
+
+def _quote_cache_get(key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+    with _quote_cache_lock:
+        ent = _quote_cache.get(key)
+        if ent is None or ent[1] < time.monotonic_ns():
+            return None
+        _quote_cache.move_to_end(key)
+    return dict(ent[0])  # callers get their own top-level dict
+
+def _quote_cache_put(key: Tuple[str, str, str], q: Dict[str, Any]) -> None:
+    ent = (dict(q), time.monotonic_ns() + _QUOTE_TTL_NS)
+    with _quote_cache_lock:
+        _quote_cache[key] = ent
+        _quote_cache.move_to_end(key)
+        if len(_quote_cache) > _QUOTE_CACHE_MAX:
+            _quote_cache.popitem(last=False)
+
+def _quote_cache_clear() -> None:
+    with _quote_cache_lock:
+        _quote_cache.clear()
+
+# smart -> (method name, "kwargs" | "positional") that last returned a dict
+# (same scheme as utils.ltp_fetcher._CALL_STYLE)
+_QUOTE_STYLE: weakref.WeakKeyDictionary[Any, Tuple[str, str]] = weakref.WeakKeyDictionary()
+
+def _learn_quote_style(smart, name: str, style: str) -> None:
+    try:
+        _QUOTE_STYLE[smart] = (name, style)
+    except TypeError:
+        pass  # not weak-referenceable: just keep probing
+
 def _call_quote(smart, exchange: str, tradingsymbol: str, symboltoken: str) -> Dict[str, Any]:
     """
     Try SmartAPI quote variants:
       - smart.quoteData(exchange, tradingsymbol, symboltoken)
       - smart.quoteDataV2(...)
       - smart.getQuoteData(...)
+    The first variant that works is remembered per `smart` and tried directly
+    next time (falling back to the full probe if it stops working).
     Returns dict (may be empty).
     """
     payload = {
@@ -22,6 +67,20 @@ def _call_quote(smart, exchange: str, tradingsymbol: str, symboltoken: str) -> D
         "tradingsymbol": str(tradingsymbol),
         "symboltoken": str(symboltoken),
     }
+    try:
+        learned = _QUOTE_STYLE.get(smart)
+    except TypeError:
+        learned = None
+    if learned is not None:
+        name, style = learned
+        try:
+            fn = getattr(smart, name)
+            res = fn(**payload) if style == "kwargs" else fn(payload)  # type: ignore[misc]
+            if isinstance(res, dict):
+                return res
+        except Exception:
+            pass
+
     for name in ("quoteData", "quoteDataV2", "getQuoteData"):
         fn = getattr(smart, name, None)
         if not callable(fn):
@@ -30,6 +89,7 @@ def _call_quote(smart, exchange: str, tradingsymbol: str, symboltoken: str) -> D
         try:
             res = fn(**payload)  # type: ignore[misc]
             if isinstance(res, dict):
+                _learn_quote_style(smart, name, "kwargs")
                 return res
         except TypeError:
             pass
@@ -39,6 +99,7 @@ def _call_quote(smart, exchange: str, tradingsymbol: str, symboltoken: str) -> D
         try:
             res = fn(payload)  # type: ignore[misc]
             if isinstance(res, dict):
+                _learn_quote_style(smart, name, "positional")
                 return res
         except TypeError:
             pass
@@ -46,15 +107,57 @@ def _call_quote(smart, exchange: str, tradingsymbol: str, symboltoken: str) -> D
             continue
     return {}
 
-def _first_num(d: Dict[str, Any], *keys: str) -> Optional[float]:
+def _call_market_data(smart, exchange: str, tokens: List[str]) -> Dict[str, Any]:
+    """
+    One multi-token quote: smart.getMarketData("FULL", {EXCH: [tokens]}) (positional,
+    then keyword form). Returns dict (may be empty).
+    """
+    fn = getattr(smart, "getMarketData", None)
+    if not callable(fn):
+        return {}
+    exchange_tokens = {str(exchange).upper(): list(tokens)}
+    try:
+        res = fn("FULL", exchange_tokens)  # type: ignore[misc]
+        if isinstance(res, dict):
+            return res
+    except TypeError:
+        pass
+    except Exception:
+        return {}
+    try:
+        res = fn(mode="FULL", exchangeTokens=exchange_tokens)  # type: ignore[misc]
+        if isinstance(res, dict):
+            return res
+    except Exception:
+        pass
+    return {}
+
+# Candidate payload keys per field, in priority order
+_BID_KEYS = ("best_bid_price", "bestBid", "best_bid", "bidPrice", "bidprice", "bp")
+_ASK_KEYS = ("best_ask_price", "bestAsk", "best_ask", "askPrice", "askprice", "ap")
+_BOOK_BID_KEYS = ("bp", "bestBid", "best_bid_price")
+_BOOK_ASK_KEYS = ("ap", "bestAsk", "best_ask_price")
+_LTP_KEYS = ("ltp", "last_price", "lastPrice", "Ltp", "lp")
+_VOL_KEYS = ("volume", "volume_traded", "VolumeTradedToday", "tradeVolume")
+_OI_KEYS = ("oi", "open_interest", "OpenInterest", "opnInterest")
+
+def _first_num(d: Dict[str, Any], keys: Tuple[str, ...]) -> Optional[float]:
+    """First value under `keys` that converts to a non-NaN float."""
+    get = d.get
     for k in keys:
-        if k in d:
-            try:
-                v = float(d[k])
-                if v == v:  # not NaN
-                    return v
-            except Exception:
-                continue
+        v = get(k)
+        if v is None:
+            continue
+        if type(v) is float:
+            if v == v:  # not NaN
+                return v
+            continue
+        try:
+            v = float(v)
+        except Exception:
+            continue
+        if v == v:
+            return v
     return None
 
 def _extract_primary(resp: Dict[str, Any]) -> Dict[str, Any]:
@@ -79,8 +182,8 @@ def _extract_primary(resp: Dict[str, Any]) -> Dict[str, Any]:
     ask = None
 
     # flat keys
-    bid = bid or _first_num(data, "best_bid_price", "bestBid", "best_bid", "bidPrice", "bidprice", "bp")
-    ask = ask or _first_num(data, "best_ask_price", "bestAsk", "best_ask", "askPrice", "askprice", "ap")
+    bid = bid or _first_num(data, _BID_KEYS)
+    ask = ask or _first_num(data, _ASK_KEYS)
 
     # nested common structures
     if bid is None or ask is None:
@@ -97,12 +200,12 @@ def _extract_primary(resp: Dict[str, Any]) -> Dict[str, Any]:
                 except Exception:
                     pass
         # single nested keys
-        bid = bid or _first_num(book, "bp", "bestBid", "best_bid_price")
-        ask = ask or _first_num(book, "ap", "bestAsk", "best_ask_price")
+        bid = bid or _first_num(book, _BOOK_BID_KEYS)
+        ask = ask or _first_num(book, _BOOK_ASK_KEYS)
 
-    ltp = _first_num(data, "ltp", "last_price", "lastPrice", "Ltp", "lp")
-    vol = _first_num(data, "volume", "volume_traded", "VolumeTradedToday")
-    oi  = _first_num(data, "oi", "open_interest", "OpenInterest")
+    ltp = _first_num(data, _LTP_KEYS)
+    vol = _first_num(data, _VOL_KEYS)
+    oi  = _first_num(data, _OI_KEYS)
 
     return {
         "best_bid": bid,
@@ -113,14 +216,32 @@ def _extract_primary(resp: Dict[str, Any]) -> Dict[str, Any]:
         "raw": data,
     }
 
-def fetch_quote(smart, exchange: str, tradingsymbol: str, symboltoken: str) -> Dict[str, Any]:
+def fetch_quote(
+    smart,
+    exchange: str,
+    tradingsymbol: str,
+    symboltoken: str,
+    *,
+    use_cache: bool = True,
+    need_book: bool = True,
+) -> Dict[str, Any]:
     """
     Return a normalized quote dict with keys: best_bid, best_ask, ltp, volume, oi.
     Falls back to fetching LTP if quote lacks it.
+    Successful quotes are reused for QUOTE_CACHE_TTL_S (fetch_quote.cache_clear() drops them).
+    need_book=False is for callers that only read `ltp`: unless a full quote is already
+    cached, it skips the quote call and returns an LTP-only dict (via get_ltp's cache).
     """
-    resp = _call_quote(smart, exchange, tradingsymbol, symboltoken)
+    key = (str(exchange).upper(), str(tradingsymbol), str(symboltoken))
+    if use_cache and _QUOTE_TTL_NS > 0:
+        hit = _quote_cache_get(key)
+        if hit is not None:
+            return hit
+
+    resp = _call_quote(smart, exchange, tradingsymbol, symboltoken) if need_book else {}
     if not resp:
-        logger.debug("quote: empty response; attempting LTP fallback")
+        if need_book:
+            logger.debug("quote: empty response; attempting LTP fallback")
         ltp = None
         try:
             ltp = get_ltp(smart, exchange, tradingsymbol, symboltoken, use_cache=True)
@@ -134,18 +255,62 @@ def fetch_quote(smart, exchange: str, tradingsymbol: str, symboltoken: str) -> D
             out["ltp"] = get_ltp(smart, exchange, tradingsymbol, symboltoken, use_cache=True)
         except Exception:
             pass
+    if use_cache and _QUOTE_TTL_NS > 0:
+        _quote_cache_put(key, out)
     return out
 
-def _spread_pct(bid: Optional[float], ask: Optional[float]) -> Optional[float]:
-    try:
-        if bid is None or ask is None or bid <= 0 or ask <= 0 or ask < bid:
-            return None
-        mid = 0.5 * (bid + ask)
-        if mid <= 0:
-            return None
-        return (ask - bid) / mid
-    except Exception:
-        return None
+fetch_quote.cache_clear = _quote_cache_clear  # type: ignore[attr-defined]
+
+def fetch_quotes_batch(
+    smart,
+    items: Iterable[Tuple[str, str, str]],
+    *,
+    use_cache: bool = True,
+    fallback: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Normalized quotes for many (exchange, tradingsymbol, symboltoken) legs at once:
+    one getMarketData call per exchange instead of one quote call per leg.
+    Returns {symboltoken: quote} (same dicts as fetch_quote, and they land in its cache,
+    so a fetch_quote for the same leg right after is free). Legs missing from the batch
+    reply fall back to fetch_quote, or are left out with fallback=False.
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    groups: Dict[str, Dict[str, Tuple[str, str, str]]] = {}
+    for exchange, tradingsymbol, symboltoken in items:
+        key = (str(exchange).upper(), str(tradingsymbol), str(symboltoken))
+        if key[2] in out:
+            continue
+        if use_cache and _QUOTE_TTL_NS > 0:
+            hit = _quote_cache_get(key)
+            if hit is not None:
+                out[key[2]] = hit
+                continue
+        groups.setdefault(key[0], {})[key[2]] = key
+
+    for exchange, legs in groups.items():
+        resp = _call_market_data(smart, exchange, list(legs))
+        data = resp.get("data") if resp.get("status") else None
+        fetched = data.get("fetched") if isinstance(data, dict) else None
+        by_token: Dict[str, Dict[str, Any]] = {}
+        for rec in fetched or ():
+            if isinstance(rec, dict):
+                tok = rec.get("symbolToken") or rec.get("symboltoken") or rec.get("token")
+                by_token[str(tok)] = rec
+
+        for tok, key in legs.items():
+            rec = by_token.get(tok)
+            q = _extract_primary({"data": rec}) if rec is not None else None
+            if q is None or q.get("ltp") is None:
+                if not fallback:
+                    continue
+                logger.debug(f"quote batch: {exchange}:{key[1]} not in reply; fetching singly")
+                out[tok] = fetch_quote(smart, *key, use_cache=use_cache)
+                continue
+            if use_cache and _QUOTE_TTL_NS > 0:
+                _quote_cache_put(key, q)
+            out[tok] = q
+    return out
 
 def illiquid_or_wide(q: Dict[str, Any], max_spread_pct: float = float(VOL_MAX_SPREAD_PCT)) -> bool:
     """
@@ -157,11 +322,14 @@ def illiquid_or_wide(q: Dict[str, Any], max_spread_pct: float = float(VOL_MAX_SP
     """
     bid = q.get("best_bid")
     ask = q.get("best_ask")
-    sp  = _spread_pct(bid, ask)
     if bid is None or ask is None:
         # If we at least have a sane LTP, we can be generous; otherwise block
         ltp = q.get("ltp")
         return not (isinstance(ltp, (int, float)) and ltp > 0)
-    if sp is None:
+    try:
+        if bid <= 0 or ask <= 0 or ask < bid:
+            return True  # no usable two-sided book
+        # (ask - bid) / mid > max  <=>  ask - bid > max/2 * (ask + bid): no divide
+        return (ask - bid) > 0.5 * float(max_spread_pct or 0.08) * (ask + bid)
+    except Exception:
         return True
-    return sp > float(max_spread_pct or 0.08)
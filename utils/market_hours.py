@@ -1,8 +1,10 @@
 # utils/market_hours.py
 from __future__ import annotations
 from dataclasses import dataclass
-from datetime import datetime, time, timedelta
+from functools import lru_cache
+from datetime import date, datetime, time, timedelta
 from typing import Iterable, Tuple, Optional
+from time import monotonic_ns
 import os
 
 try:
@@ -15,16 +17,26 @@ from config import (
     TIMEZONE_IST as _TZ_NAME,
     MARKET_OPEN_HH, MARKET_OPEN_MM,
     MARKET_CLOSE_HH, MARKET_CLOSE_MM,
+    MARKET_OPEN_CACHE_TTL_S,
 )
 
 IST = ZoneInfo(_TZ_NAME) if ZoneInfo else None  # exported for others
 
 # Simple holiday hook (extend/replace from a file if you like)
 # Format: "YYYY-MM-DD"
-_HOLIDAYS: set[str] = set(map(str, [
+_HOLIDAYS: frozenset[date] = frozenset(date.fromisoformat(s) for s in (
     # add official NSE holidays here, e.g.
     # "2025-01-26", "2025-03-14", ...
-]))
+))
+
+# BYPASS_MARKET_HOURS is resolved once (config has loaded .env by now);
+# call reload_market_hours_env() after changing it at runtime
+_TRUTHY = frozenset({"1", "true", "yes", "on"})
+
+def _env_bypass() -> bool:
+    return str(os.getenv("BYPASS_MARKET_HOURS", "")).strip().lower() in _TRUTHY
+
+_BYPASS = _env_bypass()
 
 @dataclass(frozen=True)
 class MarketWindow:
@@ -43,39 +55,87 @@ def _is_weekday(dt: datetime) -> bool:
     return dt.weekday() <= 4
 
 def _is_holiday(dt: datetime) -> bool:
-    return dt.strftime("%Y-%m-%d") in _HOLIDAYS
+    return dt.date() in _HOLIDAYS
+
+# is_market_open() for "now": (answer, monotonic deadline in ns)
+_OPEN_CACHE_TTL_NS = int(float(MARKET_OPEN_CACHE_TTL_S) * 1e9)
+_open_cache: Optional[Tuple[bool, int]] = None
+
+# session window as microseconds since midnight (plain int compares, no time objects)
+_OPEN_US = (WINDOW.open.hour * 3600 + WINDOW.open.minute * 60 + WINDOW.open.second) * 1_000_000
+_CLOSE_US = (WINDOW.close.hour * 3600 + WINDOW.close.minute * 60 + WINDOW.close.second) * 1_000_000
+
+def _is_open_at(now: datetime) -> bool:
+    if not _is_weekday(now) or _is_holiday(now):
+        return False
+    t = (now.hour * 3600 + now.minute * 60 + now.second) * 1_000_000 + now.microsecond
+    return _OPEN_US <= t <= _CLOSE_US
+
+def _ns_to_next_edge(now: datetime) -> Optional[int]:
+    """Nanoseconds from `now` to today's next open/close instant (None if both are past)."""
+    d = now.date()
+    for edge_t in (WINDOW.open, WINDOW.close):
+        edge = datetime.combine(d, edge_t, tzinfo=now.tzinfo)
+        if edge >= now:
+            return int((edge - now).total_seconds() * 1e9)
+    return None
 
 def is_market_open(now: Optional[datetime] = None) -> bool:
     """
     NSE cash/options regular hours (Mon–Fri 09:15–15:30 IST by default).
     Honors env BYPASS_MARKET_HOURS=true for testing.
+    Without `now`, the answer is reused for up to MARKET_OPEN_CACHE_TTL_S, never past
+    the next open/close.
     """
-    if str(os.getenv("BYPASS_MARKET_HOURS","")).strip().lower() in {"1","true","yes","on"}:
+    global _open_cache
+    if _BYPASS:
         return True
-    now = now or _now_ist()
-    if not _is_weekday(now) or _is_holiday(now):
-        return False
-    t = now.timetz() if hasattr(now, "timetz") else now.time()
-    return (t >= WINDOW.open) and (t <= WINDOW.close)
+    if now is not None:
+        return _is_open_at(now)
+
+    mono = monotonic_ns()
+    ent = _open_cache
+    if ent is not None and mono < ent[1]:
+        return ent[0]
+    now = _now_ist()
+    res = _is_open_at(now)
+    ttl = _OPEN_CACHE_TTL_NS
+    edge = _ns_to_next_edge(now)
+    if edge is not None:
+        ttl = min(ttl, edge)
+    _open_cache = (res, mono + ttl)
+    return res
+
+def reload_market_hours_env() -> None:
+    """Re-read BYPASS_MARKET_HOURS and forget the cached is_market_open() answer."""
+    global _BYPASS, _open_cache
+    _BYPASS = _env_bypass()
+    _open_cache = None
+
+@lru_cache(maxsize=8)
+def _session_bounds_on(d: date) -> Tuple[datetime, datetime]:
+    """(open_dt, close_dt) in IST on calendar day `d`."""
+    return (
+        datetime.combine(d, WINDOW.open, tzinfo=IST),
+        datetime.combine(d, WINDOW.close, tzinfo=IST),
+    )
 
 def next_session_bounds(now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
     """Return (next_open_dt, next_close_dt) in IST."""
     now = now or _now_ist()
-    cur = now
-    for _ in range(10):  # search up to next two weeks
-        d = cur.date()
-        open_dt = datetime(d.year, d.month, d.day, WINDOW.open.hour, WINDOW.open.minute, tzinfo=IST)
-        close_dt = datetime(d.year, d.month, d.day, WINDOW.close.hour, WINDOW.close.minute, tzinfo=IST)
-        if _is_weekday(open_dt) and not _is_holiday(open_dt):
-            if now <= close_dt:
-                if now <= open_dt:
-                    return open_dt, close_dt
-                # already inside session; return today’s bounds
-                return open_dt, close_dt
-        cur += timedelta(days=1)
-    # fallback
     d = now.date()
-    return (
-        datetime(d.year, d.month, d.day, WINDOW.open.hour, WINDOW.open.minute, tzinfo=IST),
-        datetime(d.year, d.month, d.day, WINDOW.close.hour, WINDOW.close.minute, tzinfo=IST),
-    )
+    if now > _session_bounds_on(d)[1]:
+        d += timedelta(days=1)  # today's session (if any) is over
+    # each pass skips a weekend or a holiday (and every weekend after the first needs a
+    # holiday Friday to reach it), so 2H + 2 passes always find the session
+    for _ in range(2 * len(_HOLIDAYS) + 2):
+        wd = d.weekday()
+        if wd > 4:
+            d += timedelta(days=7 - wd)  # jump the weekend
+        elif d in _HOLIDAYS:
+            d += timedelta(days=1)
+        else:
+            # today before/inside the session, or a later session day
+            return _session_bounds_on(d)
+    # fallback
+    return _session_bounds_on(now.date())
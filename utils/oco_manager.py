@@ -1,16 +1,13 @@
 # utils/oco_manager.py
 from __future__ import annotations
-import json, time
-from pathlib import Path
+import time
 from typing import Dict, Any
 from loguru import logger
 
 from config import STOP_LOSS_PCT, TARGET_PCT
-from utils.oco_registry import new_group_id, record_primary, record_stop, record_target
+from utils.oco_registry import all_groups, new_group_id, record_primary, record_stop, record_target
 from utils.order_exec import place_or_preview, cancel_order
 
-REG = Path("data/oco_registry.json")
-
 def _pct(x: float, pct: float) -> float:
     return round(x * (1 + pct), 2)
 
@@ -28,8 +25,10 @@ def build_exits(entry: Dict[str, Any], ltp: float) -> tuple[Dict[str, Any], Dict
 
 def run_watcher(smart, poll_secs: int = 3):
     logger.info("OCO watcher started")
+    next_tick = time.monotonic()
     while True:
-        reg = json.loads(REG.read_text()) if REG.exists() else {}
+        # snapshot + WAL; after the first pass only the lines appended since are read
+        reg = all_groups()
         for tag, rec in reg.items():
             if rec.get("state") == "closed": continue
             prim = rec.get("primary") or {}
@@ -37,4 +36,10 @@ def run_watcher(smart, poll_secs: int = 3):
 
             # TODO: call broker API for order status and place exits if filled
             # When either SL or Target fills, cancel the sibling and mark closed
-        time.sleep(poll_secs)
+
+        # fixed cadence: the pass's own run time doesn't push later ticks back
+        next_tick += poll_secs
+        now = time.monotonic()
+        if next_tick < now:
+            next_tick = now  # overran a whole period: don't try to catch up
+        time.sleep(next_tick - now)
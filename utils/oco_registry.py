@@ -1,25 +1,38 @@
 # utils/oco_registry.py
 from __future__ import annotations
 
-import json
-import uuid
+import atexit
+import copy
+import os
+import random
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 from loguru import logger
 
 from config import OCO_REGISTRY_JSON
+from utils.filelock import file_lock
+from utils.jsonio import dumps, loads
 
 _REG_PATH = Path(OCO_REGISTRY_JSON)
+# Mutations are appended here as JSON lines and folded into the snapshot
+# (_REG_PATH) every _COMPACT_EVERY events and at exit.
+_WAL_PATH = _REG_PATH.with_suffix(".wal")
+# appenders hold it shared while writing a line, compaction exclusively while it moves the
+# WAL aside, folds it and publishes the snapshot; the OS drops it if a holder crashes
+_WAL_LOCK_PATH = _REG_PATH.with_suffix(".wal.lock")
+_COMPACT_EVERY = 200
 
 
 # -------------------- storage --------------------
 
 def _load() -> Dict[str, Any]:
+    """Read the snapshot file."""
     if _REG_PATH.exists():
         try:
-            text = _REG_PATH.read_text(encoding="utf-8") or "{}"
-            data = json.loads(text)
+            data = loads(_REG_PATH.read_bytes().strip() or b"{}")
             if isinstance(data, dict):
                 return data
             logger.warning("OCO registry: root is not a dict; recreating.")
@@ -29,27 +42,28 @@ def _load() -> Dict[str, Any]:
 
 
 def _save(data: Dict[str, Any]) -> None:
+    """Write the snapshot file atomically."""
     _REG_PATH.parent.mkdir(parents=True, exist_ok=True)
     tmp = _REG_PATH.with_suffix(".json.tmp")
-    tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+    tmp.write_bytes(dumps(data))
     tmp.replace(_REG_PATH)
 
 
-def _now() -> str:
-    return datetime.now().isoformat(timespec="seconds")
-
+_NOW_MEMO: Tuple[int, str] = (-1, "")
 
-# -------------------- core API --------------------
-
-def new_group_id(tradingsymbol: str) -> str:
-    """
-    Create a new OCO group bucket and return its id.
-    """
-    gid = f"OCO-{tradingsymbol}-{uuid.uuid4().hex[:8]}"
-    reg = _load()
-    reg[gid] = {
-        "tradingsymbol": str(tradingsymbol or "").upper(),
-        "created_at": _now(),
+def _now() -> str:
+    """Local time, ISO to the second; the string is built once per wall-clock second."""
+    global _NOW_MEMO
+    sec = int(time.time())
+    if sec != _NOW_MEMO[0]:
+        _NOW_MEMO = (sec, datetime.fromtimestamp(sec).isoformat(timespec="seconds"))
+    return _NOW_MEMO[1]
+
+
+def _empty_group(tradingsymbol: str, created_at: str) -> Dict[str, Any]:
+    return {
+        "tradingsymbol": tradingsymbol,
+        "created_at": created_at,
         "closed": False,
         "closed_reason": None,
         "closed_at": None,
@@ -58,62 +72,215 @@ def new_group_id(tradingsymbol: str) -> str:
         "target": None,    # {"order_id": "...", "order": {...}}
         "notes": [],
     }
+
+
+def _apply(reg: Dict[str, Any], ev: Dict[str, Any]) -> None:
+    """Fold one WAL event into the registry dict."""
+    op, gid, t = ev.get("op"), ev.get("gid"), ev.get("t")
+    if op == "new":
+        reg[gid] = ev["rec"]
+    elif op == "primary":
+        rec = reg.setdefault(gid, _empty_group("", t))
+        rec["primary"] = ev["order"]
+        rec["updated_at"] = t
+    elif op in ("stop", "target"):
+        rec = reg.setdefault(gid, {})
+        rec[op] = {"order_id": ev["order_id"], "order": ev["order"]}
+        rec["updated_at"] = t
+    elif op == "closed":
+        rec = reg.get(gid)
+        if rec:
+            rec["closed"] = True
+            rec["closed_reason"] = ev.get("reason") or rec.get("closed_reason") or "closed"
+            rec["closed_at"] = t
+            rec["updated_at"] = t
+    elif op == "note":
+        rec = reg.get(gid)
+        if rec:
+            rec.setdefault("notes", [])
+            rec["notes"].append({"t": t, "text": ev["text"]})
+            rec["updated_at"] = t
+    elif op == "remove":
+        reg.pop(gid, None)
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+# In-process view: snapshot + replayed WAL. Other processes (e.g. scripts/oco_watcher.py)
+# write the same files, so every access first folds in whatever they appended.
+_LOCK = threading.RLock()
+_STATE: Dict[str, Any] = {}
+# ids of groups not marked closed, in registry order (dict as an ordered set)
+_OPEN: Dict[str, None] = {}
+_SNAP_KEY: Optional[Tuple[int, int, int]] = None
+_WAL_ID: Optional[Tuple[int, bytes]] = None  # (inode, first line): inode numbers get reused
+_WAL_POS = 0
+_LOADED = False
+_PENDING = 0  # events appended by this process since its last compaction
+
+
+def _replay(reg: Dict[str, Any], chunk: bytes) -> int:
+    """Apply the complete lines in `chunk`; returns the bytes consumed."""
+    end = chunk.rfind(b"\n") + 1  # a half-written last line waits for the next read
+    for line in chunk[:end].splitlines():
+        if not line.strip():
+            continue
+        try:
+            ev = loads(line)
+            _apply(reg, ev)
+            gid = ev.get("gid")
+            rec = reg.get(gid)
+            if rec is not None and not rec.get("closed"):
+                _OPEN.setdefault(gid)
+            else:
+                _OPEN.pop(gid, None)
+        except Exception as e:
+            logger.warning(f"OCO registry: skipping bad WAL line: {e}")
+    return end
+
+
+def _sync() -> Dict[str, Any]:
+    """Bring _STATE up to date with the files on disk (caller holds _LOCK)."""
+    global _STATE, _OPEN, _SNAP_KEY, _WAL_ID, _WAL_POS, _LOADED
+    snap_key = _stat_key(_REG_PATH)
+    if not _LOADED or snap_key != _SNAP_KEY:
+        # first use, or someone compacted: start over from the new snapshot
+        _STATE = _load()
+        _OPEN = {gid: None for gid, rec in _STATE.items() if not rec.get("closed")}
+        _SNAP_KEY = snap_key
+        _WAL_ID, _WAL_POS = None, 0
+        _LOADED = True
+
+    try:
+        with open(_WAL_PATH, "rb") as fh:
+            head = fh.readline()
+            if not head.endswith(b"\n"):
+                return _STATE
+            wal_id = (os.fstat(fh.fileno()).st_ino, head)
+            if wal_id != _WAL_ID:
+                # a WAL we haven't read yet (the old one was compacted away)
+                _WAL_ID, _WAL_POS = wal_id, 0
+            fh.seek(_WAL_POS)
+            _WAL_POS += _replay(_STATE, fh.read())
+    except FileNotFoundError:
+        pass
+    return _STATE
+
+
+def _compact() -> None:
+    """
+    Fold the WAL into a new snapshot (caller holds _LOCK). Runs under the exclusive WAL
+    lock, so no other process is mid-append or mid-compaction meanwhile.
+    """
+    with file_lock(_WAL_LOCK_PATH, exclusive=True):
+        _compact_locked()
+
+
+def _compact_locked() -> None:
+    global _PENDING, _SNAP_KEY, _WAL_ID, _WAL_POS
+    reg = _sync()
+    # move the WAL aside first (appenders start a fresh one), pick up anything that
+    # landed in it since the sync, then publish the snapshot
+    old = _WAL_PATH.with_name(f"{_WAL_PATH.name}.{os.getpid()}.old")
+    try:
+        os.replace(_WAL_PATH, old)
+    except FileNotFoundError:
+        old = None
+    if old is not None:
+        with open(old, "rb") as fh:
+            fh.seek(_WAL_POS)
+            _replay(reg, fh.read())
     _save(reg)
+    _SNAP_KEY = _stat_key(_REG_PATH)
+    _WAL_ID, _WAL_POS = None, 0
+    _PENDING = 0
+    if old is not None:
+        old.unlink(missing_ok=True)
+
+
+def _append_event(ev: Dict[str, Any]) -> None:
+    """Append one mutation to the WAL (one line, no rewrite) and fold it into memory."""
+    global _PENDING
+    with _LOCK:
+        _WAL_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # shared lock: a compaction can't move this WAL aside between our open and write
+        with file_lock(_WAL_LOCK_PATH, exclusive=False), open(_WAL_PATH, "ab") as fh:
+            fh.write(dumps(ev) + b"\n")
+        _sync()  # picks up our line (and anything other processes appended before it)
+        _PENDING += 1
+        if _PENDING >= _COMPACT_EVERY:
+            try:
+                _compact()
+            except Exception as e:
+                # the events are safe in the WAL; try again on the next mutation
+                logger.warning(f"OCO registry: compaction failed: {e}")
+
+
+@atexit.register
+def _compact_at_exit() -> None:
+    if _PENDING:
+        try:
+            with _LOCK:
+                _compact()
+        except Exception as e:
+            logger.warning(f"OCO registry: compaction at exit failed: {e}")
+
+
+# -------------------- core API --------------------
+
+# Group-id suffixes: 32 random bits like the old uuid4().hex[:8], without an urandom read
+# per id. Ids outlive the process (registry on disk, watcher restarts), so no pid/counter
+# scheme; a private generator so random.seed() elsewhere can't make them repeat.
+_GID_RNG = random.Random()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_GID_RNG.seed)  # forked children must not share a stream
+
+def new_group_id(tradingsymbol: str) -> str:
+    """
+    Create a new OCO group bucket and return its id.
+    """
+    gid = f"OCO-{tradingsymbol}-{_GID_RNG.getrandbits(32):08x}"
+    rec = _empty_group(str(tradingsymbol or "").upper(), _now())
+    _append_event({"op": "new", "gid": gid, "rec": rec})
     return gid
 
 
 def record_primary(group_id: str, order: Dict[str, Any]) -> None:
-    reg = _load()
-    rec = reg.setdefault(group_id, {
-        "tradingsymbol": "",
-        "created_at": _now(),
-        "closed": False,
-        "closed_reason": None,
-        "closed_at": None,
-        "primary": None,
-        "stop": None,
-        "target": None,
-        "notes": [],
-    })
-    rec["primary"] = order
-    rec.setdefault("updated_at", _now())
-    rec["updated_at"] = _now()
-    _save(reg)
+    _append_event({"op": "primary", "gid": group_id, "order": order, "t": _now()})
+
+
+def _record_leg(op: str, group_id: str, order_id: str, order: Dict[str, Any]) -> None:
+    leg = {"order_id": str(order_id), "order": order}
+    with _LOCK:
+        rec = _sync().get(group_id)
+        if rec is not None and rec.get(op) == leg:
+            return  # retry/reconcile re-recording the same leg: nothing to write
+        _append_event({"op": op, "gid": group_id, **leg, "t": _now()})
 
 
 def record_stop(group_id: str, order_id: str, order: Dict[str, Any]) -> None:
-    reg = _load()
-    rec = reg.setdefault(group_id, {})
-    rec["stop"] = {"order_id": str(order_id), "order": order}
-    rec.setdefault("updated_at", _now())
-    rec["updated_at"] = _now()
-    _save(reg)
+    _record_leg("stop", group_id, order_id, order)
 
 
 def record_target(group_id: str, order_id: str, order: Dict[str, Any]) -> None:
-    reg = _load()
-    rec = reg.setdefault(group_id, {})
-    rec["target"] = {"order_id": str(order_id), "order": order}
-    rec.setdefault("updated_at", _now())
-    rec["updated_at"] = _now()
-    _save(reg)
+    _record_leg("target", group_id, order_id, order)
 
 
 def mark_closed(group_id: str, reason: str | None = None) -> None:
     """
     Mark OCO group as closed (e.g., 'exit_by_stop', 'exit_by_target', 'manual').
     """
-    reg = _load()
-    rec = reg.get(group_id)
-    if not rec:
-        logger.warning(f"OCO mark_closed: group {group_id} not found")
-        return
-    rec["closed"] = True
-    rec["closed_reason"] = reason or rec.get("closed_reason") or "closed"
-    rec["closed_at"] = _now()
-    rec.setdefault("updated_at", _now())
-    rec["updated_at"] = _now()
-    _save(reg)
+    with _LOCK:
+        if not _sync().get(group_id):
+            logger.warning(f"OCO mark_closed: group {group_id} not found")
+            return
+        _append_event({"op": "closed", "gid": group_id, "reason": reason, "t": _now()})
 
 
 # -------------------- convenience / queries --------------------
@@ -122,41 +289,37 @@ def all_groups() -> Dict[str, Any]:
     """
     Return the entire registry dict (id -> record).
     """
-    return _load()
+    with _LOCK:
+        return copy.deepcopy(_sync())
 
 
 def get_group(group_id: str) -> Optional[Dict[str, Any]]:
-    return _load().get(group_id)
+    with _LOCK:
+        return copy.deepcopy(_sync().get(group_id))
 
 
 def list_open_groups(symbol: str | None = None) -> Dict[str, Any]:
     """
     Return only groups not marked closed. Optionally filter by symbol.
     """
-    reg = _load()
     out: Dict[str, Any] = {}
-    for gid, rec in reg.items():
-        if rec.get("closed"):
-            continue
-        if symbol:
-            sym = str(rec.get("tradingsymbol") or "").upper()
-            if sym != str(symbol).upper():
+    with _LOCK:
+        reg = _sync()
+        want = str(symbol).upper() if symbol else None
+        for gid in _OPEN:  # open ids only: closed history isn't walked
+            rec = reg[gid]
+            if want is not None and str(rec.get("tradingsymbol") or "").upper() != want:
                 continue
-        out[gid] = rec
-    return out
+            out[gid] = rec
+        return copy.deepcopy(out)
 
 
 def append_note(group_id: str, note: str) -> None:
-    reg = _load()
-    rec = reg.get(group_id)
-    if not rec:
-        logger.warning(f"OCO append_note: group {group_id} not found")
-        return
-    rec.setdefault("notes", [])
-    rec["notes"].append({"t": _now(), "text": str(note)})
-    rec.setdefault("updated_at", _now())
-    rec["updated_at"] = _now()
-    _save(reg)
+    with _LOCK:
+        if not _sync().get(group_id):
+            logger.warning(f"OCO append_note: group {group_id} not found")
+            return
+        _append_event({"op": "note", "gid": group_id, "text": str(note), "t": _now()})
 
 
 def remove_group(group_id: str) -> None:
@@ -164,12 +327,11 @@ def remove_group(group_id: str) -> None:
     Hard-delete a group from the registry.
     Useful for cleanup after archival/log export.
     """
-    reg = _load()
-    if group_id in reg:
-        del reg[group_id]
-        _save(reg)
-    else:
-        logger.warning(f"OCO remove_group: group {group_id} not found")
+    with _LOCK:
+        if group_id in _sync():
+            _append_event({"op": "remove", "gid": group_id})
+        else:
+            logger.warning(f"OCO remove_group: group {group_id} not found")
 
 
 def clear_registry(keep_closed: bool = True) -> int:
@@ -179,15 +341,14 @@ def clear_registry(keep_closed: bool = True) -> int:
     - keep_closed=False: wipe everything
     Returns number of entries removed.
     """
-    reg = _load()
-    if not reg:
-        return 0
-    if keep_closed:
-        ids = [gid for gid, rec in reg.items() if rec.get("closed")]
+    with _LOCK:
+        reg = _sync()
+        if not reg:
+            return 0
+        if keep_closed:
+            ids = [gid for gid in reg if gid not in _OPEN]
+        else:
+            ids = list(reg.keys())
         for gid in ids:
-            del reg[gid]
-    else:
-        ids = list(reg.keys())
-        reg = {}
-    _save(reg)
-    return len(ids)
+            _append_event({"op": "remove", "gid": gid})
+        return len(ids)
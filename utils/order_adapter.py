@@ -1,19 +1,23 @@
 # utils/order_adapter.py
 from __future__ import annotations
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Tuple
 from loguru import logger
 
 # All possible keys your strategies may output
-KNOWN_KEYS = {
+KNOWN_KEYS: frozenset[str] = frozenset({
     "exchange", "tradingsymbol", "symboltoken",
     "transactiontype", "ordertype", "producttype", "duration",
     "quantity", "price", "triggerprice",
     "variety", "disclosedquantity",
     "squareoff", "stoploss", "trailingStopLoss",
     "client_order_id",
-}
+})
 
 def _as_str_price(x: Any) -> str | None:
+    if x.__class__ is float:
+        # the usual case: skip the tuple membership test and the float() round trip
+        return f"{x:.2f}" if x else None
     if x in (None, "", 0, "0"):
         return None
     try:
@@ -21,27 +25,21 @@ def _as_str_price(x: Any) -> str | None:
     except Exception:
         return None
 
-def to_smart_order(order: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Normalize a strategy/engine order dict to what Angel One's SmartAPI
-    expects for SmartConnect.placeOrder. Adjust here if SDK signatures change.
-    """
+def _normalize_smart_order(order: Dict[str, Any]) -> Dict[str, Any]:
     o = dict(order)
 
     # Normalize cases
     for k in ("exchange", "transactiontype", "ordertype", "producttype", "duration"):
-        if k in o and o[k] is not None:
-            o[k] = str(o[k]).upper()
+        v = o.get(k)
+        # values are nearly always upper already ("NSE", "BUY"): keep those as they are
+        if v is not None and not (v.__class__ is str and v.isupper()):
+            o[k] = str(v).upper()
 
     # Angel SDK variations:
     # - Some builds reject 'variety' if empty/None
     if not o.get("variety"):
         o.pop("variety", None)
 
-    # Basic sanity
-    if not o.get("tradingsymbol"):
-        logger.warning("Order missing tradingsymbol — check strategy output")
-
     # Type hygiene
     if "quantity" in o:
         try:
@@ -67,5 +65,32 @@ def to_smart_order(order: Dict[str, Any]) -> Dict[str, Any]:
             o.pop("triggerprice", None)
 
     # Some SDKs use client_order_id; others ignore it—keeping is harmless
-    cleaned = {k: v for k, v in o.items() if k in KNOWN_KEYS and v is not None}
-    return cleaned
+    # (filtered in o's order, which the payload keeps; a set intersection would scramble it)
+    known = KNOWN_KEYS
+    return {k: v for k, v in o.items() if v is not None and k in known}
+
+
+@lru_cache(maxsize=2048)
+def _normalize_smart_order_cached(items: Tuple[Tuple[str, type, Any], ...]) -> Dict[str, Any]:
+    # the value's type is part of the key so 1 / 1.0 / True don't share an entry
+    return _normalize_smart_order({k: v for k, _, v in items})
+
+def to_smart_order(order: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize a strategy/engine order dict to what Angel One's SmartAPI
+    expects for SmartConnect.placeOrder. Adjust here if SDK signatures change.
+    Orders made of hashable values are memoized (re-checked SL/TG legs repeat a lot);
+    the caller always gets its own dict.
+    """
+    # Basic sanity
+    if not order.get("tradingsymbol"):
+        logger.warning("Order missing tradingsymbol — check strategy output")
+    try:
+        # insertion order kept in the key: the output dict preserves it
+        key = tuple((k, v.__class__, v) for k, v in order.items())
+        hash(key)
+    except TypeError:  # unhashable values: no memo
+        return _normalize_smart_order(order)
+    return dict(_normalize_smart_order_cached(key))
+
+to_smart_order.cache_clear = _normalize_smart_order_cached.cache_clear  # type: ignore[attr-defined]
@@ -1,18 +1,22 @@
 # utils/order_exec.py
 from __future__ import annotations
 
-import csv, time, json, hashlib, pathlib, os, random, string
+import atexit, time, hashlib, pathlib, os, random, threading
 from datetime import datetime
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional, Any
 from loguru import logger
 
-from utils.market_health import fetch_quote, illiquid_or_wide
+from utils.market_health import fetch_quote, fetch_quotes_batch, illiquid_or_wide
 from utils.oco_registry import new_group_id, record_primary, record_stop, record_target
 from utils.market_hours import IST
 from utils.auto_trail import spawn_trailer_for_short_leg
-from utils.ltp_fetcher import get_ltp
+from utils.ltp_fetcher import get_ltp, peek_ltp
 from utils.order_adapter import to_smart_order
+from utils.trade_log import append_row
+from utils.filelock import file_lock
+from utils.jsonio import dumps, loads
 
 from config import (
     DRY_RUN,
@@ -23,7 +27,6 @@ from config import (
     STOP_LIMIT_BUFFER_PCT,  # used for SL limit & fallback buffer
     AUTO_TARGETS_ENABLED,
     TARGET_PCT,
-    TRADE_LOG_CSV,
     TRAIL_ENABLE,
     _f as _cf, _i as _ci, _s as _cs,
 )
@@ -36,31 +39,39 @@ CANCEL_TRIES             = _ci("CANCEL_TRIES", 3)
 CANCEL_BACKOFF_SECS      = _cf("CANCEL_BACKOFF_SECS", 0.4)
 TICK_SIZE                = _cf("TICK_SIZE", 0.05)
 
+# leg-building percentages as floats once, not per leg
+_SL_PCT  = float(STOP_LOSS_PCT)
+_SLB_PCT = float(STOP_LIMIT_BUFFER_PCT)
+_TGT_PCT = float(TARGET_PCT)
+
 # ==== HELPERS ================================================================
 def _now_ist() -> datetime:
     return datetime.now(IST)
 
 def _round_tick(x: float, step: float = TICK_SIZE) -> float:
+    if x.__class__ is not float:
+        x = float(x)
     if step <= 0:
-        return float(x)
-    return round(round(float(x) / step) * step, 2)
+        return x
+    # divide (not multiply by 1/step) and round half-even: same ticks as always
+    return round(round(x / step) * step, 2)
 
 def _as_float_str(x: float) -> str:
     return f"{float(x):.2f}"
 
-def _ensure_trade_log(path: Path) -> None:
-    if not path.exists():
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w", newline="", encoding="utf-8") as f:
-            csv.writer(f).writerow([
-                "ts","mode","symbol","side","ordertype","qty","price","triggerprice","orderid","note","ordertag"
-            ])
+_TS_MEMO: Tuple[int, str] = (-1, "")
+
+def _trade_ts() -> str:
+    """IST trade-log timestamp; the string is built once per wall-clock second."""
+    global _TS_MEMO
+    sec = int(time.time())
+    if sec != _TS_MEMO[0]:
+        _TS_MEMO = (sec, datetime.fromtimestamp(sec, IST).strftime("%Y-%m-%d %H:%M:%S"))
+    return _TS_MEMO[1]
 
 def _log_trade_row(mode: str, order: dict, orderid: str | None, note: str) -> None:
-    path = Path(TRADE_LOG_CSV)
-    _ensure_trade_log(path)
-    row = [
-        _now_ist().strftime("%Y-%m-%d %H:%M:%S"),
+    append_row([
+        _trade_ts(),
         mode,
         order.get("tradingsymbol",""),
         order.get("transactiontype",""),
@@ -71,9 +82,7 @@ def _log_trade_row(mode: str, order: dict, orderid: str | None, note: str) -> No
         (orderid or ""),
         note,
         order.get("ordertag",""),
-    ]
-    with path.open("a", newline="", encoding="utf-8") as f:
-        csv.writer(f).writerow(row)
+    ])
 
 def _short_tag(tag: str | None) -> str:
     """AngelOne tag limit < 20 chars."""
@@ -132,45 +141,158 @@ def _slippage_price(side: str, ltp: float, slip_pct: float) -> float:
     return round(ltp * (1.0 + float(slip_pct)), 2)
 
 def _fake_order_id(prefix: str = "DRY") -> str:
-    rand = ''.join(random.choices(string.ascii_uppercase + string.digits, k=7))
-    return f"{prefix}{rand}"
+    # 7 upper-case hex chars from one getrandbits (still follows random.seed in backtests)
+    return f"{prefix}{random.getrandbits(28):07X}"
 
 # ==== DE-DUPLICATION =========================================================
-def _hash_order(o: dict) -> str:
-    keys = ["tradingsymbol","symboltoken","transactiontype","exchange","ordertype","producttype","quantity","variety"]
-    s = "|".join(str(o.get(k, "")) for k in keys)
+_HASH_KEYS = ("tradingsymbol","symboltoken","transactiontype","exchange","ordertype","producttype","quantity","variety")
+
+@lru_cache(maxsize=4096)
+def _hash_key(s: str) -> str:
+    # SHA-256 hex, as always: keys already in ORDER_DEDUPE_FILE must keep matching
     return hashlib.sha256(s.encode()).hexdigest()
 
-def _dedupe_load() -> Dict[str, float]:
+def _hash_order(o: dict) -> str:
+    # the same legs recur all session, so the digest is memoized on the joined fields
+    return _hash_key("|".join(str(o.get(k, "")) for k in _HASH_KEYS))
+
+# ORDER_DEDUPE_FILE is an append-only log, one {"h": hash, "t": epoch} line per accepted
+# order, shared by every process placing orders. Each process keeps the folded view in
+# memory and only reads lines appended since its last look; every _DEDUPE_COMPACT_EVERY
+# appends (and at exit) the file is rewritten down to the entries still inside ttl*3.
+_DEDUPE_COMPACT_EVERY = 256
+# appenders hold it shared while writing a line, compaction exclusively while it moves the
+# log aside and writes the live entries back; the OS drops it if a holder crashes
+_DEDUPE_LOCK_FILE = ORDER_DEDUPE_FILE.with_name(f"{ORDER_DEDUPE_FILE.name}.lock")
+_DEDUPE_LOCK = threading.Lock()
+_DEDUPE_MEM: Dict[str, float] = {}
+_DEDUPE_ID: Optional[Tuple[int, bytes]] = None  # (inode, first line) of the file last read
+_DEDUPE_POS = 0
+_DEDUPE_STAT: Optional[Tuple[int, int, int]] = None  # (inode, size, mtime_ns) at the last read
+_DEDUPE_TAIL = 0
+_DEDUPE_APPENDS = 0
+
+def _dedupe_fold(chunk: bytes) -> int:
+    """Fold the complete lines of `chunk` into _DEDUPE_MEM; returns the bytes consumed."""
+    end = chunk.rfind(b"\n") + 1
+    for line in chunk[:end].splitlines():
+        try:
+            ev = loads(line) if line.strip() else None
+        except Exception:
+            continue
+        if not isinstance(ev, dict):
+            continue
+        if "h" in ev and "t" in ev:
+            ent = {ev["h"]: ev["t"]}
+        else:
+            ent = ev  # pre-log format: one {hash: epoch} dict
+        for h, t in ent.items():
+            try:
+                t = float(t)
+            except Exception:
+                continue
+            if t > _DEDUPE_MEM.get(h, 0.0):
+                _DEDUPE_MEM[h] = t
+    return end
+
+def _dedupe_sync() -> int:
+    """Fold in whatever was appended since the last call (caller holds _DEDUPE_LOCK).
+    Returns the size of an unterminated tail left in the file, if any."""
+    global _DEDUPE_ID, _DEDUPE_POS, _DEDUPE_STAT, _DEDUPE_TAIL
     try:
-        if ORDER_DEDUPE_FILE.exists():
-            return json.loads(ORDER_DEDUPE_FILE.read_text(encoding="utf-8"))
+        st = os.stat(ORDER_DEDUPE_FILE)
+    except FileNotFoundError:
+        _DEDUPE_ID, _DEDUPE_POS, _DEDUPE_STAT = None, 0, None
+        return 0
+    except Exception:
+        return 0
+    stat_key = (st.st_ino, st.st_size, st.st_mtime_ns)
+    if stat_key == _DEDUPE_STAT:
+        return _DEDUPE_TAIL  # nothing appended since the last look: one stat, no read
+    try:
+        with open(ORDER_DEDUPE_FILE, "rb") as fh:
+            head = fh.readline()
+            ident = (os.fstat(fh.fileno()).st_ino, head)
+            if ident != _DEDUPE_ID:
+                # new or compacted file; entries already in memory stay valid
+                _DEDUPE_ID, _DEDUPE_POS = ident, 0
+            fh.seek(_DEDUPE_POS)
+            chunk = fh.read()
+            used = _dedupe_fold(chunk)
+            _DEDUPE_POS += used
+            if used < len(chunk):
+                # unterminated tail: the old single-dict file parses; a half-written line doesn't
+                _dedupe_fold(chunk[used:] + b"\n")
+            # stat_key predates the read, so anything appended meanwhile is picked up next time
+            _DEDUPE_STAT, _DEDUPE_TAIL = stat_key, len(chunk) - used
+            return _DEDUPE_TAIL
+    except FileNotFoundError:
+        _DEDUPE_ID, _DEDUPE_POS, _DEDUPE_STAT = None, 0, None
     except Exception:
         pass
-    return {}
+    return 0
 
-def _dedupe_save(d: Dict[str, float]) -> None:
+def _dedupe_append(h: str, now: float, partial_tail: bool) -> None:
+    global _DEDUPE_APPENDS
+    _DEDUPE_MEM[h] = now
+    line = (b"\n" if partial_tail else b"") + dumps({"h": h, "t": now}) + b"\n"
+    # an unterminated last line (e.g. the old single-dict file) gets closed off first
     try:
-        ORDER_DEDUPE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        ORDER_DEDUPE_FILE.write_text(json.dumps(d), encoding="utf-8")
+        # shared lock: a compaction can't move the log aside between our open and write
+        with file_lock(_DEDUPE_LOCK_FILE, exclusive=False), open(ORDER_DEDUPE_FILE, "ab") as fh:
+            fh.write(line)
     except Exception:
-        pass
+        return
+    _DEDUPE_APPENDS += 1
+    if _DEDUPE_APPENDS >= _DEDUPE_COMPACT_EVERY:
+        _dedupe_compact()
+
+def _dedupe_compact() -> None:
+    """
+    Rewrite the log down to live entries (caller holds _DEDUPE_LOCK). Runs under the
+    exclusive file lock, so no other process is mid-append or mid-compaction meanwhile.
+    """
+    global _DEDUPE_APPENDS
+    _DEDUPE_APPENDS = 0
+    try:
+        with file_lock(_DEDUPE_LOCK_FILE, exclusive=True):
+            _dedupe_compact_locked()
+    except Exception as e:
+        logger.warning(f"[dedupe] compaction failed: {e}")
+
+def _dedupe_compact_locked() -> None:
+    old = ORDER_DEDUPE_FILE.with_name(f"{ORDER_DEDUPE_FILE.name}.{os.getpid()}.old")
+    try:
+        os.replace(ORDER_DEDUPE_FILE, old)
+    except Exception:
+        return
+    with open(old, "rb") as fh:
+        _dedupe_fold(fh.read() + b"\n")
+    horizon = time.time() - max(0, ORDER_DEDUPE_WINDOW_SECS) * 3
+    live = {k: v for k, v in _DEDUPE_MEM.items() if v >= horizon}
+    _DEDUPE_MEM.clear()
+    _DEDUPE_MEM.update(live)
+    with open(ORDER_DEDUPE_FILE, "ab") as fh:
+        fh.write(b"".join(dumps({"h": k, "t": v}) + b"\n" for k, v in live.items()))
+    old.unlink()
+
+@atexit.register
+def _dedupe_compact_at_exit() -> None:
+    if _DEDUPE_APPENDS:
+        with _DEDUPE_LOCK:
+            _dedupe_compact()
 
 def _should_block_duplicate(o: dict) -> bool:
     now = time.time()
-    db = _dedupe_load()
     h = _hash_order(o)
-    last = db.get(h, 0.0)
     ttl = max(0, ORDER_DEDUPE_WINDOW_SECS)
-    if ttl == 0:
-        db[h] = now; _dedupe_save(db); return False
-    if now - last <= ttl:
-        logger.warning(f"[dedupe] Blocked duplicate within {ttl}s: {o.get('tradingsymbol')} {o.get('transactiontype')}")
-        return True
-    db[h] = now
-    if ttl > 0:
-        db = {k: v for k, v in db.items() if now - v <= ttl * 3}
-    _dedupe_save(db)
+    with _DEDUPE_LOCK:
+        tail = _dedupe_sync()
+        last = _DEDUPE_MEM.get(h, 0.0)
+        if ttl > 0 and now - last <= ttl:
+            logger.warning(f"[dedupe] Blocked duplicate within {ttl}s: {o.get('tradingsymbol')} {o.get('transactiontype')}")
+            return True
+        _dedupe_append(h, now, tail > 0)
     return False
 
 # ==== DETECT SIGNAL PAYLOADS =================================================
@@ -178,17 +300,18 @@ def _is_signal_payload(obj: Any) -> bool:
     return isinstance(obj, dict) and "signal" in obj and "meta" in obj and "name" in obj
 
 # ==== CORE BROKER CALL WITH AUTO-FIX =========================================
+_DRY_RUN_RESP = {"status": True, "message": "DRY-RUN preview", "data": None, "orderid": None}
+
 def _place(smart, order: dict) -> Tuple[bool, Optional[str], dict]:
     """Place order; on AB1020 Invalid Order Type, try one graceful fallback."""
     if DRY_RUN:
         oid = _fake_order_id()
-        logger.info(f"[DRY-RUN] Would place → {order} (oid={oid})")
-        return True, oid, {
-            "status": True,
-            "message": "DRY-RUN preview",
-            "data": {"order_preview": order, "orderid": oid},
-            "orderid": oid,
-        }
+        # args, not an f-string: the order's repr is only built if INFO is actually emitted
+        logger.info("[DRY-RUN] Would place → {} (oid={})", order, oid)
+        resp = _DRY_RUN_RESP.copy()
+        resp["data"] = {"order_preview": order, "orderid": oid}
+        resp["orderid"] = oid
+        return True, oid, resp
 
     def _do_place(payload: dict):
         safe = to_smart_order(payload)
@@ -231,7 +354,7 @@ def _place(smart, order: dict) -> Tuple[bool, Optional[str], dict]:
                 # try to salvage from price if present
                 trig = float(o2.get("price") or 0) or 0.0
             if trig > 0:
-                lim = _round_tick(trig * (1.0 + float(STOP_LIMIT_BUFFER_PCT)))
+                lim = _round_tick(trig * (1.0 + _SLB_PCT))
                 o2["ordertype"] = "STOPLOSS"
                 o2["triggerprice"] = _as_float_str(_round_tick(trig))
                 o2["price"] = _as_float_str(lim)
@@ -258,8 +381,8 @@ def _make_sl_buy_for_short(primary: dict, ref_price: float) -> dict:
     """
     Build a STOPLOSS/SL buy (Angel expects both triggerprice and price).
     """
-    trig = _round_tick(max(ref_price, 0.05) * (1.0 + float(STOP_LOSS_PCT)))
-    limit = _round_tick(trig * (1.0 + float(STOP_LIMIT_BUFFER_PCT)))
+    trig = _round_tick(max(ref_price, 0.05) * (1.0 + _SL_PCT))
+    limit = _round_tick(trig * (1.0 + _SLB_PCT))
     return {
         "variety": "NORMAL",  # SLs go as NORMAL
         "tradingsymbol": primary["tradingsymbol"],
@@ -276,7 +399,7 @@ def _make_sl_buy_for_short(primary: dict, ref_price: float) -> dict:
     }
 
 def _make_limit_target_for_short(primary: dict, ref_price: float) -> Optional[dict]:
-    price = _round_tick(ref_price * (1.0 - float(TARGET_PCT)))
+    price = _round_tick(ref_price * (1.0 - _TGT_PCT))
     if price <= 0:
         return None
     return {
@@ -293,6 +416,67 @@ def _make_limit_target_for_short(primary: dict, ref_price: float) -> Optional[di
         "ordertag": _short_tag(primary.get("ordertag")),
     }
 
+def _tag_oco(o: dict) -> Optional[str]:
+    """New OCO group for `o` (tagging it) when auto stops/targets are on; None otherwise."""
+    if not (AUTO_STOPS_ENABLED or AUTO_TARGETS_ENABLED):
+        return None
+    try:
+        gid = new_group_id(o["tradingsymbol"])
+        o["ordertag"] = _short_tag(gid)
+        return gid
+    except Exception:
+        return None
+
+# per-call memo for quotes/LTPs: same-symbol legs in one basket don't re-fetch
+_CALL_QUOTE_TTL_S = 2.0
+
+def _cached_quote(cache: Dict[tuple, Tuple[float, Any]], smart, exch: str, sym: str, tok: str,
+                  ttl: float = _CALL_QUOTE_TTL_S) -> dict:
+    key = ("quote", exch, tok)
+    hit = cache.get(key)
+    now = time.monotonic()
+    if hit is not None and now - hit[0] < ttl:
+        return hit[1]
+    q = fetch_quote(smart, exch, sym, tok, need_book=True) or {}
+    if q:
+        cache[key] = (now, q)
+    return q
+
+def _cached_ltp(cache: Dict[tuple, Tuple[float, Any]], smart, exch: str, sym: str, tok: str,
+                ttl: float = _CALL_QUOTE_TTL_S) -> float:
+    """get_ltp as float, memoized per call; errors propagate and are not cached."""
+    key = ("ltp", exch, tok)
+    hit = cache.get(key)
+    now = time.monotonic()
+    if hit is not None and now - hit[0] < ttl:
+        return hit[1]
+    ltp = float(get_ltp(smart, exch, sym, tok))
+    cache[key] = (now, ltp)
+    return ltp
+
+# rollback cancels are independent network calls: fan them out instead of paying one RTT each
+_CANCEL_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cancel")
+
+def _safe_cancel(smart, variety: str, orderid: str) -> bool:
+    """cancelOrder with CANCEL_TRIES attempts and linear backoff; never raises."""
+    for attempt in range(1, max(1, CANCEL_TRIES) + 1):
+        try:
+            smart.cancelOrder(variety=variety, orderid=orderid)
+            return True
+        except Exception as e:
+            if attempt >= CANCEL_TRIES:
+                logger.error(f"[rollback] cancel {orderid} failed after {attempt} tries: {e}")
+                return False
+            time.sleep(CANCEL_BACKOFF_SECS * attempt)
+    return False
+
+def _rollback_primaries(smart, placed: List[Tuple[str, str]]) -> None:
+    """Cancel already-placed primaries in parallel; waits for the retry budget, not for every RTT in turn."""
+    futs = [_CANCEL_POOL.submit(_safe_cancel, smart, pvar, poid) for poid, pvar in reversed(placed)]
+    _, pending = wait(futs, timeout=CANCEL_BACKOFF_SECS * CANCEL_TRIES)
+    if pending:
+        logger.warning(f"[rollback] {len(pending)} cancel(s) still in flight; continuing in background")
+
 # ==== PUBLIC ENTRY ===========================================================
 def place_or_preview(
     smart,
@@ -317,10 +501,27 @@ def place_or_preview(
 
     results: List[Tuple[bool, Optional[str], dict]] = []
     placed_primaries: List[Tuple[str, str]] = []
+    quote_cache: Dict[tuple, Tuple[float, Any]] = {}
+    # classify once: both the basket prefetch and the main loop need it
+    is_signal = [_is_signal_payload(r) for r in items]
+
+    # Quote the whole basket up front (one call per exchange); the per-order spread
+    # gate below then reads from fetch_quote's cache. DRY-RUN never quotes.
+    legs = [
+        (str(r.get("exchange", "NFO")), str(r["tradingsymbol"]), str(r["symboltoken"]))
+        for r, sig in zip(items, is_signal)
+        if not sig and isinstance(r, dict)
+        and r.get("tradingsymbol") and r.get("symboltoken")
+    ]
+    if len(legs) > 1 and not DRY_RUN:
+        try:
+            fetch_quotes_batch(smart, legs, fallback=False)
+        except Exception as e:
+            logger.debug(f"[spread] batch quote failed, quoting per order: {e}")
 
     for idx, raw in enumerate(items):
         # Strategy "signal" packets passthrough
-        if _is_signal_payload(raw):
+        if is_signal[idx]:
             logger.info(f"[signal] Strategy={raw.get('name')} signal={raw.get('signal')} meta={raw.get('meta')}")
             results.append((True, None, {"status": True, "message": "signal_only", "data": raw}))
             continue
@@ -342,9 +543,23 @@ def place_or_preview(
             results.append((False, None, {"status": False, "message": "duplicate_blocked"}))
             continue
 
+        # DRY RUN path: preview only, no broker calls (no quote gate, no LTP fetch)
+        if DRY_RUN:
+            if o["ordertype"] == "LIMIT" and (o.get("price") in (None,"",0,"0")):
+                # price the preview from an LTP already in cache, else leave it blank
+                ltp = peek_ltp(o["exchange"], o["tradingsymbol"], o["symboltoken"])
+                if ltp:
+                    o["price"] = _as_float_str(_round_tick(_slippage_price(o["transactiontype"], ltp, SLIPPAGE_PCT)))
+            _tag_oco(o)
+            oid_preview = _fake_order_id()
+            logger.info(f"[DRY-RUN] Would place: {o} (oid={oid_preview})")
+            _log_trade_row("DRY", o, oid_preview, "preview_primary")
+            results.append((True, oid_preview, {"status": True, "message": "DRY-RUN preview", "orderid": oid_preview}))
+            continue
+
         # Liquidity/spread gate (best-effort)
         try:
-            q = fetch_quote(smart, o["exchange"], o["tradingsymbol"], o["symboltoken"]) or {}
+            q = _cached_quote(quote_cache, smart, o["exchange"], o["tradingsymbol"], o["symboltoken"])
             if illiquid_or_wide(q, max_spread_pct=VOL_MAX_SPREAD_PCT):
                 logger.warning(f"[spread] Wide/illiquid: {o['tradingsymbol']} — blocking order")
                 results.append((False, None, {"status": False, "message": "wide_spread_block"}))
@@ -358,28 +573,14 @@ def place_or_preview(
         # Auto-price LIMIT if blank
         if o["ordertype"] == "LIMIT" and (o.get("price") in (None,"",0,"0")):
             try:
-                ltp = float(get_ltp(smart, o["exchange"], o["tradingsymbol"], o["symboltoken"]))
+                ltp = _cached_ltp(quote_cache, smart, o["exchange"], o["tradingsymbol"], o["symboltoken"])
                 o["price"] = _as_float_str(_round_tick(_slippage_price(o["transactiontype"], ltp, SLIPPAGE_PCT)))
             except Exception as e:
                 results.append((False, None, {"status": False, "message": f"slippage/ltp error: {e}"}))
                 continue
 
         # Group OCO
-        oco_gid = None
-        if (AUTO_STOPS_ENABLED or AUTO_TARGETS_ENABLED):
-            try:
-                oco_gid = new_group_id(o["tradingsymbol"])
-                o["ordertag"] = _short_tag(oco_gid)
-            except Exception:
-                pass
-
-        # DRY RUN path
-        if DRY_RUN:
-            oid_preview = _fake_order_id()
-            logger.info(f"[DRY-RUN] Would place: {o} (oid={oid_preview})")
-            _log_trade_row("DRY", o, oid_preview, "preview_primary")
-            results.append((True, oid_preview, {"status": True, "message": "DRY-RUN preview", "orderid": oid_preview}))
-            continue
+        oco_gid = _tag_oco(o)
 
         # LIVE: place primary
         ok, oid, resp = _place(smart, o)
@@ -387,11 +588,7 @@ def place_or_preview(
         results.append((ok, oid, resp))
         if not ok:
             if rollback_on_failure and placed_primaries:
-                for poid, pvar in reversed(placed_primaries):
-                    try:
-                        smart.cancelOrder(variety=pvar, orderid=poid)
-                    except Exception:
-                        pass
+                _rollback_primaries(smart, placed_primaries)
             continue
 
         placed_primaries.append((oid or "", o.get("variety","NORMAL")))
@@ -412,7 +609,7 @@ def place_or_preview(
                 base_px = 0.0
             if base_px <= 0:
                 try:
-                    base_px = float(get_ltp(smart, o["exchange"], o["tradingsymbol"], o["symboltoken"]))
+                    base_px = _cached_ltp(quote_cache, smart, o["exchange"], o["tradingsymbol"], o["symboltoken"])
                 except Exception:
                     base_px = 0.0
 
@@ -1,14 +1,22 @@
 # utils/pnl.py
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
 from pathlib import Path
 import csv
 import datetime
+import io
+from collections import defaultdict, deque
+from itertools import islice
+from operator import attrgetter
 
+import numpy as np
+
+from utils._njit import njit, HAVE_NUMBA
 from utils.market_hours import IST  # same tz you already use
+from utils.trade_log import day_start_offset, flush_trade_log
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     ts: datetime.datetime   # timezone-aware IST
     mode: str               # "DRY" / "LIVE"
@@ -21,30 +29,52 @@ class Trade:
     note: str
     ordertag: str
 
+_TS_DIGITS = (0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18)
+
+def _parse_ts(ts_str: str) -> Optional[datetime.datetime]:
+    """"YYYY-MM-DD HH:MM:SS" (IST wall clock) by slicing; None if it isn't that shape."""
+    if (len(ts_str) != 19 or ts_str[4] != "-" or ts_str[7] != "-" or ts_str[10] != " "
+            or ts_str[13] != ":" or ts_str[16] != ":" or not all(ts_str[i].isdigit() for i in _TS_DIGITS)):
+        return None
+    try:
+        return datetime.datetime(int(ts_str[0:4]), int(ts_str[5:7]), int(ts_str[8:10]),
+                                 int(ts_str[11:13]), int(ts_str[14:16]), int(ts_str[17:19]), tzinfo=IST)
+    except ValueError:  # e.g. month 13
+        return None
+
 def _parse_row(row: List[str]) -> Optional[Trade]:
+    if len(row) != 11:
+        return None
+    ts_str, mode, symbol, side, ordertype, qty, price, trig, orderid, note, ordertag = row
+    side = side.strip().upper()
+    if side not in ("BUY", "SELL"):
+        return None
+    # ts like "YYYY-MM-DD HH:MM:SS" in IST (your order_exec.py)
+    ts = _parse_ts(ts_str)
+    if ts is None:
+        return None
     try:
-        ts_str, mode, symbol, side, ordertype, qty, price, trig, orderid, note, ordertag = row
-        # ts like "YYYY-MM-DD HH:MM:SS" in IST (your order_exec.py)
-        naive = datetime.datetime.strptime(ts_str, "%Y-%m-%d %H:%M:%S")
-        ts = IST.localize(naive)
         q = int(str(qty or "0").strip() or 0)
         px = float(str(price or "0").strip() or 0.0)
-        side = side.strip().upper()
-        if side not in ("BUY", "SELL"):
-            return None
-        return Trade(ts, mode.strip().upper(), symbol.strip(), side, ordertype.strip().upper(),
-                     q, px, (orderid or "").strip(), (note or "").strip(), (ordertag or "").strip())
-    except Exception:
+    except ValueError:
         return None
+    return Trade(ts, mode.strip().upper(), symbol.strip(), side, ordertype.strip().upper(),
+                 q, px, (orderid or "").strip(), (note or "").strip(), (ordertag or "").strip())
 
 def load_trades(csv_path: Path, day: Optional[datetime.date] = None) -> List[Trade]:
+    flush_trade_log()  # rows this process queued but hasn't written yet
     trades: List[Trade] = []
     if not csv_path.exists():
         return trades
-    with csv_path.open("r", newline="", encoding="utf-8") as f:
-        r = csv.reader(f)
-        header = next(r, None)  # skip header
-        for row in r:
+    day_str = day.isoformat() if day else ""
+    with csv_path.open("rb") as raw:
+        raw.readline()  # skip header
+        if day:
+            # earlier days are skipped without being parsed
+            raw.seek(max(raw.tell(), day_start_offset(csv_path, day_str)))
+        for row in csv.reader(io.TextIOWrapper(raw, encoding="utf-8", newline="")):
+            if day_str and not (row and row[0].startswith(day_str)):
+                continue  # other day: no need to parse it
             t = _parse_row(row)
             if not t:
                 continue
@@ -54,90 +84,171 @@ def load_trades(csv_path: Path, day: Optional[datetime.date] = None) -> List[Tra
             trades.append(t)
     return trades
 
+# below this many fills the plain lot-queue walk is cheaper than building arrays
+_FIFO_NP_MIN = 32
+
+def _fifo_fill_pnl(qty: np.ndarray, px: np.ndarray, is_buy: np.ndarray) -> np.ndarray:
+    """
+    Realized P&L booked by each fill of ONE symbol (fills in time order), strict FIFO with
+    long and short inventory: same numbers as walking a long-lot and a short-lot queue.
+
+    A fill first closes the opposite inventory, the rest opens on its own side. Each side
+    is a FIFO queue, so the k-th unit closed on a side is the k-th unit opened there: the
+    entry cost of a close is the opened-cost curve (piecewise linear in cumulative opened
+    units) evaluated between its cumulative closed-unit bounds.
+    """
+    q = qty.astype("float64")
+    p = px.astype("float64")
+    signed = np.where(is_buy, q, -q)
+    pos_before = np.cumsum(signed) - signed
+    close = np.minimum(q, np.where(is_buy, np.maximum(-pos_before, 0.0), np.maximum(pos_before, 0.0)))
+    opened = q - close
+
+    out = np.zeros_like(q)
+    for opens_here, sign in ((is_buy, 1.0), (~is_buy, -1.0)):  # long lots, then short lots
+        o = np.where(opens_here, opened, 0.0)
+        c = np.where(opens_here, 0.0, close)
+        keep = o > 0
+        if not keep.any() or not c.any():
+            continue
+        xo = np.concatenate(([0.0], np.cumsum(o[keep])))
+        co = np.concatenate(([0.0], np.cumsum(o[keep] * p[keep])))
+        hi = np.cumsum(c)
+        entry = np.interp(hi, xo, co) - np.interp(hi - c, xo, co)
+        # long closes by selling (exit - entry); short closes by buying (entry - exit)
+        out += np.where(c > 0, sign * (c * p - entry), 0.0)
+    return out
+
+def _fifo_fill_pnl_walk(qty: Sequence[int], px: Sequence[float], is_buy: Sequence[bool]) -> List[float]:
+    """Lot-queue walk with the same results as _fifo_fill_pnl, for a handful of fills."""
+    # lots as parallel qty/price deques per side (oldest first), no per-lot container
+    long_q: Deque[int] = deque()
+    long_p: Deque[float] = deque()
+    short_q: Deque[int] = deque()
+    short_p: Deque[float] = deque()
+    out: List[float] = []
+    for q, p, buy in zip(qty, px, is_buy):
+        # close the opposite side first, then whatever is left opens on this side
+        if buy:
+            close_q, close_p, open_q, open_p = short_q, short_p, long_q, long_p
+        else:
+            close_q, close_p, open_q, open_p = long_q, long_p, short_q, short_p
+        realized = 0.0
+        remaining = q
+        while remaining > 0 and close_q:
+            lot_q = close_q[0]
+            match = remaining if remaining < lot_q else lot_q
+            # long closed by a sell: exit - entry; short closed by a buy: entry - exit
+            realized += ((close_p[0] - p) if buy else (p - close_p[0])) * match
+            remaining -= match
+            if match == lot_q:
+                close_q.popleft()
+                close_p.popleft()
+            else:
+                close_q[0] = lot_q - match
+        if remaining > 0:
+            open_q.append(remaining)
+            open_p.append(p)
+        out.append(realized)
+    return out
+
+@njit(cache=True)
+def _fifo_fill_pnl_nb(qty, px, is_buy):
+    """
+    The lot-queue walk as a compiled kernel (float64/float64/bool arrays in). Each side's
+    queue is a pair of preallocated qty/price arrays with head/tail indices: a side can
+    never hold more lots than there are fills.
+    """
+    n = qty.shape[0]
+    out = np.zeros(n)
+    lq = np.empty(n)
+    lp = np.empty(n)
+    sq = np.empty(n)
+    sp = np.empty(n)
+    lh = lt = sh = st = 0
+    for i in range(n):
+        q = qty[i]
+        p = px[i]
+        realized = 0.0
+        if is_buy[i]:
+            while q > 0 and sh < st:
+                match = q if q < sq[sh] else sq[sh]
+                realized += (sp[sh] - p) * match
+                q -= match
+                if match == sq[sh]:
+                    sh += 1
+                else:
+                    sq[sh] -= match
+            if q > 0:
+                lq[lt] = q
+                lp[lt] = p
+                lt += 1
+        else:
+            while q > 0 and lh < lt:
+                match = q if q < lq[lh] else lq[lh]
+                realized += (p - lp[lh]) * match
+                q -= match
+                if match == lq[lh]:
+                    lh += 1
+                else:
+                    lq[lh] -= match
+            if q > 0:
+                sq[st] = q
+                sp[st] = p
+                st += 1
+        out[i] = realized
+    return out
+
+def fifo_fill_pnl(qty: Sequence[int], px: Sequence[float], is_buy: Sequence[bool]) -> List[float]:
+    """Realized P&L booked by each fill of one symbol (time order), strict FIFO."""
+    if len(qty) >= _FIFO_NP_MIN:
+        # compiled walk when numba is installed, else the vectorized numpy kernel
+        kernel = _fifo_fill_pnl_nb if HAVE_NUMBA else _fifo_fill_pnl
+        return kernel(
+            np.asarray(qty, dtype="float64"), np.asarray(px, dtype="float64"), np.asarray(is_buy, dtype=bool)
+        ).tolist()
+    return _fifo_fill_pnl_walk(qty, px, is_buy)
+
+def fifo_realized(qty: Sequence[int], px: Sequence[float], is_buy: Sequence[bool]) -> float:
+    """Total realized FIFO P&L of one symbol's fills."""
+    return float(sum(fifo_fill_pnl(qty, px, is_buy)))
+
 def realized_fifo_pnl(trades: List[Trade]) -> Tuple[float, Dict[str, float], Dict[str, float]]:
     """
     Returns (total_realized, by_symbol, by_tag).
-    Uses FIFO; ignores unrealized PnL (open positions at end of day).
+    Uses FIFO per symbol (long and short inventory; a fill closes the opposite side
+    first); ignores unrealized PnL (open positions at end of day).
     Only trades with price>0 and qty>0 are considered.
     """
-    # group per symbol
-    from collections import defaultdict, deque
     by_sym: Dict[str, float] = defaultdict(float)
     by_tag: Dict[str, float] = defaultdict(float)
 
-    # inventory per symbol: queue of (qty_remaining, price)
-    inv: Dict[str, deque] = {}
-
-    # sort by time to be safe
-    trades_sorted = sorted(
-        [t for t in trades if t.qty > 0 and t.price > 0.0],
-        key=lambda x: x.ts
-    )
+    # sort by time to be safe (the trade log is append-only, so usually it already is)
+    trades_sorted = [t for t in trades if t.qty > 0 and t.price > 0.0]
+    if not all(a.ts <= b.ts for a, b in zip(trades_sorted, islice(trades_sorted, 1, None))):
+        trades_sorted.sort(key=attrgetter("ts"))
 
-    for t in trades_sorted:
-        q = t.qty
-        px = t.price
-        sym = t.symbol
-        tag = t.ordertag or "UNSPECIFIED"
+    # per-symbol fill columns, plus where each fill sits in the day's order
+    groups: Dict[str, Tuple[List[int], List[int], List[float], List[bool]]] = {}
+    for i, t in enumerate(trades_sorted):
+        g = groups.get(t.symbol)
+        if g is None:
+            g = groups[t.symbol] = ([], [], [], [])
+        g[0].append(i)
+        g[1].append(t.qty)
+        g[2].append(t.price)
+        g[3].append(t.side == "BUY")
 
-        if sym not in inv:
-            from collections import deque
-            inv[sym] = deque()
+    fill_pnl = [0.0] * len(trades_sorted)
+    for idx, qtys, pxs, buys in groups.values():
+        for i, r in zip(idx, fifo_fill_pnl(qtys, pxs, buys)):
+            fill_pnl[i] = r
 
-        if t.side == "BUY":
-            # Add inventory
-            inv[sym].append([q, px])
-        else:
-            # SELL closes existing inventory (shorting handled by negative inventory via BUY on exit)
-            qty_to_match = q
-            realized_here = 0.0
-            # If no inventory, treat as short open: negative inventory bucket
-            if not inv[sym]:
-                inv[sym].append([-qty_to_match, px])  # track short at sell price
-                qty_to_match = 0
-            while qty_to_match > 0 and inv[sym]:
-                lot_qty, lot_px = inv[sym][0]
-                if lot_qty <= 0:
-                    # encountering short inventory while selling more: extend short
-                    inv[sym][0][0] -= qty_to_match
-                    qty_to_match = 0
-                    break
-                match = min(qty_to_match, lot_qty)
-                realized_here += (px - lot_px) * match
-                lot_qty -= match
-                qty_to_match -= match
-                if lot_qty == 0:
-                    inv[sym].popleft()
-                else:
-                    inv[sym][0][0] = lot_qty
-            # if still qty_to_match > 0, extend short for remaining
-            if qty_to_match > 0:
-                inv[sym].append([-qty_to_match, px])
-            by_sym[sym] += realized_here
-            by_tag[tag] += realized_here
-
-        # If side == BUY and we had short inventory (negative), BUY closes shorts
-        if t.side == "BUY":
-            qty_to_match = q
-            realized_here = 0.0
-            # first, close shorts (negative lots) from front
-            while qty_to_match > 0 and inv[sym]:
-                lot_qty, lot_px = inv[sym][0]
-                if lot_qty >= 0:
-                    break
-                # lot_qty negative → short opened at lot_px; closing BUY realizes (lot_px - px)
-                match = min(qty_to_match, -lot_qty)
-                realized_here += (lot_px - px) * match
-                lot_qty += match  # toward zero
-                qty_to_match -= match
-                if lot_qty == 0:
-                    inv[sym].popleft()
-                else:
-                    inv[sym][0][0] = lot_qty
-            # any remaining qty_to_match was already added to long inventory above
-            if realized_here != 0.0:
-                by_sym[sym] += realized_here
-                by_tag[tag] += realized_here
+    for t, r in zip(trades_sorted, fill_pnl):
+        # sells always book (even 0.0); buys only when they cover a short
+        if t.side == "SELL" or r != 0.0:
+            by_sym[t.symbol] += r
+            by_tag[t.ordertag or "UNSPECIFIED"] += r
 
     total = float(sum(by_sym.values()))
     return total, dict(by_sym), dict(by_tag)
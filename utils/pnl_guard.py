@@ -1,15 +1,18 @@
 # utils/pnl_guard.py
 from __future__ import annotations
 import csv
-from collections import deque, defaultdict
+import io
+from collections import defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Deque, Dict, List, Tuple
+from typing import Dict, List
 
 from loguru import logger
 
 from config import TRADE_LOG_CSV
 from utils.market_hours import IST  # <- use existing IST
+from utils.pnl import fifo_realized
+from utils.trade_log import day_start_offset, flush_trade_log
 
 # --- internals ---------------------------------------------------------------
 
@@ -20,37 +23,56 @@ def _today_ist_date_str() -> str:
         now = datetime.now()
     return now.strftime("%Y-%m-%d")
 
+def _first(row: List[str], idxs: List[int]) -> str:
+    """First non-empty value among the given columns (like the old `a or b or ""` chain)."""
+    for i in idxs:
+        if i < len(row) and row[i]:
+            return row[i]
+    return ""
+
 def _load_today_live_trades() -> List[dict]:
+    flush_trade_log()  # rows this process queued but hasn't written yet
     path = Path(TRADE_LOG_CSV)
     if not path.exists():
         return []
+    today = _today_ist_date_str()
     out: List[dict] = []
-    with path.open("r", newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        for row in r:
+    with path.open("rb") as raw:
+        header = next(csv.reader([raw.readline().decode("utf-8")]), None)
+        if not header:
+            return out
+        col = {name: i for i, name in enumerate(header)}  # last one wins, as in a dict row
+        mode_cols = [col[k] for k in ("mode", "Mode") if k in col]
+        ts_cols = [col[k] for k in ("ts", "timestamp", "time") if k in col]
+        nf = len(header)
+
+        # earlier days are skipped without being parsed
+        raw.seek(max(raw.tell(), day_start_offset(path, today)))
+        for row in csv.reader(io.TextIOWrapper(raw, encoding="utf-8", newline="")):
             if not row:
                 continue
-            mode = (row.get("mode") or row.get("Mode") or "").upper()
-            ts   = (row.get("ts") or row.get("timestamp") or row.get("time") or "")
-            if mode != "LIVE":
+            if not _first(row, ts_cols).startswith(today):
                 continue
-            if not ts.startswith(_today_ist_date_str()):
+            if _first(row, mode_cols).upper() != "LIVE":
                 continue
-            out.append(row)
+            # same shape csv.DictReader gives (missing -> None, extras under None)
+            d = dict(zip(header, row))
+            if len(row) < nf:
+                for k in header[len(row):]:
+                    d[k] = None
+            elif len(row) > nf:
+                d[None] = row[nf:]  # type: ignore[index]
+            out.append(d)
     return out
 
-# FIFO lot = (qty_remaining, price)
-Lot = Tuple[int, float]
-
 def _fifo_realized_for_symbol(trades: List[dict]) -> float:
     """
     Compute realized P&L for a single symbol using strict FIFO, supporting both long and short inventories.
     Each trade row must have fields: side, qty, price. (We tolerate casing/aliases.)
     """
-    long_lots: Deque[Lot]  = deque()  # positive inventory
-    short_lots: Deque[Lot] = deque()  # negative inventory
-    realized = 0.0
-
+    buys: List[bool] = []
+    qtys: List[int] = []
+    pxs: List[float] = []
     for row in trades:
         side = (row.get("side") or row.get("transactiontype") or "").upper()
         try:
@@ -60,48 +82,14 @@ def _fifo_realized_for_symbol(trades: List[dict]) -> float:
             continue
         if qty <= 0 or px <= 0:
             continue
-
-        if side == "BUY":
-            # First, cover shorts (realize P&L vs short entry prices)
-            remaining = qty
-            while remaining > 0 and short_lots:
-                sqty, spx = short_lots[0]
-                cover = min(remaining, sqty)
-                # Short P&L: entry sell (spx) - buy cover (px)
-                realized += (spx - px) * cover
-                sqty -= cover
-                remaining -= cover
-                if sqty == 0:
-                    short_lots.popleft()
-                else:
-                    short_lots[0] = (sqty, spx)
-            # Any remainder increases long inventory
-            if remaining > 0:
-                long_lots.append((remaining, px))
-
-        elif side == "SELL":
-            # First, sell from long inventory (realize P&L vs long entry prices)
-            remaining = qty
-            while remaining > 0 and long_lots:
-                lqty, lpx = long_lots[0]
-                cover = min(remaining, lqty)
-                # Long P&L: sell (px) - entry buy (lpx)
-                realized += (px - lpx) * cover
-                lqty -= cover
-                remaining -= cover
-                if lqty == 0:
-                    long_lots.popleft()
-                else:
-                    long_lots[0] = (lqty, lpx)
-            # Any remainder increases short inventory
-            if remaining > 0:
-                short_lots.append((remaining, px))
-
-        else:
+        if side not in ("BUY", "SELL"):
             # unknown side; skip
             continue
+        buys.append(side == "BUY")
+        qtys.append(qty)
+        pxs.append(px)
 
-    return round(realized, 2)
+    return round(fifo_realized(qtys, pxs, buys), 2)
 
 # --- public API --------------------------------------------------------------
 
@@ -1,25 +1,76 @@
 # utils/resolve.py
 from __future__ import annotations
-import re, os
+import csv
+import os
 from functools import lru_cache
 from pathlib import Path
 from typing import Tuple, List, Dict, Optional
+import numpy as np
 import pandas as pd
 
+from utils._njit import njit, HAVE_NUMBA
+# pandas.read_csv's null markers, shared with the instruments loader's pyarrow reader
+from utils.instruments import _CSV_NULL_VALUES
+
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 CSV_PATH = DATA_DIR / "OpenAPIScripMaster.csv"
 
+CACHE_DIR = DATA_DIR / ".inst_cache"
+# bump whenever _normalize changes its output, to invalidate old binary caches
+CACHE_SCHEMA = 3
+
+try:  # optional: pyarrow's CSV reader + binary (feather) copy of the normalized frame, reused across processes
+    import pyarrow as pa  # type: ignore
+    import pyarrow.csv as pa_csv  # type: ignore
+    HAVE_PYARROW = True
+except Exception:
+    pa = pa_csv = None  # type: ignore
+    HAVE_PYARROW = False
+
+# scrip-master columns read here or by utils.signal_router (matched case/space-insensitively);
+# all but lotsize / strike / tick_size are read as text, with no type inference
+_CSV_COLS = frozenset({
+    "symbol", "tradingsymbol", "exchange", "exch_seg", "series", "instrumenttype", "name",
+    "symboltoken", "token", "expiry", "lotsize", "tick_size", "optiontype", "strike",
+})
+_CSV_NUMERIC_COLS = frozenset({"lotsize", "strike", "tick_size"})
+
 def _read_csv(path: Path) -> pd.DataFrame:
+    """Raw scrip master, used columns only: pyarrow's threaded reader when installed, else pandas' C engine."""
     if not path.exists():
         raise FileNotFoundError(f"Scrip master not found at {path}")
     try:
-        return pd.read_csv(path, low_memory=False)
+        with open(path, newline="", encoding="utf-8") as fh:
+            header = next(csv.reader(fh), [])
+        enc = "utf-8"
     except UnicodeDecodeError:
-        return pd.read_csv(path, low_memory=False, encoding="utf-8-sig")
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            header = next(csv.reader(fh), [])
+        enc = "utf-8-sig"
+    cols = [c for c in header if c.strip().lower() in _CSV_COLS]
+    text = [c for c in cols if c.strip().lower() not in _CSV_NUMERIC_COLS]
+    if not HAVE_PYARROW:
+        return pd.read_csv(path, encoding=enc, usecols=cols, dtype={c: str for c in text}, engine="c")
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True, encoding=enc),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={c: pa.string() for c in text},
+            include_columns=cols,
+            null_values=_CSV_NULL_VALUES,
+            strings_can_be_null=True,
+        ),
+    )
+    df = table.to_pandas()
+    # arrow hands back None for missing strings; the C engine (and so _normalize) sees NaN
+    for c in df.columns[df.dtypes == object]:
+        df[c] = df[c].where(df[c].notna(), float("nan"))
+    return df
 
-@lru_cache(maxsize=1)
-def _load_df_cached(path: str) -> pd.DataFrame:
-    df = _read_csv(Path(path))
+# low-cardinality text columns, stored as categoricals (codes + one copy of each string)
+_CATEGORY_COLS = ("exchange", "exch_seg", "series", "instrumenttype", "name", "ex")
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = [c.strip().lower() for c in df.columns]
     want = ["symbol","tradingsymbol","exchange","exch_seg","series",
             "instrumenttype","name","symboltoken","token"]
@@ -29,40 +80,194 @@ def _load_df_cached(path: str) -> pd.DataFrame:
         df[c] = df[c].astype(str).str.strip()
     ex = df["exchange"].where(df["exchange"] != "", df["exch_seg"])
     df["ex"] = ex.astype(str).str.upper()
+    for c in _CATEGORY_COLS:
+        df[c] = df[c].astype("category")
+    # upper-cased copies for _score_arrays, computed once here instead of per lookup
+    for c in ("tradingsymbol", "symbol"):
+        df[f"{c}_u"] = df[c].str.upper()
+    for c in ("series", "instrumenttype", "name"):
+        df[f"{c}_u"] = df[c].str.upper().astype("category")
     return df
 
-def _load_df(*, refresh: bool = False) -> pd.DataFrame:
-    # Cache key = path string; bust if refresh=True
+def _binary_path(path: Path) -> Path:
+    """Feather copy of `path`'s normalized frame, keyed by its mtime (a newer CSV never matches)."""
+    return CACHE_DIR / f"resolve-{path.stem}-s{CACHE_SCHEMA}-{path.stat().st_mtime_ns:x}.feather"
+
+def _load_df_binary(path: Path) -> pd.DataFrame:
+    """Normalized scrip master: from the feather cache when current, else parsed from CSV (and cached)."""
+    if not path.exists():
+        raise FileNotFoundError(f"Scrip master not found at {path}")
+    if not HAVE_PYARROW:
+        return _normalize(_read_csv(path))
+    fpath = _binary_path(path)
+    try:
+        df = pd.read_feather(fpath)
+        # arrow hands back None for missing values in untouched object columns; CSV gives NaN
+        for c in df.columns[df.dtypes == object]:
+            df[c] = df[c].where(df[c].notna(), float("nan"))
+        return df
+    except Exception:
+        pass  # missing or unreadable cache: rebuild it below
+    df = _normalize(_read_csv(path))
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = fpath.with_suffix(f".tmp{os.getpid()}")
+        df.reset_index(drop=True).to_feather(tmp, compression="zstd")
+        os.replace(tmp, fpath)  # readers never see a half-written file
+        for old in CACHE_DIR.glob(f"resolve-{path.stem}-*.feather"):
+            if old != fpath:
+                old.unlink(missing_ok=True)
+    except Exception:
+        pass  # cache is best-effort; the parsed frame is still good
+    return df
+
+@lru_cache(maxsize=1)
+def _load_df_cached(path: str, mtime_ns: int = 0) -> pd.DataFrame:
+    return _load_df_binary(Path(path))
+
+def _df_key(path: Optional[os.PathLike | str] = None) -> Tuple[str, int]:
+    """Cache key of the scrip master at `path` (default CSV_PATH): resolved path + mtime."""
+    p = Path(path).resolve() if path else CSV_PATH.resolve()
+    try:
+        return str(p), p.stat().st_mtime_ns
+    except OSError:
+        return str(p), 0  # _load_df_binary raises the FileNotFoundError
+
+def _load_df(*, refresh: bool = False, path: Optional[os.PathLike | str] = None) -> pd.DataFrame:
+    """
+    The process-wide normalized scrip master (treat as read-only); signal_router shares it.
+    Cache key = resolved path + mtime, so an updated CSV is picked up; bust if refresh=True.
+    """
     if refresh:
         _load_df_cached.cache_clear()
-    return _load_df_cached(str(CSV_PATH))
-
-def _score_candidates(df: pd.DataFrame, sym: str, *, exact_only: bool = False) -> pd.DataFrame:
-    variants = {sym, f"{sym}-EQ"}
-    pat = re.compile(rf"^{re.escape(sym)}(?:-EQ)?$", re.IGNORECASE)
-    out = df.copy()
-
-    out["_score_exact_ts"] = out["tradingsymbol"].str.upper().isin(variants).astype(int)
-    out["_score_exact_sym"] = out["symbol"].str.upper().isin(variants).astype(int)
-    out["_score_regex"]     = (out["tradingsymbol"].str.match(pat, na=False) |
-                               out["symbol"].str.match(pat, na=False)).astype(int)
-    out["_score_series_eq"] = (out["series"].str.upper() == "EQ").astype(int)
-    out["_score_series_pen"] = (~out["series"].str.upper().isin(["", "EQ"])).astype(int) * -1  # down-weight non-EQ
-    out["_score_instr_eq"]  = out["instrumenttype"].str.upper().isin(["EQUITY","EQ","STK"]).astype(int)
-    out["_score_name"]      = out["name"].str.upper().str.contains(sym, na=False).astype(int)
-    out["_score_total"] = (
-        out["_score_exact_ts"]*7 +
-        out["_score_exact_sym"]*6 +
-        out["_score_regex"]*5 +
-        out["_score_series_eq"]*3 +
-        out["_score_instr_eq"]*2 +
-        out["_score_name"] +
-        out["_score_series_pen"]  # penalty
+        _symbol_index.cache_clear()
+        _resolve_cached.cache_clear()
+    return _load_df_cached(*_df_key(path))
+
+@lru_cache(maxsize=1)
+def _symbol_index(path: str, mtime_ns: int = 0) -> Tuple[Dict[str, int], np.ndarray, np.ndarray]:
+    """
+    Upper-cased tradingsymbol/symbol -> the rows carrying it, as CSR:
+    rows of key k are positions[starts[keys[k]]:starts[keys[k] + 1]] (ascending).
+    """
+    df = _load_df_cached(path, mtime_ns)
+    n = len(df)
+    names = np.concatenate([df["tradingsymbol_u"].to_numpy(dtype=object), df["symbol_u"].to_numpy(dtype=object)])
+    rows = np.concatenate([np.arange(n), np.arange(n)])
+    codes, uniques = pd.factorize(names)
+    order = np.lexsort((rows, codes))
+    positions = rows[order]
+    starts = np.zeros(len(uniques) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=len(uniques)), out=starts[1:])
+    return {k: i for i, k in enumerate(uniques) if k}, starts, positions
+
+def _exact_rows(path: str, mtime_ns: int, sym: str) -> np.ndarray:
+    """Rows whose tradingsymbol or symbol is SYM / SYM-EQ, ascending, each once."""
+    keys, starts, positions = _symbol_index(path, mtime_ns)
+    parts = [positions[starts[k]:starts[k + 1]] for k in (keys.get(sym), keys.get(f"{sym}-EQ")) if k is not None]
+    if not parts:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(parts))
+
+def _cat_mask(col: pd.Series, test) -> np.ndarray:
+    """Boolean `test` of a categorical column, evaluated once per category instead of per row."""
+    hit = np.asarray(test(col.cat.categories.to_numpy(dtype=object)), dtype=bool)
+    return np.append(hit, False)[col.cat.codes.to_numpy()]  # code -1 (missing) -> False
+
+def _score_masks(df: pd.DataFrame, sym: str, exact_rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, ...]:
+    """
+    Per-row score terms of `df` for `sym`, as bool arrays:
+    (exact_ts, exact_sym, series_eq, instr_eq, name, series_pen).
+    `exact_rows` (from _exact_rows) confines the exact-match compares to those rows.
+    """
+    variants = [sym, f"{sym}-EQ"]
+    ts_u = df["tradingsymbol_u"].to_numpy(dtype=object)
+    sy_u = df["symbol_u"].to_numpy(dtype=object)
+    if exact_rows is None:
+        exact_ts = (ts_u == variants[0]) | (ts_u == variants[1])
+        exact_sym = (sy_u == variants[0]) | (sy_u == variants[1])
+    else:
+        exact_ts = np.zeros(len(df), dtype=bool)
+        exact_sym = np.zeros(len(df), dtype=bool)
+        t, y = ts_u[exact_rows], sy_u[exact_rows]
+        exact_ts[exact_rows] = (t == variants[0]) | (t == variants[1])
+        exact_sym[exact_rows] = (y == variants[0]) | (y == variants[1])
+    series_eq = _cat_mask(df["series_u"], lambda c: c == "EQ")
+    series_pen = _cat_mask(df["series_u"], lambda c: ~np.isin(c, ["", "EQ"]))  # down-weight non-EQ
+    instr_eq = _cat_mask(df["instrumenttype_u"], lambda c: np.isin(c, ["EQUITY", "EQ", "STK"]))
+    name = _cat_mask(df["name_u"], lambda c: np.char.find(c.astype(str), sym) >= 0)
+    return exact_ts, exact_sym, series_eq, instr_eq, name, series_pen
+
+def _score_total(masks: Tuple[np.ndarray, ...]) -> np.ndarray:
+    """Weighted sum of _score_masks' terms: each row's int64 total score."""
+    exact_ts, exact_sym, series_eq, instr_eq, name, series_pen = (m.astype(np.int64) for m in masks)
+    # either column is SYM / SYM-EQ (what the old ^SYM(?:-EQ)?$ regex score tested)
+    any_exact = exact_ts | exact_sym
+    return (
+        exact_ts*7 +
+        exact_sym*6 +
+        any_exact*5 +
+        series_eq*3 +
+        instr_eq*2 +
+        name -
+        series_pen  # penalty
     )
 
-    if exact_only:
-        out = out[(out["_score_exact_ts"] + out["_score_exact_sym"] + out["_score_regex"]) > 0]
-    return out
+def _score_arrays(df: pd.DataFrame, sym: str) -> Dict[str, np.ndarray]:
+    """Per-row scores of `df` (a slice of the cached frame) for `sym`, as int64 arrays."""
+    masks = _score_masks(df, sym)
+    return {"total": _score_total(masks), "exact": (masks[0] | masks[1]).astype(np.int64)}
+
+@njit(cache=True)
+def _score_and_argmax_nb(exact_ts, exact_sym, series_eq, instr_eq, name, series_pen, keep):
+    """
+    _score_total fused with its max over the `keep` rows (uint8 arrays in), in one pass with
+    no temporaries: (best score, first row with it, how many rows have it); first = -1 if none.
+    """
+    best = 0
+    first = -1
+    count = 0
+    for i in range(keep.shape[0]):
+        if not keep[i]:
+            continue
+        e = exact_ts[i] | exact_sym[i]
+        s = (np.int64(exact_ts[i]) * 7 + np.int64(exact_sym[i]) * 6 + np.int64(e) * 5
+             + np.int64(series_eq[i]) * 3 + np.int64(instr_eq[i]) * 2 + np.int64(name[i]) - np.int64(series_pen[i]))
+        if first < 0 or s > best:
+            best = s
+            first = i
+            count = 1
+        elif s == best:
+            count += 1
+    return best, first, count
+
+def _best_row(masks: Tuple[np.ndarray, ...], keep: np.ndarray) -> Optional[int]:
+    """Top-ranked `keep` row as _ranked orders them, or None when no kept row scores above 0."""
+    if HAVE_NUMBA:
+        best, first, count = _score_and_argmax_nb(*(m.view(np.uint8) for m in masks), keep.view(np.uint8))
+        if first < 0 or best <= 0:
+            return None
+        if count == 1:
+            return int(first)
+    pos = np.flatnonzero(keep)
+    total = _score_total(tuple(m[pos] for m in masks))
+    if not len(pos) or total.max() <= 0:
+        return None
+    # several rows share the top score (or no numba): sort_values' tie order, as _ranked
+    return int(pos[_rank_desc(total)[0]])
+
+def _rank_desc(total: np.ndarray) -> np.ndarray:
+    """Positions by descending score; same order, ties included, as DataFrame.sort_values(ascending=False)."""
+    rev = total[::-1]
+    return (len(total) - 1 - rev.argsort(kind="quicksort"))[::-1]
+
+def _ranked(df: pd.DataFrame, sym: str, *, exact_only: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """(row positions in `df`, their total scores), best first; exact_only keeps exact hits only."""
+    sc = _score_arrays(df, sym)
+    pos = np.flatnonzero(sc["exact"] > 0) if exact_only else np.arange(len(df))
+    total = sc["total"][pos]
+    order = _rank_desc(total)
+    return pos[order], total[order]
 
 def resolve_nse_token(
     symbol: str,
@@ -75,34 +280,63 @@ def resolve_nse_token(
     Return (tradingsymbol, symboltoken) for cash symbol like 'RELIANCE'.
     Options:
       - prefer_ex: exchange tag to prefer (default 'NSE')
-      - exact_only: require exact/regex match (no fuzzy name-only hits)
+      - exact_only: require an exact SYM / SYM-EQ match (no fuzzy name-only hits)
       - refresh: bypass CSV cache (reload from disk)
+    Answers are memoized per (symbol, prefer_ex, exact_only) until the CSV changes.
     """
+    if refresh:
+        _load_df(refresh=True)
+    return _resolve_cached(symbol, prefer_ex, exact_only, *_df_key())
+
+@lru_cache(maxsize=4096)
+def _resolve_cached(symbol: str, prefer_ex: str, exact_only: bool, path: str, mtime_ns: int) -> Tuple[str, str]:
     sym = symbol.strip().upper()
-    df = _load_df(refresh=refresh)
+    df = _load_df_cached(path, mtime_ns)
 
-    pool = df[df["ex"].str.contains(prefer_ex.upper(), na=False)]
-    if pool.empty:
-        pool = df
+    in_pool = _cat_mask(df["ex"], lambda c: pd.Series(c, dtype=object).str.contains(prefer_ex.upper(), na=False))
+    if not in_pool.any():
+        in_pool = np.ones(len(df), dtype=bool)
 
-    scored = _score_candidates(pool, sym, exact_only=exact_only).sort_values("_score_total", ascending=False)
-    if scored.empty or scored["_score_total"].iloc[0] <= 0:
-        # try global pool last
-        scored = _score_candidates(df, sym, exact_only=exact_only).sort_values("_score_total", ascending=False)
-        if scored.empty or scored["_score_total"].iloc[0] <= 0:
-            raise ValueError(f"Token not found for {symbol} (prefer_ex={prefer_ex})")
+    # Fast path: an exact SYM / SYM-EQ row scores at least 11 and any other row at most 6,
+    # so when the preferred pool has exact rows the answer is among them. A single top-scoring
+    # hit is the answer outright; tied hits are ordered by the pool-wide ranking below
+    # (sort_values isn't stable, so "first row" would not be the row it picks)
+    all_hits = _exact_rows(path, mtime_ns, sym)
+    hits = all_hits[in_pool[all_hits]]
+    row: Optional[int] = None
+    if len(hits):
+        total = _score_arrays(df.iloc[hits], sym)["total"]
+        top = np.flatnonzero(total == total.max())
+        if len(top) == 1:
+            row = int(hits[top[0]])
+    if row is None:
+        # scored over the whole frame (no per-lookup copy of it), best row within the pool
+        masks = _score_masks(df, sym, all_hits)
+        exact = masks[0] | masks[1] if exact_only else np.ones(len(df), dtype=bool)
+        row = _best_row(masks, exact & in_pool)
+        if row is None:
+            # try global pool last
+            row = _best_row(masks, exact)
+            if row is None:
+                raise ValueError(f"Token not found for {symbol} (prefer_ex={prefer_ex})")
 
-    best = scored.iloc[0]
+    best = df.iloc[row]
     ts = (best.get("tradingsymbol") or best.get("symbol") or sym).strip().upper()
     token = str(best.get("symboltoken") or best.get("token") or "").strip()
     if not token or token == "0":
         raise ValueError(f"symboltoken missing for {symbol} (picked {ts})")
     return ts, token
 
+def clear_cache() -> None:
+    """Forget memoized resolve_nse_token answers (the loaded frame and index stay)."""
+    _resolve_cached.cache_clear()
+
 def debug_candidates(symbol: str, limit: int = 10, *, refresh: bool = False) -> List[Dict]:
     """Return top candidate rows for manual inspection."""
     sym = symbol.strip().upper()
     df = _load_df(refresh=refresh)
-    scored = _score_candidates(df, sym).sort_values("_score_total", ascending=False)
-    cols = ["symbol","tradingsymbol","ex","series","instrumenttype","name","symboltoken","token","_score_total"]
-    return scored[cols].head(limit).to_dict(orient="records")
+    pos, total = _ranked(df, sym)
+    cols = ["symbol","tradingsymbol","ex","series","instrumenttype","name","symboltoken","token"]
+    top = df.iloc[pos[:limit]][cols]
+    top["_score_total"] = total[:limit]
+    return top.to_dict(orient="records")
@@ -1,7 +1,10 @@
 # utils/risk_gates.py
 from __future__ import annotations
 import os
-from typing import Tuple
+import threading
+import time
+from functools import wraps
+from typing import Callable, Optional, Tuple, TypeVar
 from loguru import logger
 from utils.pnl_guard import estimate_realized_pnl_today, sum_live_quantities_today
 
@@ -35,6 +38,35 @@ def _normalize_loss_limit(v: float) -> float:
 
 RISK_MAX_LOSS = _normalize_loss_limit(_env_float("RISK_MAX_LOSS", 0.0))
 RISK_MAX_QTY  = _env_int("RISK_MAX_QTY", 0)
+# a burst of pretrade checks within this many seconds shares one trade-log scan (0 = always rescan)
+RISK_GATE_CACHE_S = max(0.0, _env_float("RISK_GATE_CACHE_S", 1.0))
+
+T = TypeVar("T")
+
+def _ttl_cache(ttl: float) -> Callable[[Callable[[], T]], Callable[[], T]]:
+    """Memoize a no-argument function for `ttl` seconds (monotonic clock)."""
+    def deco(fn: Callable[[], T]) -> Callable[[], T]:
+        cell: list = [None]  # (deadline, value) or None
+        lock = threading.Lock()
+
+        @wraps(fn)
+        def wrapper() -> T:
+            if ttl <= 0:
+                return fn()
+            with lock:  # concurrent callers in a burst wait for one computation
+                hit: Optional[tuple] = cell[0]
+                now = time.monotonic()
+                if hit is not None and now < hit[0]:
+                    return hit[1]
+                value = fn()
+                cell[0] = (now + ttl, value)
+                return value
+        wrapper.cache_clear = lambda: cell.__setitem__(0, None)  # type: ignore[attr-defined]
+        return wrapper
+    return deco
+
+_realized_pnl_today = _ttl_cache(RISK_GATE_CACHE_S)(estimate_realized_pnl_today)
+_live_qty_today = _ttl_cache(RISK_GATE_CACHE_S)(sum_live_quantities_today)
 
 def pretrade_global_risk_ok() -> bool:
     ok, _ = pretrade_global_risk_check()
@@ -46,7 +78,7 @@ def pretrade_global_risk_check() -> Tuple[bool, str]:
     """
     # P&L cap (negative threshold)
     if RISK_MAX_LOSS:
-        realized = estimate_realized_pnl_today()
+        realized = _realized_pnl_today()
         if realized <= RISK_MAX_LOSS:
             reason = (f"Daily P&L cap breached: realized ₹{realized:.2f} <= "
                       f"limit ₹{RISK_MAX_LOSS:.2f}. Blocking new trades.")
@@ -57,7 +89,7 @@ def pretrade_global_risk_check() -> Tuple[bool, str]:
 
     # Quantity cap
     if RISK_MAX_QTY:
-        q = sum_live_quantities_today()
+        q = _live_qty_today()
         if q >= RISK_MAX_QTY:
             reason = (f"Daily quantity cap reached: placed {q} >= "
                       f"limit {RISK_MAX_QTY}. Blocking new trades.")
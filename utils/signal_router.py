@@ -3,11 +3,15 @@ from __future__ import annotations
 
 import os
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 from loguru import logger
 
+import numpy as np
 import pandas as pd
 
+from utils.resolve import _cat_mask, _load_df
 from config import (
     INSTRUMENTS_CSV,
     DEFAULT_ORDER_TYPE,
@@ -30,25 +34,35 @@ def _norm_idx(sym: str) -> str:
         return "BANKNIFTY"
     return s
 
-def _load_instruments() -> pd.DataFrame:
-    path = _cs("INSTRUMENTS_CSV", INSTRUMENTS_CSV or "data/OpenAPIScripMaster.csv")
-    df = pd.read_csv(path)
-    # normalize expected columns defensively
-    for c in (
-        "exch_seg","exchange","instrumenttype","name","symbol","tradingsymbol",
-        "symboltoken","expiry","lotsize","tick_size","optiontype","strike"
-    ):
+@lru_cache(maxsize=1)
+def _load_instruments_cached(path: str, mtime_ns: int) -> pd.DataFrame:
+    # resolve's cached frame (lowercased, stripped text columns) plus the columns
+    # the router reads that it doesn't guarantee; shallow copy, so the shared frame is untouched
+    df = _load_df(path=path).copy(deep=False)
+    for c in ("expiry", "lotsize", "tick_size", "optiontype", "strike"):
         if c not in df.columns:
             df[c] = None
+    df["expiry_dt"] = _expiry_dt(df["expiry"])
     return df
 
+def _instruments_key() -> Tuple[str, int]:
+    path = Path(_cs("INSTRUMENTS_CSV", INSTRUMENTS_CSV or "data/OpenAPIScripMaster.csv")).resolve()
+    return str(path), os.stat(path).st_mtime_ns
+
+def _load_instruments() -> pd.DataFrame:
+    """Scrip master, shared with utils.resolve and reused until the file changes (read-only)."""
+    return _load_instruments_cached(*_instruments_key())
+
+@lru_cache(maxsize=512)
 def _parse_expiry(x) -> Optional[datetime]:
+    # memoized: a week's expiry string is shared by every strike (values are str / NaN / None)
     if x in (None, "", "0"):
         return None
-    # try common formats; fall back to pandas
-    for fmt in ("%Y-%m-%d", "%d-%b-%Y", "%d-%m-%Y", "%Y/%m/%d"):
+    # try common formats (Angel's own "28AUG2025" first); fall back to pandas
+    s = str(x)[:10]
+    for fmt in ("%d%b%Y", "%Y-%m-%d", "%d-%b-%Y", "%d-%m-%Y", "%Y/%m/%d"):
         try:
-            return datetime.strptime(str(x)[:10], fmt)
+            return datetime.strptime(s, fmt)
         except Exception:
             pass
     try:
@@ -56,34 +70,62 @@ def _parse_expiry(x) -> Optional[datetime]:
     except Exception:
         return None
 
+def _expiry_dt(expiry: pd.Series) -> pd.Series:
+    """expiry parsed as datetime64 (NaT if unparsable): _parse_expiry once per distinct value."""
+    uniq = pd.unique(expiry)
+    return pd.to_datetime(expiry.map(dict(zip(uniq, map(_parse_expiry, uniq)))), errors="coerce")
+
+def _is_nfo(values) -> List[bool]:
+    return [str(v).upper() == "NFO" for v in values]
+
 def _nearest_index_future(df: pd.DataFrame, symbol: str) -> Optional[dict]:
     """
     Find the nearest (>= today) NFO index future row for NIFTY / BANKNIFTY.
     """
     sym = _norm_idx(symbol)
     # Angel CSV typically marks index futures as FUTIDX under NFO
-    excol = df.get("exch_seg").fillna(df.get("exchange"))
+    # text columns come stripped (and categorical) from utils.resolve: each test runs once per
+    # category, then maps over the int codes. A missing value there is "nan" (NaN through
+    # astype(str)), or "" for a column the CSV lacks; either way fall back to exchange
+    seg = df["exch_seg"]
+    seg_missing = _cat_mask(seg, lambda c: np.isin(c, ["", "nan"]))
     mask = (
-        excol.astype(str).str.upper().eq("NFO")
-        & df.get("instrumenttype").astype(str).str.upper().isin(["FUTIDX","FUT"])
-        & df.get("name").astype(str).str.upper().eq(sym)
+        (_cat_mask(seg, _is_nfo) | (seg_missing & _cat_mask(df["exchange"], _is_nfo)))
+        & df["instrumenttype_u"].isin(["FUTIDX","FUT"]).to_numpy()
+        & (df["name_u"] == sym).to_numpy()
     )
-    futs = df[mask].copy()
+    futs = df[mask]
     if futs.empty:
         logger.warning(f"[router] No NFO FUT found for {sym}")
         return None
 
-    futs["expiry_dt"] = futs["expiry"].apply(_parse_expiry)
-    futs = futs.dropna(subset=["expiry_dt"]).sort_values("expiry_dt")
+    # expiry_dt is parsed once per frame in _load_instruments_cached
+    futs = futs[futs["expiry_dt"].notna()]
     if futs.empty:
         logger.warning(f"[router] FUT rows for {sym} have no parsable expiries.")
         return None
 
+    # earliest expiry >= today (else the earliest overall); no full sort needed
     floor = _today_floor()
     near = futs[futs["expiry_dt"] >= floor]
-    row = (near.iloc[0] if not near.empty else futs.iloc[0])
+    row = (near if not near.empty else futs).nsmallest(1, "expiry_dt").iloc[0]
     return row.to_dict()
 
+@lru_cache(maxsize=64)
+def _nearest_index_future_cached(symbol: str, date_str: str, path: str, mtime_ns: int) -> Optional[dict]:
+    # date_str only keys the cache: the nearest expiry can roll over at midnight
+    return _nearest_index_future(_load_instruments_cached(path, mtime_ns), symbol)
+
+def nearest_index_future(symbol: str) -> Optional[dict]:
+    """_nearest_index_future on the shared scrip master, memoized per (symbol, day, CSV version)."""
+    row = _nearest_index_future_cached(_norm_idx(symbol), _today_floor().strftime("%Y-%m-%d"), *_instruments_key())
+    return dict(row) if row else row
+
+def clear_cache() -> None:
+    """Forget memoized futures lookups and the router's frame (e.g. after refreshing instruments)."""
+    _nearest_index_future_cached.cache_clear()
+    _load_instruments_cached.cache_clear()
+
 def _qty_lots(row: dict, lots: int) -> int:
     try:
         lot = int(row.get("lotsize") or 1)
@@ -138,8 +180,7 @@ def build_orders_from_signal(
         logger.warning("[router] prefer_futures=False path not implemented; returning no orders.")
         return []
 
-    df = _load_instruments()
-    row = _nearest_index_future(df, symbol)
+    row = nearest_index_future(symbol)
     if not row:
         return []
 
@@ -4,7 +4,12 @@ from __future__ import annotations
 from typing import Literal, Dict
 
 def _round_tick(px: float, tick: float = 0.05) -> float:
-    steps = round(float(px) / tick)
+    if px.__class__ is not float:
+        px = float(px)
+    steps = round(px / tick)
+    if tick == 0.05:
+        # k/20 is correctly rounded, so it is exactly the value round(k * 0.05, 2) lands on
+        return steps / 20
     return round(steps * tick, 2)
 
 def _qty_int(x) -> int:
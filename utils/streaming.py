@@ -1,12 +1,16 @@
 # utils/streaming.py
 from __future__ import annotations
 
-import json
+import itertools
+import queue
 import threading
 import time
-from typing import Callable, Iterable, Dict, Any, Optional, List
+from collections import deque
+from typing import Callable, Deque, Iterable, Dict, Any, Optional, List
 from loguru import logger
 
+from utils.jsonio import loads
+
 try:
     from SmartApi import SmartWebSocketV2 as SmartWS  # Angel's V2 WS
 except Exception:
@@ -21,7 +25,7 @@ class StreamingClient:
     - Graceful stop()
     - Heartbeat watchdog
     - Dynamic subscribe/unsubscribe
-    - Thread-safe; user callbacks isolated
+    - Thread-safe; user callbacks isolated on their own thread (bounded, drop-oldest queue)
 
     Usage:
         sc = StreamingClient(api_key, client_code, jwt)
@@ -38,6 +42,7 @@ class StreamingClient:
         *,
         heartbeat_sec: float = 15.0,
         max_backoff_sec: float = 30.0,
+        tick_queue_max: int = 10_000,
     ):
         if SmartWS is None:
             raise RuntimeError("SmartWebSocketV2 not available in this environment")
@@ -50,17 +55,31 @@ class StreamingClient:
         self.max_backoff_sec = max_backoff_sec
 
         self._sws: Optional[SmartWS] = None # type: ignore
-        self._lock = threading.RLock()
+        self._lock = threading.Lock()  # never taken re-entrantly
         self._stop_evt = threading.Event()
-        self._last_tick_ts = 0.0
+        self._last_tick_ts = 0.0  # time.monotonic() of the last message; 0 = none yet
 
         # keep desired subscriptions so we can re-apply after reconnect
         self._desired_subs: List[Dict[str, Any]] = []
         self._on_tick: Optional[Callable[[Dict[str, Any]], None]] = None
 
+        # ticks are handed to on_tick by a consumer thread, so a slow handler never stalls
+        # the WS reader (or starves the heartbeat); when full, the oldest ticks are dropped
+        self._ticks: Deque[Dict[str, Any]] = deque(maxlen=max(1, int(tick_queue_max)))
+        self._tick_evt = threading.Event()
+        self._dropped = 0
+        self._consumer_th: Optional[threading.Thread] = None
+
         # watchdog thread
         self._watchdog_th: Optional[threading.Thread] = None
 
+        # one long-lived thread runs delayed actions (reconnects) instead of a Timer thread each:
+        # entries are (monotonic deadline, seq, callable); seq keeps equal deadlines FIFO
+        self._sched_q: "queue.PriorityQueue[tuple]" = queue.PriorityQueue()
+        self._sched_seq = itertools.count()
+        self._sched_evt = threading.Event()  # set on each new entry (or stop) to cut a wait short
+        self._sched_th: Optional[threading.Thread] = None
+
     # ---------- public API ----------
 
     def start(
@@ -73,12 +92,20 @@ class StreamingClient:
             self._on_tick = on_tick
             self._stop_evt.clear()
             self._spawn_ws()
+            if self._consumer_th is None or not self._consumer_th.is_alive():
+                self._consumer_th = threading.Thread(target=self._consume_loop, name="ws-ticks", daemon=True)
+                self._consumer_th.start()
+            if self._sched_th is None or not self._sched_th.is_alive():
+                self._sched_th = threading.Thread(target=self._scheduler_loop, name="ws-sched", daemon=True)
+                self._sched_th.start()
             if self.heartbeat_sec > 0 and (self._watchdog_th is None or not self._watchdog_th.is_alive()):
                 self._watchdog_th = threading.Thread(target=self._watchdog_loop, daemon=True)
                 self._watchdog_th.start()
 
     def stop(self):
         self._stop_evt.set()
+        self._tick_evt.set()  # wake the consumer so it can exit
+        self._sched_evt.set()  # ...and the scheduler
         with self._lock:
             try:
                 if self._sws:
@@ -91,12 +118,14 @@ class StreamingClient:
         """sub = {'exchangeType': 1|2, 'tokens': ['26009', ...]}"""
         with self._lock:
             self._desired_subs.append(dict(sub))
-            if self._sws:
-                try:
-                    self._sws.subscribe(sub)
-                    logger.info(f"Subscribed: {sub}")
-                except Exception as e:
-                    logger.warning(f"subscribe failed: {e}")
+            sws = self._sws
+        # network call outside the lock (a reconnect re-applies _desired_subs on open anyway)
+        if sws:
+            try:
+                sws.subscribe(sub)
+                logger.info(f"Subscribed: {sub}")
+            except Exception as e:
+                logger.warning(f"subscribe failed: {e}")
 
     def unsubscribe(self, sub: Dict[str, Any]):
         with self._lock:
@@ -105,12 +134,13 @@ class StreamingClient:
                 if s == sub:
                     self._desired_subs.pop(i)
                     break
-            if self._sws:
-                try:
-                    self._sws.unsubscribe(sub)
-                    logger.info(f"Unsubscribed: {sub}")
-                except Exception as e:
-                    logger.warning(f"unsubscribe failed: {e}")
+            sws = self._sws
+        if sws:
+            try:
+                sws.unsubscribe(sub)
+                logger.info(f"Unsubscribed: {sub}")
+            except Exception as e:
+                logger.warning(f"unsubscribe failed: {e}")
 
     # ---------- internals ----------
 
@@ -119,16 +149,17 @@ class StreamingClient:
         sws = SmartWS(self.api_key, self.client_code, self.jwt)
 
         def _on_data(wsapp, message):
-            self._last_tick_ts = time.time()
+            self._last_tick_ts = time.monotonic()
             msg = self._parse_tick(message)
             if not msg:
                 return
-            cb = self._on_tick
-            if cb:
-                try:
-                    cb(msg)
-                except Exception as e:
-                    logger.exception(f"tick handler failed: {e}")
+            ticks = self._ticks
+            if len(ticks) == ticks.maxlen:
+                self._dropped += 1  # append below pushes out the oldest
+                if self._dropped == 1 or self._dropped % 1000 == 0:
+                    logger.warning(f"tick queue full; dropped {self._dropped} oldest tick(s) so far")
+            ticks.append(msg)
+            self._tick_evt.set()
 
         def _on_open(wsapp):
             logger.info("WS open")
@@ -166,10 +197,15 @@ class StreamingClient:
         if self._stop_evt.is_set():
             return
         # backoff with jitter based on last tick age
-        age = time.time() - self._last_tick_ts if self._last_tick_ts else self.max_backoff_sec
+        age = time.monotonic() - self._last_tick_ts if self._last_tick_ts else self.max_backoff_sec
         delay = min(max(1.0, age), self.max_backoff_sec)
         logger.info(f"Reconnecting in ~{delay:.1f}s")
-        threading.Timer(delay, self._reconnect).start()
+        self._schedule(delay, self._reconnect)
+
+    def _schedule(self, delay: float, action: Callable[[], None]):
+        """Run `action` on the scheduler thread after ~`delay` seconds."""
+        self._sched_q.put((time.monotonic() + delay, next(self._sched_seq), action))
+        self._sched_evt.set()
 
     def _reconnect(self):
         if self._stop_evt.is_set():
@@ -183,12 +219,49 @@ class StreamingClient:
             self._sws = None
             self._spawn_ws()
 
+    def _consume_loop(self):
+        ticks = self._ticks
+        while not self._stop_evt.is_set():
+            if not self._tick_evt.wait(0.5):
+                continue
+            self._tick_evt.clear()  # before draining: a tick appended meanwhile sets it again
+            while ticks:
+                try:
+                    msg = ticks.popleft()
+                except IndexError:
+                    break
+                cb = self._on_tick
+                if cb:
+                    try:
+                        cb(msg)
+                    except Exception as e:
+                        logger.exception(f"tick handler failed: {e}")
+
+    def _scheduler_loop(self):
+        q = self._sched_q
+        while not self._stop_evt.is_set():
+            self._sched_evt.clear()  # before get: an entry added meanwhile sets it again
+            try:
+                deadline, seq, action = q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            wait = deadline - time.monotonic()
+            if wait > 0:
+                # not due: put it back and sleep until it is, or until an earlier entry / stop
+                q.put((deadline, seq, action))
+                self._sched_evt.wait(wait)
+                continue
+            try:
+                action()
+            except Exception as e:
+                logger.exception(f"scheduled action failed: {e}")
+
     def _watchdog_loop(self):
         # detects dead socket by missing ticks for ~2x heartbeat
         period = max(5.0, self.heartbeat_sec)
         while not self._stop_evt.wait(period):
             last = self._last_tick_ts
-            if last and (time.time() - last) > (2.5 * self.heartbeat_sec):
+            if last and (time.monotonic() - last) > (2.5 * self.heartbeat_sec):
                 logger.warning("Heartbeat stale; forcing reconnect")
                 self._reconnect()
 
@@ -198,13 +271,18 @@ class StreamingClient:
         Normalize tick payload to a dict.
         SmartWS sends dicts already; guard for string JSON.
         """
+        t = type(message)
+        if t is dict:  # the per-tick case: no further checks
+            return message
         try:
+            if t is str:
+                return loads(message)
             if isinstance(message, (dict, list)):
                 return message if isinstance(message, dict) else {"data": message}
             if isinstance(message, (bytes, bytearray)):
                 message = message.decode("utf-8", errors="ignore")
             if isinstance(message, str):
-                return json.loads(message)
+                return loads(message)
         except Exception:
             logger.debug(f"Unparseable tick: {message!r}")
         return None
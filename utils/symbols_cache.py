@@ -1,16 +1,21 @@
 # utils/symbols_cache.py
 from __future__ import annotations
-import json
+import os
 from pathlib import Path
 
+from utils.jsonio import dumps, loads
+
 CACHE = Path("data/symbols_cache.json")
 
 def load() -> dict:
     try:
-        return json.loads(CACHE.read_text())
+        return loads(CACHE.read_bytes())
     except Exception:
         return {}
 
 def save(obj: dict):
     CACHE.parent.mkdir(parents=True, exist_ok=True)
-    CACHE.write_text(json.dumps(obj, indent=2))
+    # write-then-rename: a crash mid-write leaves the previous cache intact
+    tmp = CACHE.with_suffix(f".json.tmp{os.getpid()}")
+    tmp.write_bytes(dumps(obj))
+    os.replace(tmp, CACHE)
@@ -0,0 +1,164 @@
+# utils/trade_log.py
+from __future__ import annotations
+
+import atexit
+import csv
+import io
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Sequence, Tuple
+from loguru import logger
+
+from config import TRADE_LOG_CSV, TRADE_LOG_FLUSH_MS, TRADE_LOG_UNBUFFERED
+
+HEADER = ["ts","mode","symbol","side","ordertype","qty","price","triggerprice","orderid","note","ordertag"]
+
+
+def _format_row(row: Sequence[object]) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(row)  # same quoting/line ending as writing to the file directly
+    return buf.getvalue()
+
+
+class _TradeLogWriter:
+    """
+    Append-only CSV writer for the trade log. Rows are queued and written in one
+    batch by a daemon thread every `interval_s` (and at exit / on flush()), through a
+    file handle that stays open instead of an open()/close() per row.
+    """
+
+    def __init__(self, path: Path, interval_s: float, unbuffered: bool = False):
+        self.path = Path(path)
+        self.interval_s = max(0.01, float(interval_s))
+        self.unbuffered = bool(unbuffered)
+        self._rows: Deque[str] = deque()
+        self._lock = threading.Lock()
+        self._fh: Optional[io.TextIOWrapper] = None
+        self._ino: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _handle(self) -> io.TextIOWrapper:
+        """Open file handle for self.path (caller holds _lock); reopens if the file was moved/deleted."""
+        try:
+            ino = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            ino = None
+        if self._fh is not None and ino == self._ino:
+            return self._fh
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except Exception:
+                pass
+            self._fh = None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fh = self.path.open("a", newline="", encoding="utf-8", buffering=1 << 16)
+        if ino is None:
+            fh.write(_format_row(HEADER))
+            fh.flush()
+        self._fh, self._ino = fh, os.fstat(fh.fileno()).st_ino
+        return fh
+
+    def write(self, row: Sequence[object]) -> None:
+        line = _format_row(row)
+        if self.unbuffered:
+            with self._lock:
+                fh = self._handle()
+                fh.write(line)
+                fh.flush()
+            return
+        with self._lock:
+            self._rows.append(line)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trade-log-flush", daemon=True)
+                self._thread.start()
+
+    def flush(self) -> None:
+        """Write out every queued row now."""
+        with self._lock:
+            if not self._rows:
+                return
+            fh = self._handle()
+            fh.write("".join(self._rows))  # rows stay queued if the open/write fails
+            self._rows.clear()
+            fh.flush()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval_s)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"trade log flush failed ({self.path}): {e}")
+
+
+_WRITER = _TradeLogWriter(TRADE_LOG_CSV, TRADE_LOG_FLUSH_MS / 1000.0, TRADE_LOG_UNBUFFERED)
+atexit.register(_WRITER.flush)
+
+
+def append_row(row: Sequence[object]) -> None:
+    """Queue one trade-log row (columns as HEADER)."""
+    _WRITER.write(row)
+
+
+def flush_trade_log() -> None:
+    """Make queued rows visible on disk; call before reading TRADE_LOG_CSV in-process."""
+    _WRITER.flush()
+
+
+# (path, day) -> (inode, byte offset of that day's first row)
+_DAY_OFFSETS: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+
+def day_start_offset(path: Path, day: str) -> int:
+    """
+    Byte offset of the first row dated `day` ("YYYY-MM-DD") or later in an append-only
+    CSV whose rows start with their timestamp (the trade log). Binary search over line
+    starts, cached per file: later appends only add rows at or after it. Returns 0 when
+    the file is missing, so callers just read everything.
+    """
+    key = (str(path), day)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0
+    hit = _DAY_OFFSETS.get(key)
+    if hit is not None and hit[0] == st.st_ino and hit[1] <= st.st_size:
+        return hit[1]
+
+    want = day.encode("ascii")
+    with open(path, "rb") as fh:
+        size = os.fstat(fh.fileno()).st_size
+
+        def line_start(p: int) -> int:
+            if p <= 0:
+                return 0
+            fh.seek(p - 1)
+            fh.readline()
+            return fh.tell()
+
+        def at_or_after(s: int) -> bool:
+            if s >= size:
+                return True
+            fh.seek(s)
+            head = fh.read(10)
+            if not (head[:4].isdigit() and head[4:5] == b"-"):
+                return True  # not a timestamped row: don't search past it
+            return head >= want
+
+        lo = line_start(1)  # past the header
+        hi = size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            s = line_start(mid)
+            if at_or_after(s):
+                hi = mid
+            else:
+                lo = s + 1  # every position up to s resolves to the same line
+        off = line_start(lo)
+
+    _DAY_OFFSETS[key] = (st.st_ino, off)
+    return off
@@ -1,13 +1,24 @@
 # utils/vix.py
 from __future__ import annotations
-import json
+import time
 import urllib.request, urllib.error
+from typing import Optional, Tuple
+
+from utils.jsonio import loads
 
 _UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
 _URL = "https://www.nseindia.com/api/allIndices?async=true"
 
-def get_india_vix(timeout: int = 10) -> float | None:
-    """Fetch current India VIX (best-effort). Returns float or None."""
+# last good reading: (value, monotonic deadline); failures aren't cached so the next call retries
+_TTL_S = 60.0
+_last: Optional[Tuple[float, float]] = None
+
+def get_india_vix(timeout: int = 10, *, use_cache: bool = True) -> float | None:
+    """Fetch current India VIX (best-effort). Returns float or None. Reuses a reading for up to 60 s."""
+    global _last
+    hit = _last
+    if use_cache and hit is not None and time.monotonic() < hit[1]:
+        return hit[0]
     try:
         req = urllib.request.Request(_URL, headers={
             "User-Agent": _UA,
@@ -16,8 +27,9 @@ def get_india_vix(timeout: int = 10) -> float | None:
             "Connection": "keep-alive",
         })
         with urllib.request.urlopen(req, timeout=timeout) as resp:
-            body = resp.read().decode("utf-8", errors="ignore")
-            data = json.loads(body)
+            raw = resp.read()
+        # parse the bytes directly: no decoded str copy in between
+        data = loads(raw)
     except Exception:
         return None
 
@@ -25,7 +37,9 @@ def get_india_vix(timeout: int = 10) -> float | None:
         name = (idx.get("index") or idx.get("indexSymbol") or "").strip().upper()
         if "VIX" in name:
             try:
-                return float(idx.get("last"))
+                vix = float(idx.get("last"))
             except Exception:
-                pass
+                continue
+            _last = (vix, time.monotonic() + _TTL_S)
+            return vix
     return None